@@ -8,20 +8,23 @@ import logging
 from django.utils import timezone
 from django.utils.translation import ugettext as _
 from django.db import DatabaseError, IntegrityError
+from django.db.models import Q
 from dogapi import dog_stats_api
 
 from openassessment.assessment.models import (
-    Assessment, AssessmentFeedback, AssessmentPart,
-    InvalidOptionSelection, PeerWorkflow, PeerWorkflowItem,
+    Assessment, AssessmentFeedback, AssessmentPart, SubmissionScoreSummary,
+    InvalidOptionSelection, PeerWorkflow, PeerWorkflowItem, PeerQueueEntry,
 )
 from openassessment.assessment.serializers import (
-    AssessmentSerializer, AssessmentFeedbackSerializer, RubricSerializer,
+    AssessmentSerializer, AssessmentFeedbackSerializer,
     full_assessment_dict, rubric_from_dict, serialize_assessments,
 )
 from openassessment.assessment.errors import (
     PeerAssessmentRequestError, PeerAssessmentWorkflowError, PeerAssessmentInternalError
 )
+from openassessment.assessment.matchmaking import get_matchmaker
 from submissions import api as sub_api
+from submissions.routers import use_read_replica
 
 logger = logging.getLogger("openassessment.assessment.api.peer")
 
@@ -63,6 +66,11 @@ def get_score(submission_uuid, requirements):
     if workflow is None:
         return None
 
+    # The workflow counts every completed assessment of the submission,
+    # so if that isn't enough, there's no need to look at them.
+    if workflow.graded_by_count < requirements["must_be_graded_by"]:
+        return None
+
     # This query will use the ordering defined by the assessment model
     # (descending scored_at, then descending id)
     items = workflow.graded_by.filter(
@@ -70,30 +78,66 @@ def get_score(submission_uuid, requirements):
         assessment__score_type=PEER_TYPE
     ).order_by('assessment')
 
-    submission_finished = items.count() >= requirements["must_be_graded_by"]
+    # Resolve the items that will count towards the score up front.
+    # If there aren't enough of them, the submission isn't finished.
+    scored_items = list(items.select_related('assessment__rubric')[:requirements["must_be_graded_by"]])
+    submission_finished = len(scored_items) >= requirements["must_be_graded_by"]
     if not submission_finished:
         return None
 
-    # Unfortunately, we cannot use update() after taking a slice,
-    # so we need to update the and save the items individually.
-    # One might be tempted to first query for the first n assessments,
-    # then select items that have those assessments.
-    # However, this generates a SQL query with a LIMIT in a subquery,
-    # which is not supported by some versions of MySQL.
-    # Although this approach generates more database queries, the number is likely to
-    # be relatively small (at least 1 and very likely less than 5).
-    for scored_item in items[:requirements["must_be_graded_by"]]:
-        scored_item.scored = True
-        scored_item.save()
+    # We cannot use update() after taking a slice, and filtering on a
+    # subquery with a LIMIT is not supported by some versions of MySQL,
+    # so mark the items we resolved above as scored by ID.
+    # This is a single UPDATE no matter how many items there are.
+    PeerWorkflowItem.objects.filter(
+        id__in=[item.id for item in scored_items]
+    ).update(scored=True)
+
+    rubric = scored_items[0].assessment.rubric.compiled
+
+    # Items marked scored by earlier calls still count towards the score
+    scored_assessments = list(PeerWorkflowItem.get_scored_assessments(submission_uuid))
+    median_scores = Assessment.get_median_scores_for_assessments(scored_assessments)
+
+    # Store the summary so the grade page doesn't need to recompute it
+    summary = SubmissionScoreSummary.record(
+        submission_uuid, PEER_TYPE, scored_assessments, median_scores, rubric
+    )
 
     return {
-        "points_earned": sum(
-            get_assessment_median_scores(submission_uuid).values()
-        ),
-        "points_possible": items[0].assessment.points_possible,
+        "points_earned": summary.points_earned,
+        "points_possible": summary.points_possible,
     }
 
 
+def get_score_summary(submission_uuid):
+    """
+    Retrieve the per-criterion scores stored when the peer assessment
+    score for a submission was finalized.
+
+    Args:
+        submission_uuid (str): The UUID of the submission.
+
+    Returns:
+        dict with keys "points_earned", "points_possible", "median_scores",
+        "max_scores", and "assessment_ids", or None if the score has not
+        been finalized.
+
+    Raises:
+        PeerAssessmentInternalError: An error occurred while retrieving the summary.
+
+    """
+    try:
+        summaries = SubmissionScoreSummary.objects.filter(
+            submission_uuid=submission_uuid, score_type=PEER_TYPE
+        )
+        return summaries[0].to_dict() if summaries else None
+    except DatabaseError:
+        error_message = _(u"Error getting peer assessment score summary for {}".format(submission_uuid))
+        logger.exception(error_message)
+        raise PeerAssessmentInternalError(error_message)
+
+
 def assessment_is_finished(submission_uuid, requirements):
     return bool(get_score(submission_uuid, requirements))
 
@@ -252,12 +296,7 @@ def get_rubric_max_scores(submission_uuid):
         if not assessments:
             return None
 
-        assessment = assessments[0]
-        rubric_dict = RubricSerializer.serialized_from_cache(assessment.rubric)
-        return {
-            criterion["name"]: criterion["points_possible"]
-            for criterion in rubric_dict["criteria"]
-        }
+        return dict(assessments[0].rubric.compiled.max_scores)
     except DatabaseError:
         error_message = _(
             u"Error getting rubric options max scores for submission uuid "
@@ -292,11 +331,8 @@ def get_assessment_median_scores(submission_uuid):
             information to form the median scores, an error is raised.
     """
     try:
-        workflow = PeerWorkflow.objects.get(submission_uuid=submission_uuid)
-        items = workflow.graded_by.filter(scored=True)
-        assessments = [item.assessment for item in items]
-        scores = Assessment.scores_by_criterion(assessments)
-        return Assessment.get_median_score_dict(scores)
+        assessments = PeerWorkflowItem.get_scored_assessments(submission_uuid)
+        return Assessment.get_median_scores_for_assessments(assessments)
     except DatabaseError:
         error_message = _(u"Error getting assessment median scores {}".format(submission_uuid))
         logger.exception(error_message)
@@ -343,13 +379,68 @@ def has_finished_required_evaluating(submission_uuid, required_assessments):
     return done, peers_graded
 
 
-def get_assessments(submission_uuid, scored_only=True, limit=None):
+def get_grading_counts(course_id, item_id):
+    """
+    Count, for every submission to an item, how many peers its author has
+    assessed and how many peer assessments it has received.
+
+    The counts are read from the peer workflows of the whole item in a
+    single query, so callers processing many submissions can tell which
+    of them could have finished a requirement without checking each one.
+    They only count peer assessments, since only peer assessments are
+    attached to peer workflow items.
+
+    Args:
+        course_id (unicode): The ID of the course.
+        item_id (unicode): The ID of the item in the course.
+
+    Returns:
+        dict mapping submission UUIDs to dicts with keys
+        "graded" (int) and "graded_by" (int).  Submissions with
+        neither count are omitted.
+
+    Raises:
+        PeerAssessmentInternalError: An error occurred while counting.
+
+    Examples:
+        >>> get_grading_counts("ora2/1/1", "peer-assessment-problem")
+        {
+            u"222bdf3d-a88e-11e3-859e-040ccee02800": {"graded": 5, "graded_by": 2},
+            u"53f27ecc-a88e-11e3-8543-040ccee02800": {"graded": 3, "graded_by": 3},
+        }
+
+    """
+    try:
+        workflows = PeerWorkflow.objects.filter(
+            course_id=course_id,
+            item_id=item_id,
+        ).filter(
+            Q(graded_count__gt=0) | Q(graded_by_count__gt=0)
+        ).values_list('submission_uuid', 'graded_count', 'graded_by_count')
+
+        return {
+            submission_uuid: {"graded": graded_count, "graded_by": graded_by_count}
+            for submission_uuid, graded_count, graded_by_count in workflows
+        }
+    except DatabaseError:
+        error_message = _(
+            u"Error counting peer assessments for course {course_id}, item {item_id}"
+        ).format(course_id=course_id, item_id=item_id)
+        logger.exception(error_message)
+        raise PeerAssessmentInternalError(error_message)
+
+
+def get_assessments(submission_uuid, scored_only=True, limit=None, read_replica=True):
     """Retrieve the assessments for a submission.
 
     Retrieves all the assessments for a submissions. This API returns related
     feedback without making any assumptions about grading. Any outstanding
     assessments associated with this submission will not be returned.
 
+    By default, the assessments are read from the read replica, if one is
+    configured (see `submissions.routers`).  Callers that must see an
+    assessment that was just created should set `read_replica` to False.
+
     Args:
         submission_uuid (str): The submission all the requested assessments are
             associated with. Required.
@@ -358,6 +449,7 @@ def get_assessments(submission_uuid, scored_only=True, limit=None):
         scored (boolean): Only retrieve the assessments used to generate a score
             for this submission.
         limit (int): Limit the returned assessments. If None, returns all.
+        read_replica (bool): Whether to read from the read replica.
 
     Returns:
         list(dict): A list of dictionaries, where each dictionary represents a
@@ -390,16 +482,17 @@ def get_assessments(submission_uuid, scored_only=True, limit=None):
 
     """
     try:
-        if scored_only:
-            assessments = PeerWorkflowItem.get_scored_assessments(
-                submission_uuid
-            )[:limit]
-        else:
-            assessments = Assessment.objects.filter(
-                submission_uuid=submission_uuid,
-                score_type=PEER_TYPE
-            )[:limit]
-        return serialize_assessments(assessments)
+        with use_read_replica(read_replica):
+            if scored_only:
+                assessments = PeerWorkflowItem.get_scored_assessments(
+                    submission_uuid
+                )[:limit]
+            else:
+                assessments = Assessment.objects.filter(
+                    submission_uuid=submission_uuid,
+                    score_type=PEER_TYPE
+                )[:limit]
+            return serialize_assessments(assessments)
     except DatabaseError:
         error_message = _(
             u"Error getting assessments for submission {}".format(submission_uuid)
@@ -479,13 +572,15 @@ def get_submitted_assessments(submission_uuid, scored_only=True, limit=None):
         raise PeerAssessmentInternalError(error_message)
 
 
-def get_submission_to_assess(submission_uuid, graded_by):
+def get_submission_to_assess(submission_uuid, graded_by, time_limit=None):
     """Get a submission to peer evaluate.
 
     Retrieves a submission for assessment for the given student. This will
     not return a submission submitted by the requesting scorer. Submissions are
     returned based on how many assessments are still required, and if there are
-    peers actively assessing a particular submission. If there are no
+    peers actively assessing a particular submission.  The submission is
+    chosen by the backend configured in `EDX_ORA2["PEER_MATCHMAKING_BACKEND"]`
+    (see `openassessment.assessment.matchmaking`). If there are no
     submissions requiring assessment, a submission may be returned that will be
     'over graded', and the assessment will not be counted towards the overall
     grade.
@@ -498,6 +593,11 @@ def get_submission_to_assess(submission_uuid, graded_by):
         graded_by (int): The number of assessments a submission
             requires before it has completed the peer assessment process.
 
+    Kwargs:
+        time_limit (timedelta): How long the student holds the lease on the
+            returned submission before it is released to other students.
+            Defaults to `PeerWorkflow.TIME_LIMIT`.
+
     Returns:
         dict: A peer submission for assessment. This contains a 'student_item',
             'attempt_number', 'submitted_at', 'created_at', and 'answer' field to be
@@ -533,13 +633,13 @@ def get_submission_to_assess(submission_uuid, graded_by):
     # otherwise, get the first assessment for review, otherwise,
     # get the first submission available for over grading ("over-grading").
     if peer_submission_uuid is None:
-        peer_submission_uuid = workflow.get_submission_for_review(graded_by)
+        peer_submission_uuid = get_matchmaker().get_submission_for_review(workflow, graded_by)
     if peer_submission_uuid is None:
         peer_submission_uuid = workflow.get_submission_for_over_grading()
     if peer_submission_uuid:
         try:
             submission_data = sub_api.get_submission(peer_submission_uuid)
-            PeerWorkflow.create_item(workflow, peer_submission_uuid)
+            PeerWorkflow.create_item(workflow, peer_submission_uuid, time_limit=time_limit)
             _log_workflow(peer_submission_uuid, workflow)
             return submission_data
         except sub_api.SubmissionNotFoundError:
@@ -592,6 +692,7 @@ def create_peer_workflow(submission_uuid):
             submission_uuid=submission_uuid
         )
         workflow.save()
+        PeerQueueEntry.update_for_workflow(workflow)
     except IntegrityError:
         # If we get an integrity error, it means someone else has already
         # created a workflow for this submission, so we don't need to do anything.
@@ -12,7 +12,7 @@ from openassessment.assessment.serializers import (
     full_assessment_dict, rubric_from_dict, serialize_assessments
 )
 from openassessment.assessment.models import (
-    Assessment, AssessmentPart, InvalidOptionSelection
+    Assessment, AssessmentPart, InvalidOptionSelection, SubmissionScoreSummary
 )
 from openassessment.assessment.errors import (
     SelfAssessmentRequestError, SelfAssessmentInternalError
@@ -194,16 +194,57 @@ def get_score(submission_uuid, requirements):
             'points_possible': 10
         }
     """
-    assessment = get_assessment(submission_uuid)
-    if not assessment:
+    # As in `get_assessment`, only the most recent self-assessment counts
+    assessments = list(
+        Assessment.objects.filter(
+            score_type=SELF_TYPE, submission_uuid=submission_uuid
+        ).order_by('-scored_at').select_related('rubric')[:1]
+    )
+    if not assessments:
         return None
 
+    rubric = assessments[0].rubric.compiled
+    median_scores = Assessment.get_median_scores_for_assessments(assessments)
+
+    # Store the summary so the grade page doesn't need to recompute it
+    summary = SubmissionScoreSummary.record(
+        submission_uuid, SELF_TYPE, assessments, median_scores, rubric
+    )
+
     return {
-        "points_earned": assessment["points_earned"],
-        "points_possible": assessment["points_possible"]
+        "points_earned": summary.points_earned,
+        "points_possible": summary.points_possible
     }
 
 
+def get_score_summary(submission_uuid):
+    """
+    Retrieve the per-criterion scores stored when the self-assessment
+    score for a submission was finalized.
+
+    Args:
+        submission_uuid (str): The unique identifier for the submission.
+
+    Returns:
+        dict with keys "points_earned", "points_possible", "median_scores",
+        "max_scores", and "assessment_ids", or None if the score has not
+        been finalized.
+
+    Raises:
+        SelfAssessmentInternalError: An error occurred while retrieving the summary.
+
+    """
+    try:
+        summaries = SubmissionScoreSummary.objects.filter(
+            submission_uuid=submission_uuid, score_type=SELF_TYPE
+        )
+        return summaries[0].to_dict() if summaries else None
+    except DatabaseError:
+        error_message = _(u"Error getting self assessment score summary for {}").format(submission_uuid)
+        logger.exception(error_message)
+        raise SelfAssessmentInternalError(error_message)
+
+
 def get_assessment_scores_by_criteria(submission_uuid):
     """Get the median score for each rubric criterion
 
@@ -226,8 +267,7 @@ def get_assessment_scores_by_criteria(submission_uuid):
                 score_type=SELF_TYPE, submission_uuid=submission_uuid
             ).order_by('-scored_at')[:1]
         )
-        scores = Assessment.scores_by_criterion(assessments)
-        return Assessment.get_median_score_dict(scores)
+        return Assessment.get_median_scores_for_assessments(assessments)
     except DatabaseError:
         error_message = _(u"Error getting self assessment scores for {}").format(submission_uuid)
         logger.exception(error_message)
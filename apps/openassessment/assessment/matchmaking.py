@@ -0,0 +1,354 @@
+"""
+Backends that choose which submission a student should peer assess next.
+
+The peer API asks the configured backend for the next submission that
+needs assessment.  By default this is `SqlMatchmaker`, which queries the
+`PeerQueueEntry` table on every request.  High-traffic deployments can
+set `EDX_ORA2["PEER_MATCHMAKING_BACKEND"]` to the dotted path of another
+backend, such as `InMemoryMatchmaker`, which picks candidates from
+per-process queues for each course item and checks them against the
+database before handing them out.
+
+Either way, leases and assessments are still written to the database;
+the backend only decides which submission to hand out.
+"""
+import bisect
+import heapq
+import importlib
+import itertools
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils.timezone import now
+from django.utils.translation import ugettext as _
+
+from openassessment.assessment.errors import PeerAssessmentInternalError
+from openassessment.assessment.models import PeerQueueEntry, PeerWorkflowItem
+from openassessment.assessment.signals import peer_queue_entry_updated
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BACKEND = "openassessment.assessment.matchmaking.SqlMatchmaker"
+
+# Backend instances, keyed by dotted path
+_MATCHMAKERS = dict()
+_MATCHMAKERS_LOCK = threading.Lock()
+
+
+def get_matchmaker():
+    """
+    Return the peer matchmaking backend configured in
+    `EDX_ORA2["PEER_MATCHMAKING_BACKEND"]`.
+
+    Each backend is instantiated once per process.
+
+    Returns:
+        SqlMatchmaker, InMemoryMatchmaker, or another object
+            implementing `get_submission_for_review` and `reset`.
+
+    """
+    backend_path = getattr(settings, "EDX_ORA2", {}).get("PEER_MATCHMAKING_BACKEND", DEFAULT_BACKEND)
+    with _MATCHMAKERS_LOCK:
+        if backend_path not in _MATCHMAKERS:
+            module_name, class_name = backend_path.rsplit('.', 1)
+            backend_class = getattr(importlib.import_module(module_name), class_name)
+            _MATCHMAKERS[backend_path] = backend_class()
+        return _MATCHMAKERS[backend_path]
+
+
+class SqlMatchmaker(object):
+    """
+    Choose submissions by querying the peer queue in the database.
+    """
+
+    def get_submission_for_review(self, workflow, graded_by):
+        """
+        Find the next submission for the student to assess.
+
+        Args:
+            workflow (PeerWorkflow): The workflow of the student requesting a submission.
+            graded_by (int): The number of assessments a submission requires
+                before it has completed the peer assessment process.
+
+        Returns:
+            submission_uuid (str) or None if no submission needs assessment.
+
+        Raises:
+            PeerAssessmentInternalError
+
+        """
+        return workflow.get_submission_for_review(graded_by)
+
+    def reset(self):
+        """
+        Discard any state held by the backend.  The SQL backend has none.
+        """
+        pass
+
+
+class InMemoryMatchmaker(object):
+    """
+    Choose submissions from in-memory queues, one per course item.
+
+    Each course item's queue (its "shard") is loaded from the `PeerQueueEntry`
+    table the first time a student in that item requests a submission in
+    this process.  After that, the shard follows the `peer_queue_entry_updated`
+    signal, which the peer models send on every write, to keep the order of
+    the queue roughly current without scanning the table.
+
+    The shard is only used to pick candidates, never trusted on its own:
+    other processes write to the queue too, and the signals are sent before
+    the surrounding transaction commits, so a shard can be out of date.
+    Before assigning a submission, the first `RECHECK_SIZE` candidates are
+    read back from the database (two primary-key lookups), and the shard
+    is corrected from what is found.  If none of them is still available,
+    the SQL backend decides, and if it finds a submission the shard missed,
+    the shard is discarded and reloaded on next use.
+    """
+
+    # Number of candidates from the shard to check against the database
+    RECHECK_SIZE = 10
+
+    def __init__(self):
+        self._shards = dict()
+        self._lock = threading.Lock()
+
+        peer_queue_entry_updated.connect(
+            self._entry_updated, weak=False,
+            dispatch_uid="openassessment.assessment.matchmaking.entry_updated"
+        )
+
+    def get_submission_for_review(self, workflow, graded_by):
+        """
+        Find the next submission for the student to assess.
+
+        This follows the same rules as `PeerWorkflow.get_submission_for_review`.
+
+        Args:
+            workflow (PeerWorkflow): The workflow of the student requesting a submission.
+            graded_by (int): The number of assessments a submission requires
+                before it has completed the peer assessment process.
+
+        Returns:
+            submission_uuid (str) or None if no submission needs assessment.
+
+        Raises:
+            PeerAssessmentInternalError
+
+        """
+        try:
+            shard = self._get_shard(workflow.course_id, workflow.item_id)
+            candidate_ids = shard.candidates(workflow, graded_by, self.RECHECK_SIZE)
+            if candidate_ids:
+                submission_uuid = self._recheck(shard, workflow, graded_by, candidate_ids)
+                if submission_uuid is not None:
+                    return submission_uuid
+        except DatabaseError:
+            error_message = _(
+                u"An internal error occurred while retrieving a peer submission "
+                u"for student {}".format(workflow)
+            )
+            logger.exception(error_message)
+            raise PeerAssessmentInternalError(error_message)
+
+        # The shard has no available submission; make sure the database agrees.
+        submission_uuid = workflow.get_submission_for_review(graded_by)
+        if submission_uuid is not None:
+            self._discard_shard(workflow.course_id, workflow.item_id)
+        return submission_uuid
+
+    def reset(self):
+        """
+        Discard all shards, so that they are reloaded from the database
+        on next use.
+        """
+        with self._lock:
+            self._shards = dict()
+
+    def _recheck(self, shard, workflow, graded_by, candidate_ids):
+        """
+        Read the candidates' queue entries back from the database, correct
+        the shard, and return the first candidate that is still available.
+
+        Raises:
+            DatabaseError
+
+        """
+        entries = dict(
+            (entry['workflow_id'], entry)
+            for entry in PeerQueueEntry.objects.filter(workflow_id__in=candidate_ids).values(
+                'workflow_id', 'student_id', 'submission_uuid', 'created_at', 'grader_count', 'next_expiry'
+            )
+        )
+        scored_ids = set(
+            PeerWorkflowItem.objects.filter(
+                scorer=workflow, author_id__in=candidate_ids, assessment__isnull=False
+            ).values_list('author_id', flat=True)
+        )
+
+        available = None
+        for workflow_id in candidate_ids:
+            entry = entries.get(workflow_id)
+            if entry is None:
+                shard.update_entry(workflow_id=workflow_id, removed=True)
+                continue
+            shard.update_entry(removed=False, **entry)
+            if available is None and entry['grader_count'] < graded_by and workflow_id not in scored_ids:
+                available = entry['submission_uuid']
+        return available
+
+    def _get_shard(self, course_id, item_id):
+        """
+        Return the shard for a course item, loading it if necessary.
+
+        Raises:
+            DatabaseError
+
+        """
+        key = (course_id, item_id)
+        with self._lock:
+            shard = self._shards.get(key)
+        if shard is not None:
+            return shard
+
+        shard = _PeerQueueShard.load(course_id, item_id)
+        with self._lock:
+            # Another thread may have loaded the shard in the meantime;
+            # keep whichever was stored first.
+            return self._shards.setdefault(key, shard)
+
+    def _discard_shard(self, course_id, item_id):
+        """
+        Discard the shard for a course item, so it is reloaded on next use.
+        """
+        with self._lock:
+            self._shards.pop((course_id, item_id), None)
+
+    def _loaded_shard(self, course_id, item_id):
+        """
+        Return the shard for a course item, or None if it has not been loaded.
+        """
+        with self._lock:
+            return self._shards.get((course_id, item_id))
+
+    def _entry_updated(self, sender, **kwargs):  # pylint:disable=W0613
+        """
+        Apply a change to the peer queue to the shard, if it is loaded.
+        """
+        shard = self._loaded_shard(kwargs['course_id'], kwargs['item_id'])
+        if shard is not None:
+            shard.update_entry(**kwargs)
+
+
+class _PeerQueueShard(object):
+    """
+    In-memory peer queue for a single course item.
+
+    Submissions are bucketed by grader count (completed assessments plus
+    active leases), and each bucket is kept sorted by (created_at, workflow
+    ID), so the next submissions are the oldest ones at the front of the
+    buckets below the required count.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        # Workflow ID -> dict of student_id, submission_uuid,
+        # created_at, grader_count, and next_expiry
+        self.entries = dict()
+
+        # Grader count -> sorted list of (created_at, workflow ID)
+        self.buckets = defaultdict(list)
+
+        # Heap of (next_expiry, workflow ID); may contain stale items
+        self.expiries = list()
+
+    @classmethod
+    def load(cls, course_id, item_id):
+        """
+        Load the queue for a course item from the database.
+
+        Raises:
+            DatabaseError
+
+        """
+        shard = cls()
+        entries = PeerQueueEntry.objects.filter(course_id=course_id, item_id=item_id).values(
+            'workflow_id', 'student_id', 'submission_uuid', 'created_at', 'grader_count', 'next_expiry'
+        )
+        for entry in entries:
+            shard.update_entry(removed=False, **entry)
+        return shard
+
+    def update_entry(self, workflow_id=None, student_id=None, submission_uuid=None,
+                     created_at=None, grader_count=None, next_expiry=None, removed=False, **kwargs):
+        """
+        Add, update, or remove the entry for a submission.
+        """
+        with self.lock:
+            old_entry = self.entries.pop(workflow_id, None)
+            if old_entry is not None:
+                bucket = self.buckets[old_entry['grader_count']]
+                bucket.remove((old_entry['created_at'], workflow_id))
+
+            if removed:
+                return
+
+            self.entries[workflow_id] = {
+                'student_id': student_id,
+                'submission_uuid': submission_uuid,
+                'created_at': created_at,
+                'grader_count': grader_count,
+                'next_expiry': next_expiry,
+            }
+            bisect.insort(self.buckets[grader_count], (created_at, workflow_id))
+            if next_expiry is not None:
+                heapq.heappush(self.expiries, (next_expiry, workflow_id))
+
+    def candidates(self, workflow, graded_by, limit):
+        """
+        Return the workflow IDs of up to `limit` submissions the student
+        could assess next, in queue order.  Submissions the student has
+        already assessed are not known to the shard, so they are not excluded.
+
+        Raises:
+            DatabaseError
+
+        """
+        with self.lock:
+            self._release_expired()
+
+            eligible = (
+                (created_at, workflow_id)
+                for created_at, workflow_id in heapq.merge(*[
+                    bucket for grader_count, bucket in self.buckets.iteritems()
+                    if grader_count < graded_by
+                ])
+                if self.entries[workflow_id]['student_id'] != workflow.student_id
+            )
+            return [workflow_id for __, workflow_id in itertools.islice(eligible, limit)]
+
+    def _release_expired(self):
+        """
+        Recount the submissions whose oldest lease has expired.
+
+        The recount updates the database, which in turn updates this
+        shard through the `peer_queue_entry_updated` signal.
+
+        Raises:
+            DatabaseError
+
+        """
+        current_time = now()
+        while self.expiries and self.expiries[0][0] <= current_time:
+            next_expiry, workflow_id = heapq.heappop(self.expiries)
+            entry = self.entries.get(workflow_id)
+            if entry is None or entry['next_expiry'] != next_expiry:
+                # Stale; the entry has been updated since this was pushed.
+                continue
+            for queue_entry in PeerQueueEntry.objects.filter(workflow_id=workflow_id):
+                queue_entry.refresh()
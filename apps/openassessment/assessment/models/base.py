@@ -12,21 +12,81 @@ need to then generate a matching migration for it using:
     ./manage.py schemamigration openassessment.assessment --auto
 
 """
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from copy import deepcopy
 from hashlib import sha1
 import json
+import threading
 
+from django.conf import settings
 from django.core.cache import cache
-from django.db import models
+from django.db import models, router, transaction, IntegrityError
 from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 import math
 
+# NumPy is optional; if it's installed, we use it to compute
+# the median scores for every criterion at once.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from dogapi import dog_stats_api
+
 import logging
 logger = logging.getLogger("openassessment.assessment.models")
 
 
+# Current version of the models in the cache
+# Increment this to ignore assessment models currently in the cache
+# when model fields change.
+CACHE_VERSION = 1
+
+
+def _versioned_cache_key(key, *hashed_parts):
+    """
+    Add a version number to a cache key, so we can ignore entries cached
+    by older versions of the code.
+
+    Variable-length parts of the key (for example, a list of IDs) can be
+    passed separately; they are hashed, so the key stays well under
+    memcached's 250 byte limit no matter how many or how long they are.
+
+    Args:
+        key (unicode): The original, unversioned, cache key.
+        *hashed_parts: Values to hash and append to the key.
+
+    Returns:
+        unicode: Cache key with the hash and version appended.
+
+    Examples:
+        >>> _versioned_cache_key("assessment.foo", 1, 2, 3)
+        u'assessment.foo.b85e2d4914e22b5ad3b82b312b3dc405dc17dcb8.v1'
+
+    """
+    if hashed_parts:
+        digest = sha1(u",".join(unicode(part) for part in hashed_parts).encode('utf-8')).hexdigest()
+        key = u"{}.{}".format(key, digest)
+    return u"{}.v{}".format(key, CACHE_VERSION)
+
+
+def _record_cache_access(cache_name, hit):
+    """
+    Count cache hits and misses, so we can tell whether a cache is effective.
+
+    Args:
+        cache_name (str): Name of the cache, used as a tag.
+        hit (bool): Whether the value was found in the cache.
+
+    Returns:
+        None
+
+    """
+    metric = 'openassessment.assessment.cache.hit' if hit else 'openassessment.assessment.cache.miss'
+    dog_stats_api.increment(metric, tags=[u"cache:{}".format(cache_name)])
+
+
 class InvalidOptionSelection(Exception):
     """
     The user selected options that do not match the rubric.
@@ -66,8 +126,12 @@ class Rubric(models.Model):
     @property
     def points_possible(self):
         """The total number of points that could be earned in this Rubric."""
-        criteria_points = [crit.points_possible for crit in self.criteria.all()]
-        return sum(criteria_points) if criteria_points else 0
+        return self.compiled.points_possible
+
+    @property
+    def compiled(self):
+        """The :class:`CompiledRubric` for this rubric, loaded from the cache if possible."""
+        return CompiledRubric.for_rubric(self)
 
     @staticmethod
     def content_hash_from_dict(rubric_dict):
@@ -114,49 +178,272 @@ class Rubric(models.Model):
             InvalidOptionSelection: the selected options do not match the rubric.
 
         """
-        # Cache based on the content_hash, not the id. It's slightly safer, and
-        # we don't have to worry about invalidation of the cache while running
-        # tests.
-        rubric_criteria_dict_cache_key = (
-            "assessment.rubric_criteria_dict.{}".format(self.content_hash)
-        )
+        return self.compiled.options_ids(options_selected)
+
+
+class _LRUCache(object):
+    """
+    A small, thread-safe, least-recently-used cache held in process memory.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the value for `key` (marking it as recently used), or None.
+        """
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used items if the cache is full.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all items from the cache.
+        """
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+# Default number of compiled rubrics each process keeps in memory.
+# Override with `EDX_ORA2["COMPILED_RUBRIC_CACHE_SIZE"]`.
+DEFAULT_COMPILED_RUBRIC_CACHE_SIZE = 500
+
+_COMPILED_RUBRICS = _LRUCache(
+    getattr(settings, "EDX_ORA2", {}).get(
+        "COMPILED_RUBRIC_CACHE_SIZE", DEFAULT_COMPILED_RUBRIC_CACHE_SIZE
+    )
+)
+
+
+class CompiledRubric(object):
+    """Read-only copy of a rubric's criteria and options.
+
+    Rubrics never change once they're written, so everything we need to know
+    about one -- its criteria and options, the points possible, and the
+    mapping from criterion and option names to option IDs -- can be loaded
+    once and shared by every request that uses the rubric.
+
+    Compiled rubrics are cached by `content_hash` in two tiers: a bounded
+    LRU in process memory, in front of the Django cache.  Use
+    `CompiledRubric.for_rubric` or `CompiledRubric.for_content_hash` to get
+    one, rather than constructing it directly.
+
+    Don't modify the compiled rubric or the dicts it holds; use `serialize`
+    to get a copy you can change.
+    """
+
+    def __init__(self, rubric_id, content_hash, criteria):
+        """
+        Args:
+            rubric_id (int): The ID of the :class:`Rubric`.
+            content_hash (unicode): The content hash of the rubric.
+            criteria (list of dict): The rubric's criteria, ordered by `order_num`,
+                each with keys "order_num", "name", "prompt", and "options".
+                Options are ordered by `order_num` and have keys "id",
+                "order_num", "points", "name", and "explanation".
+
+        """
+        self.id = rubric_id
+        self.content_hash = content_hash
+        self.criteria = criteria
+
+        # Criterion names --> option names --> option IDs
+        self.option_ids_by_name = {
+            criterion['name']: {option['name']: option['id'] for option in criterion['options']}
+            for criterion in criteria
+        }
+
+        # Criterion names --> points possible
+        self.max_scores = {
+            criterion['name']: max(option['points'] for option in criterion['options'])
+            for criterion in criteria
+        }
+        self.points_possible = sum(self.max_scores.values())
+
+        # Same structure as `RubricSerializer` output
+        self._serialized = {
+            'id': rubric_id,
+            'content_hash': content_hash,
+            'criteria': [
+                {
+                    'order_num': criterion['order_num'],
+                    'name': criterion['name'],
+                    'prompt': criterion['prompt'],
+                    'options': [
+                        {
+                            'order_num': option['order_num'],
+                            'points': option['points'],
+                            'name': option['name'],
+                            'explanation': option['explanation'],
+                        }
+                        for option in criterion['options']
+                    ],
+                    'points_possible': self.max_scores[criterion['name']],
+                }
+                for criterion in criteria
+            ],
+            'points_possible': self.points_possible,
+        }
+
+    @classmethod
+    def for_rubric(cls, rubric):
+        """
+        Return the compiled version of a rubric.
+
+        Args:
+            rubric (Rubric): The rubric model.
+
+        Returns:
+            CompiledRubric
+
+        Raises:
+            DatabaseError
+
+        """
+        compiled = cls._get(rubric.content_hash, {'criterion__rubric': rubric}, rubric_id=rubric.id)
+        if compiled is None:
+            return cls(rubric.id, rubric.content_hash, list())
+        return compiled
+
+    @classmethod
+    def for_content_hash(cls, content_hash):
+        """
+        Return the compiled version of the rubric with the given content hash.
+
+        Args:
+            content_hash (unicode): The content hash of the rubric.
+
+        Returns:
+            CompiledRubric, or None if there is no rubric with that hash
+                (or it doesn't have any criteria yet).
+
+        Raises:
+            DatabaseError
+
+        """
+        return cls._get(content_hash, {'criterion__rubric__content_hash': content_hash})
+
+    @classmethod
+    def _get(cls, content_hash, option_filter, rubric_id=None):
+        """
+        Look up a compiled rubric in the process-local cache, then the
+        Django cache, and finally load it from the database.
+
+        If `rubric_id` is given, cached rubrics with a different ID
+        (compiled against another database) are ignored.
+        """
+        compiled = _COMPILED_RUBRICS.get(content_hash)
+        if compiled is not None and rubric_id is not None and compiled.id != rubric_id:
+            compiled = None
+        _record_cache_access('compiled_rubric.local', compiled is not None)
+        if compiled is not None:
+            return compiled
+
+        cache_key = _versioned_cache_key(u"assessment.compiled_rubric.{}".format(content_hash))
+        cached = cache.get(cache_key)
+        if cached is not None and rubric_id is not None and cached[0] != rubric_id:
+            cached = None
+        _record_cache_access('compiled_rubric', cached is not None)
+        if cached is not None:
+            rubric_id, criteria = cached
+        else:
+            # Load every option, along with its criterion, in one query.
+            rubric_id = None
+            criteria = list()
+            options = CriterionOption.objects.filter(**option_filter).select_related('criterion').order_by(
+                'criterion__order_num', 'order_num'
+            )
+            for option in options:
+                criterion = option.criterion
+                rubric_id = criterion.rubric_id
+                if not criteria or criteria[-1]['id'] != criterion.id:
+                    criteria.append({
+                        'id': criterion.id,
+                        'order_num': criterion.order_num,
+                        'name': criterion.name,
+                        'prompt': criterion.prompt,
+                        'options': list(),
+                    })
+                criteria[-1]['options'].append({
+                    'id': option.id,
+                    'order_num': option.order_num,
+                    'points': option.points,
+                    'name': option.name,
+                    'explanation': option.explanation,
+                })
+
+            # Don't cache a rubric without criteria; it may still be in
+            # the middle of being created.
+            if not criteria:
+                return None
+            cache.set(cache_key, (rubric_id, criteria))
+
+        compiled = cls(rubric_id, content_hash, criteria)
+        _COMPILED_RUBRICS.set(content_hash, compiled)
+        return compiled
+
+    @classmethod
+    def clear_local_cache(cls):
+        """
+        Remove all compiled rubrics from this process's memory.
+        """
+        _COMPILED_RUBRICS.clear()
 
-        # Create a dict of dicts that maps:
-        # criterion names --> option names --> option ids
-        #
-        # If we've already generated one of these for this rubric, grab it from
-        # the cache instead of hitting the database again.
-        rubric_criteria_dict = cache.get(rubric_criteria_dict_cache_key)
+    def serialize(self):
+        """
+        Return the rubric in the same format as `RubricSerializer`.
 
-        if not rubric_criteria_dict:
-            rubric_criteria_dict = defaultdict(dict)
+        Returns:
+            dict: A copy that the caller is free to modify.
 
-            # Select all criteria and options for this rubric
-            # We use `select_related()` to minimize the number of database queries
-            rubric_options = CriterionOption.objects.filter(
-                criterion__rubric=self
-            ).select_related()
+        """
+        return deepcopy(self._serialized)
 
-            # Construct dictionaries for each option in the rubric
-            for option in rubric_options:
-                rubric_criteria_dict[option.criterion.name][option.name] = option.id
+    def options_ids(self, options_selected):
+        """Given a mapping of selected options, return the option IDs.
 
-            # Save it in our cache
-            cache.set(rubric_criteria_dict_cache_key, rubric_criteria_dict)
+        Args:
+            options_selected (dict): Mapping of criteria names to the names of
+                the option that was selected for that criterion.
 
+        Returns:
+            set of option ids
+
+        Raises:
+            InvalidOptionSelection: the selected options do not match the rubric.
+
+        """
         # Validate: are options selected for each criterion in the rubric?
-        if len(options_selected) != len(rubric_criteria_dict):
+        if len(options_selected) != len(self.option_ids_by_name):
             msg = _("Incorrect number of options for this rubric ({actual} instead of {expected})").format(
-                actual=len(options_selected), expected=len(rubric_criteria_dict))
+                actual=len(options_selected), expected=len(self.option_ids_by_name))
             raise InvalidOptionSelection(msg)
 
         # Look up each selected option
         option_id_set = set()
         for criterion_name, option_name in options_selected.iteritems():
-            if (criterion_name in rubric_criteria_dict and
-                option_name in rubric_criteria_dict[criterion_name]
+            if (criterion_name in self.option_ids_by_name and
+                option_name in self.option_ids_by_name[criterion_name]
             ):
-                option_id = rubric_criteria_dict[criterion_name][option_name]
+                option_id = self.option_ids_by_name[criterion_name][option_name]
                 option_id_set.add(option_id)
             else:
                 msg = _("{criterion}: {option} not found in rubric").format(
@@ -192,7 +479,7 @@ class Criterion(models.Model):
     @property
     def points_possible(self):
         """The total number of points that could be earned in this Criterion."""
-        return max(option.points for option in self.options.all())
+        return self.rubric.compiled.max_scores[self.name]
 
 
 class CriterionOption(models.Model):
@@ -287,6 +574,23 @@ class Assessment(models.Model):
     def __unicode__(self):
         return u"Assessment {}".format(self.id)
 
+    @classmethod
+    def get_median_scores_for_assessments(cls, assessments):
+        """Determine the median score for each criterion in a set of assessments.
+
+        Loads the parts of every assessment in a single query (see
+        `scores_by_criterion`), then computes every criterion median at once.
+
+        Args:
+            assessments (list): The assessments to aggregate.
+
+        Returns:
+            (dict): A dictionary with criterion name keys and median score
+                values.
+
+        """
+        return cls.get_median_score_dict(cls.scores_by_criterion(assessments))
+
     @classmethod
     def get_median_score_dict(cls, scores_dict):
         """Determine the median score in a dictionary of lists of scores
@@ -311,11 +615,49 @@ class Assessment(models.Model):
             {"foo": 3, "bar": 8}
 
         """
-        median_scores = {}
-        for criterion, criterion_scores in scores_dict.iteritems():
-            criterion_score = Assessment.get_median_score(criterion_scores)
-            median_scores[criterion] = criterion_score
-        return median_scores
+        if not scores_dict:
+            return {}
+
+        # Arrange the scores as a criterion x assessment matrix.
+        # Every assessment scores every criterion, so the rows usually
+        # have the same length; if they don't, fall back to computing
+        # the median for each criterion on its own.
+        criteria = list(scores_dict.keys())
+        matrix = [scores_dict[criterion] for criterion in criteria]
+        if numpy is not None and len(set(len(row) for row in matrix)) == 1:
+            medians = cls._get_median_scores_for_matrix(matrix)
+        else:
+            medians = [Assessment.get_median_score(row) for row in matrix]
+
+        return dict(zip(criteria, medians))
+
+    @staticmethod
+    def _get_median_scores_for_matrix(matrix):
+        """Determine the median of each row of a rectangular score matrix.
+
+        Uses NumPy to sort every row at once; the rounding matches
+        `get_median_score` (the mean of the two middle values, rounded up).
+
+        Args:
+            matrix (list): A non-empty list of equal-length lists of int values.
+
+        Returns:
+            (list): The median score of each row, as ints.
+
+        """
+        sorted_scores = numpy.sort(numpy.array(matrix, dtype=float), axis=1)
+        num_scores = sorted_scores.shape[1]
+        if num_scores == 0:
+            return [0] * len(matrix)
+
+        middle = int(math.ceil(num_scores / float(2)))
+        if num_scores % 2:
+            medians = sorted_scores[:, middle - 1]
+        else:
+            medians = numpy.ceil(
+                (sorted_scores[:, middle - 1] + sorted_scores[:, middle]) / 2
+            )
+        return [int(median) for median in medians]
 
     @staticmethod
     def get_median_score(scores):
@@ -376,22 +718,29 @@ class Assessment(models.Model):
         """
         assessments = list(assessments)  # Force us to read it all
         if not assessments:
-            return []
+            return {}
 
         # Generate a cache key that represents all the assessments we're being
-        # asked to grab scores from (comma separated list of assessment IDs)
-        cache_key = "assessments.scores_by_criterion.{}".format(
-            ",".join(str(assessment.id) for assessment in assessments)
+        # asked to grab scores from.  With over grading, there can be any
+        # number of assessments, so the IDs are hashed to keep the key short.
+        cache_key = _versioned_cache_key(
+            "assessments.scores_by_criterion",
+            *[assessment.id for assessment in assessments]
         )
         scores = cache.get(cache_key)
+        _record_cache_access("scores_by_criterion", bool(scores))
         if scores:
             return scores
 
+        # Load the parts of every assessment in a single query
+        parts = AssessmentPart.objects.filter(
+            assessment__in=[assessment.id for assessment in assessments]
+        ).select_related("option__criterion")
+
         scores = defaultdict(list)
-        for assessment in assessments:
-            for part in assessment.parts.all().select_related("option__criterion"):
-                criterion_name = part.option.criterion.name
-                scores[criterion_name].append(part.option.points)
+        for part in parts:
+            criterion_name = part.option.criterion.name
+            scores[criterion_name].append(part.option.points)
 
         cache.set(cache_key, scores)
         return scores
@@ -460,3 +809,128 @@ class AssessmentPart(models.Model):
                 assessment.parts.filter(
                     option__criterion__name=criterion_name
                 ).update(feedback=feedback)
+
+
+class SubmissionScoreSummary(models.Model):
+    """Precomputed summary of the assessments that scored a submission.
+
+    There is one summary per submission and score type (peer or self),
+    written when that assessment type finalizes the submission's score.
+    It holds everything the grade page needs to display per-criterion
+    scores, so rendering the grade is a single query rather than
+    re-deriving medians and maximums from `Assessment`/`AssessmentPart` rows.
+
+    `median_scores` and `max_scores` map criterion names to points, and
+    `assessment_ids` lists the assessments the score was computed from.
+    They are stored as JSON.
+    """
+    submission_uuid = models.CharField(max_length=128, db_index=True)
+    score_type = models.CharField(max_length=2)
+    points_earned = models.PositiveIntegerField(default=0)
+    points_possible = models.PositiveIntegerField(default=0)
+    median_scores_json = models.TextField(default="{}")
+    max_scores_json = models.TextField(default="{}")
+    assessment_ids_json = models.TextField(default="[]")
+    modified_at = models.DateTimeField(default=now)
+
+    class Meta:
+        app_label = "assessment"
+        unique_together = ('submission_uuid', 'score_type')
+
+    @property
+    def median_scores(self):
+        return json.loads(self.median_scores_json)
+
+    @property
+    def max_scores(self):
+        return json.loads(self.max_scores_json)
+
+    @property
+    def assessment_ids(self):
+        return json.loads(self.assessment_ids_json)
+
+    @classmethod
+    def record(cls, submission_uuid, score_type, assessments, median_scores, rubric):
+        """
+        Create or replace the score summary for a submission.
+
+        Scores are read far more often than they change, so if the stored
+        summary already matches, it is returned without writing anything.
+
+        Args:
+            submission_uuid (str): The submission that was scored.
+            score_type (str): The type of the assessments (e.g. "PE" or "SE").
+            assessments (list of Assessment): The assessments used to compute the score.
+            median_scores (dict): Criterion names mapped to the median points earned.
+            rubric (CompiledRubric): The rubric the assessments were made against.
+
+        Returns:
+            SubmissionScoreSummary
+
+        Raises:
+            DatabaseError
+
+        """
+        max_scores = rubric.max_scores
+        fields = {
+            'points_earned': sum(median_scores.values()),
+            'points_possible': sum(max_scores.values()),
+            'median_scores_json': json.dumps(median_scores, sort_keys=True),
+            'max_scores_json': json.dumps(max_scores, sort_keys=True),
+            'assessment_ids_json': json.dumps(sorted(assessment.id for assessment in assessments)),
+        }
+
+        summaries = list(cls.objects.filter(submission_uuid=submission_uuid, score_type=score_type)[:1])
+        if summaries:
+            summary = summaries[0]
+            if all(getattr(summary, name) == value for name, value in fields.iteritems()):
+                return summary
+            return cls._replace(summary.pk, submission_uuid, score_type, fields)
+
+        fields['modified_at'] = now()
+        using = router.db_for_write(cls)
+        sid = transaction.savepoint(using=using)
+        try:
+            summary = cls.objects.create(submission_uuid=submission_uuid, score_type=score_type, **fields)
+            transaction.savepoint_commit(sid, using=using)
+            return summary
+        except IntegrityError:
+            # Someone else (e.g. the other assessment type's request)
+            # created the summary in the meantime, so replace theirs.
+            transaction.savepoint_rollback(sid, using=using)
+            summary_id = cls.objects.filter(
+                submission_uuid=submission_uuid, score_type=score_type
+            ).values_list('id', flat=True)[0]
+            return cls._replace(summary_id, submission_uuid, score_type, fields)
+
+    @classmethod
+    def _replace(cls, summary_id, submission_uuid, score_type, fields):
+        """
+        Overwrite an existing summary with new fields.
+
+        Returns:
+            SubmissionScoreSummary
+
+        """
+        fields = dict(fields, modified_at=now())
+        cls.objects.filter(pk=summary_id).update(**fields)
+        return cls(pk=summary_id, submission_uuid=submission_uuid, score_type=score_type, **fields)
+
+    def to_dict(self):
+        """
+        Serialize the summary.
+
+        Returns:
+            dict with keys "submission_uuid", "score_type", "points_earned",
+            "points_possible", "median_scores", "max_scores", and "assessment_ids"
+
+        """
+        return {
+            'submission_uuid': self.submission_uuid,
+            'score_type': self.score_type,
+            'points_earned': self.points_earned,
+            'points_possible': self.points_possible,
+            'median_scores': self.median_scores,
+            'max_scores': self.max_scores,
+            'assessment_ids': self.assessment_ids,
+        }
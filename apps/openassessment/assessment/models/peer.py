@@ -10,17 +10,36 @@ need to then generate a matching migration for it using:
 import random
 from datetime import timedelta
 
-from django.db import models, DatabaseError
+from django.conf import settings
+from django.db import models, router, transaction, DatabaseError, IntegrityError
+from django.db.models import Count, F, Min, Max
 from django.utils.timezone import now
 from django.utils.translation import ugettext as _
 
 from openassessment.assessment.models.base import Assessment
 from openassessment.assessment.errors import PeerAssessmentWorkflowError, PeerAssessmentInternalError
+from openassessment.assessment.signals import peer_queue_entry_updated, peer_assessment_completed
 
 import logging
 logger = logging.getLogger("openassessment.assessment.models")
 
 
+def use_legacy_peer_queue():
+    """
+    Check whether the original correlated-subquery peer queue is enabled.
+
+    The indexed `PeerQueueEntry` table is used by default; setting
+    `EDX_ORA2["USE_LEGACY_PEER_QUEUE"]` to True switches submission selection
+    back to the raw SQL query so the two can be compared.  The queue table
+    is kept up to date either way.
+
+    Returns:
+        bool
+
+    """
+    return getattr(settings, "EDX_ORA2", {}).get("USE_LEGACY_PEER_QUEUE", False)
+
+
 class AssessmentFeedbackOption(models.Model):
     """
     Option a student can select to provide feedback on the feedback they received.
@@ -105,7 +124,8 @@ class PeerWorkflow(models.Model):
     created for each assessment made by this student.
 
     """
-    # Amount of time before a lease on a submission expires
+    # Default amount of time before a lease on a submission expires.
+    # Items can override this with their own time limit.
     TIME_LIMIT = timedelta(hours=8)
 
     student_id = models.CharField(max_length=40, db_index=True)
@@ -116,6 +136,15 @@ class PeerWorkflow(models.Model):
     completed_at = models.DateTimeField(null=True, db_index=True)
     grading_completed_at = models.DateTimeField(null=True, db_index=True)
 
+    # Number of completed assessments this student has made, and that
+    # this student's submission has received.  These are counted as
+    # assessments are completed, so the peer API doesn't have to count
+    # workflow items; see `reconcile_counts` to recompute them.
+    # Only peer assessments are ever attached to workflow items
+    # (by `peer_api.create_assessment`), so these only count peer assessments.
+    graded_count = models.PositiveIntegerField(default=0)
+    graded_by_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ["created_at", "id"]
         app_label = "assessment"
@@ -163,19 +192,27 @@ class PeerWorkflow(models.Model):
             raise PeerAssessmentWorkflowError(error_message)
 
     @classmethod
-    def create_item(cls, scorer_workflow, submission_uuid):
+    def create_item(cls, scorer_workflow, submission_uuid, time_limit=None):
         """
         Create a new peer workflow for a student item and submission.
 
+        Leases the submission to the scorer until `time_limit` has passed.
+
         Args:
             scorer_workflow (PeerWorkflow): The peer workflow associated with the scorer.
             submission_uuid (str): The submission associated with this workflow.
 
+        Kwargs:
+            time_limit (timedelta): How long the scorer holds the lease on the
+                submission.  Defaults to `PeerWorkflow.TIME_LIMIT`.
+
         Raises:
             PeerAssessmentInternalError: Raised when there is an internal error
                 creating the Workflow.
         """
         peer_workflow = cls.get_by_submission_uuid(submission_uuid)
+        if time_limit is None:
+            time_limit = cls.TIME_LIMIT
 
         try:
             workflow_items = PeerWorkflowItem.objects.filter(
@@ -193,7 +230,9 @@ class PeerWorkflow(models.Model):
                     submission_uuid=submission_uuid
                 )
             item.started_at = now()
+            item.expires_at = item.started_at + time_limit
             item.save()
+            PeerQueueEntry.update_for_workflow(peer_workflow)
             return item
         except DatabaseError:
             error_message = _(
@@ -222,8 +261,7 @@ class PeerWorkflow(models.Model):
                 student has open for active assessment.
 
         """
-        oldest_acceptable = now() - self.TIME_LIMIT
-        workflows = self.graded.filter(assessment__isnull=True, started_at__gt=oldest_acceptable)   # pylint:disable=E1101
+        workflows = self.graded.filter(assessment__isnull=True, expires_at__gt=now())   # pylint:disable=E1101
         return workflows[0].submission_uuid if workflows else None
 
     def get_submission_for_review(self, graded_by):
@@ -232,8 +270,13 @@ class PeerWorkflow(models.Model):
         submission that requires assessment, excluding any submission that has been
         completely graded, or is actively being reviewed by other students.
 
+        Submissions are selected from the `PeerQueueEntry` table, which keeps
+        a running count of the active and completed graders for each
+        submission, so the next submission is a single indexed range scan.
+
         Args:
-            graded_by (unicode): Student ID of the scorer.
+            graded_by (int): The number of assessments a submission requires
+                before it has completed the peer assessment process.
 
         Returns:
             submission_uuid (str): The submission_uuid for the submission to review.
@@ -243,7 +286,48 @@ class PeerWorkflow(models.Model):
                 the workflows or workflow items for this request.
 
         """
-        timeout = (now() - self.TIME_LIMIT).strftime("%Y-%m-%d %H:%M:%S")
+        if use_legacy_peer_queue():
+            return self._get_submission_for_review_legacy(graded_by)
+
+        try:
+            # Leases that have expired since the queue was last updated
+            # still count against their submissions, so release them first.
+            PeerQueueEntry.release_expired(self.course_id, self.item_id)
+
+            scored_author_ids = self.graded.filter(  # pylint:disable=E1101
+                assessment__isnull=False
+            ).values_list('author_id', flat=True)
+
+            entries = list(
+                PeerQueueEntry.objects.filter(
+                    course_id=self.course_id,
+                    item_id=self.item_id,
+                    grader_count__lt=graded_by,
+                ).exclude(
+                    student_id=self.student_id
+                ).exclude(
+                    workflow__in=scored_author_ids
+                ).order_by("created_at", "workflow")[:1]
+            )
+            return entries[0].submission_uuid if entries else None
+        except DatabaseError:
+            error_message = _(
+                u"An internal error occurred while retrieving a peer submission "
+                u"for student {}".format(self)
+            )
+            logger.exception(error_message)
+            raise PeerAssessmentInternalError(error_message)
+
+    def _get_submission_for_review_legacy(self, graded_by):
+        """
+        Find a submission for peer assessment using a correlated subquery
+        over the peer workflow items, without the `PeerQueueEntry` table.
+
+        This is the original queue query, kept so it can be compared with
+        the indexed queue.  See `get_submission_for_review` for details.
+
+        """
+        timeout = now().strftime("%Y-%m-%d %H:%M:%S")
         # The follow query behaves as the Peer Assessment Queue. This will
         # find the next submission (via PeerWorkflow) in this course / question
         # that:
@@ -270,7 +354,7 @@ class PeerWorkflow(models.Model):
                 "   select count(pwi.id) as c "
                 "   from assessment_peerworkflowitem pwi "
                 "   where pwi.author_id=pw.id "
-                "   and (pwi.assessment_id is not NULL or pwi.started_at > %s) "
+                "   and (pwi.assessment_id is not NULL or pwi.expires_at > %s) "
                 ") < %s "
                 "order by pw.created_at, pw.id "
                 "limit 1; ",
@@ -298,6 +382,14 @@ class PeerWorkflow(models.Model):
     def get_submission_for_over_grading(self):
         """
         Retrieve the next submission uuid for over grading in peer assessment.
+
+        Rather than loading every candidate workflow, pick a random ID
+        between the lowest and highest workflow IDs in this course / question
+        and take the first candidate at or after it (wrapping around to the
+        start if there is none).  This reads at most one candidate row, no
+        matter how many submissions the question has.  Gaps in the ID
+        sequence make the choice only approximately uniform, which is
+        fine for spreading over grading across submissions.
         """
         # The follow query behaves as the Peer Assessment Over Grading Queue. This
         # will find a random submission (via PeerWorkflow) in this course / question
@@ -305,26 +397,29 @@ class PeerWorkflow(models.Model):
         #  1) Does not belong to you
         #  2) Is not something you have already scored
         try:
-            query = list(PeerWorkflow.objects.raw(
-                "select pw.id, pw.submission_uuid "
-                "from assessment_peerworkflow pw "
-                "where course_id=%s "
-                "and item_id=%s "
-                "and student_id<>%s "
-                "and pw.id not in ( "
-                    "select pwi.author_id "
-                    "from assessment_peerworkflowitem pwi "
-                    "where pwi.scorer_id=%s); ",
-                [self.course_id, self.item_id, self.student_id, self.id]
-            ))
-            workflow_count = len(query)
-            if workflow_count < 1:
+            item_workflows = PeerWorkflow.objects.filter(
+                course_id=self.course_id, item_id=self.item_id
+            )
+            bounds = item_workflows.aggregate(min_id=Min('id'), max_id=Max('id'))
+            if bounds['min_id'] is None:
                 return None
 
-            random_int = random.randint(0, workflow_count - 1)
-            random_workflow = query[random_int]
+            candidates = item_workflows.exclude(
+                student_id=self.student_id
+            ).exclude(
+                id__in=self.graded.values_list('author_id', flat=True)  # pylint:disable=E1101
+            )
 
-            return random_workflow.submission_uuid
+            random_id = random.randint(bounds['min_id'], bounds['max_id'])
+            workflows = list(
+                candidates.filter(id__gte=random_id).order_by('id').values_list('submission_uuid', flat=True)[:1]
+            )
+            if not workflows:
+                workflows = list(
+                    candidates.filter(id__lt=random_id).order_by('id').values_list('submission_uuid', flat=True)[:1]
+                )
+
+            return workflows[0] if workflows else None
         except DatabaseError:
             error_message = _(
                 u"An internal error occurred while retrieving a peer submission "
@@ -371,13 +466,42 @@ class PeerWorkflow(models.Model):
                     u"submission UUID {}.".format(self.student_id, submission_uuid)
                 ))
             item = items[0]
+            newly_completed = item.assessment_id is None
             item.assessment = assessment
             item.save()
 
-            if (not item.author.grading_completed_at
-                    and item.author.graded_by.filter(assessment__isnull=False).count() >= num_required_grades):
-                item.author.grading_completed_at = now()
-                item.author.save()
+            author = item.author
+            if newly_completed:
+                # Increment the counts in the database, so concurrent
+                # assessments don't overwrite each other's counts.
+                PeerWorkflow.objects.filter(pk=self.pk).update(graded_count=F('graded_count') + 1)
+                PeerWorkflow.objects.filter(pk=author.pk).update(graded_by_count=F('graded_by_count') + 1)
+                self.graded_count += 1
+                if author.pk == self.pk:
+                    author = self
+                else:
+                    author.graded_by_count += 1
+
+            if not author.grading_completed_at:
+                # Check the count in the database, which
+                # includes assessments made concurrently.
+                grading_completed_at = now()
+                completed = PeerWorkflow.objects.filter(
+                    pk=author.pk,
+                    grading_completed_at__isnull=True,
+                    graded_by_count__gte=num_required_grades,
+                ).update(grading_completed_at=grading_completed_at)
+                if completed:
+                    author.grading_completed_at = grading_completed_at
+
+            PeerQueueEntry.update_for_workflow(author)
+            peer_assessment_completed.send(
+                sender=PeerWorkflow,
+                course_id=self.course_id,
+                item_id=self.item_id,
+                scorer_workflow_id=self.id,
+                author_workflow_id=item.author_id,
+            )
         except (DatabaseError, PeerWorkflowItem.DoesNotExist):
             error_message = _(
                 u"An internal error occurred while retrieving a workflow item for "
@@ -392,11 +516,89 @@ class PeerWorkflow(models.Model):
         """
         Returns the number of peers the student owning the workflow has graded.
 
+        This is the count as of when the workflow was loaded (plus any
+        assessments completed through this instance), so it doesn't include
+        assessments completed concurrently; reload the workflow to see them.
+
         Returns:
             integer
 
         """
-        return self.graded.filter(assessment__isnull=False).count() # pylint:disable=E1101
+        return self.graded_count
+
+    @classmethod
+    def reconcile_counts(cls, course_id=None, item_id=None, must_be_graded_by=None):
+        """
+        Recount the completed assessments made and received by each
+        workflow, and fix the counts stored on any that disagree.
+
+        A workflow's counts are only fixed if they haven't changed since
+        they were read, so assessments completed while reconciling are not
+        lost; those workflows are skipped, and can be reconciled again later.
+
+        When the number of assessments a workflow received is fixed, its
+        grading is marked complete if it now has `must_be_graded_by`
+        assessments (as `close_active_assessment` does), and its entry in
+        the peer queue is brought up to date.  Grading that was already
+        marked complete is never reopened.
+
+        Kwargs:
+            course_id (unicode): If provided, only reconcile workflows in this course.
+            item_id (unicode): If provided, only reconcile workflows for this item.
+            must_be_graded_by (int): If provided, the number of assessments
+                a submission must receive to complete grading.
+
+        Returns:
+            tuple of (num_fixed, num_skipped): The number of workflows whose
+            counts were fixed, and the number whose counts changed before
+            they could be fixed.
+
+        Raises:
+            DatabaseError
+
+        """
+        workflows = cls.objects.all()
+        items = PeerWorkflowItem.objects.filter(assessment__isnull=False)
+        if course_id is not None:
+            workflows = workflows.filter(course_id=course_id)
+            items = items.filter(author__course_id=course_id)
+        if item_id is not None:
+            workflows = workflows.filter(item_id=item_id)
+            items = items.filter(author__item_id=item_id)
+
+        graded_counts = dict(
+            (row['scorer'], row['num'])
+            for row in items.order_by().values('scorer').annotate(num=Count('id'))
+        )
+        graded_by_counts = dict(
+            (row['author'], row['num'])
+            for row in items.order_by().values('author').annotate(num=Count('id'))
+        )
+
+        num_fixed = num_skipped = 0
+        stored_counts = workflows.order_by().values_list('id', 'graded_count', 'graded_by_count')
+        for workflow_id, graded_count, graded_by_count in stored_counts.iterator():
+            actual_counts = (graded_counts.get(workflow_id, 0), graded_by_counts.get(workflow_id, 0))
+            if actual_counts != (graded_count, graded_by_count):
+                fixed = cls.objects.filter(
+                    pk=workflow_id, graded_count=graded_count, graded_by_count=graded_by_count
+                ).update(
+                    graded_count=actual_counts[0], graded_by_count=actual_counts[1]
+                )
+                if not fixed:
+                    num_skipped += 1
+                    continue
+
+                num_fixed += 1
+                if actual_counts[1] != graded_by_count:
+                    if must_be_graded_by is not None:
+                        cls.objects.filter(
+                            pk=workflow_id,
+                            grading_completed_at__isnull=True,
+                            graded_by_count__gte=must_be_graded_by,
+                        ).update(grading_completed_at=now())
+                    PeerQueueEntry.update_for_workflow(cls.objects.get(pk=workflow_id))
+        return num_fixed, num_skipped
 
     def __repr__(self):
         return (
@@ -423,6 +625,11 @@ class PeerWorkflowItem(models.Model):
     started_at = models.DateTimeField(default=now, db_index=True)
     assessment = models.ForeignKey(Assessment, null=True)
 
+    # When the scorer's lease on the submission runs out.  Until then (and
+    # unless the assessment is completed) no other scorer is given the
+    # submission in its place.
+    expires_at = models.DateTimeField(null=True, db_index=True)
+
     # This WorkflowItem was used to determine the final score for the Workflow.
     scored = models.BooleanField(default=False)
 
@@ -439,11 +646,8 @@ class PeerWorkflowItem(models.Model):
 
         """
         return Assessment.objects.filter(
-            pk__in=[
-                item.assessment.pk for item in PeerWorkflowItem.objects.filter(
-                    submission_uuid=submission_uuid, scored=True
-                )
-            ]
+            peerworkflowitem__submission_uuid=submission_uuid,
+            peerworkflowitem__scored=True,
         )
 
     class Meta:
@@ -454,8 +658,209 @@ class PeerWorkflowItem(models.Model):
         return (
             "PeerWorkflowItem(scorer={0.scorer}, author={0.author}, "
             "submission_uuid={0.submission_uuid}, "
-            "started_at={0.started_at}, assessment={0.assessment}, "
-            "scored={0.scored})"
+            "started_at={0.started_at}, expires_at={0.expires_at}, "
+            "assessment={0.assessment}, scored={0.scored})"
+        ).format(self)
+
+    def __unicode__(self):
+        return repr(self)
+
+
+class PeerQueueEntry(models.Model):
+    """Denormalized entry in the peer assessment queue for a submission.
+
+    There is one entry for every peer workflow in a course item whose
+    submission has not yet received enough assessments.  Each entry holds
+    `grader_count`, the number of completed assessments plus unexpired
+    leases on the submission, so finding the next submission to review is
+    a range scan over the (course_id, item_id, grader_count, created_at)
+    index instead of a count for every candidate workflow.
+
+    Entries are updated whenever a workflow item is leased or closed, and
+    removed once grading of the submission is complete.  Each change sends
+    the `peer_queue_entry_updated` signal.  An expired lease
+    still counts towards `grader_count` until the entry is refreshed, so
+    `next_expiry` records when the oldest active lease runs out.
+
+    """
+    workflow = models.OneToOneField(PeerWorkflow, related_name="queue_entry")
+
+    # Copied from the peer workflow, which is immutable for these fields,
+    # so that the queue can be scanned without a join.
+    course_id = models.CharField(max_length=40, db_index=True)
+    item_id = models.CharField(max_length=128, db_index=True)
+    student_id = models.CharField(max_length=40)
+    submission_uuid = models.CharField(max_length=128)
+    created_at = models.DateTimeField(default=now, db_index=True)
+
+    # Number of completed assessments plus active leases
+    grader_count = models.PositiveIntegerField(default=0)
+
+    # When the oldest active lease expires (None if there are no active leases)
+    next_expiry = models.DateTimeField(null=True, db_index=True)
+
+    class Meta:
+        ordering = ["created_at", "workflow"]
+        app_label = "assessment"
+
+    @classmethod
+    def update_for_workflow(cls, workflow):
+        """
+        Bring the queue entry for a peer workflow up to date.
+
+        Creates the entry if the submission still needs assessments,
+        recounts its graders, and removes the entry once grading is complete.
+
+        Args:
+            workflow (PeerWorkflow): The workflow of the submission's author.
+
+        Returns:
+            None
+
+        Raises:
+            DatabaseError
+
+        """
+        entry_data = {
+            'course_id': workflow.course_id,
+            'item_id': workflow.item_id,
+            'student_id': workflow.student_id,
+            'submission_uuid': workflow.submission_uuid,
+            'created_at': workflow.created_at,
+        }
+
+        if workflow.grading_completed_at is not None:
+            cls.objects.filter(workflow=workflow).delete()
+            peer_queue_entry_updated.send(
+                sender=cls, workflow_id=workflow.id, grader_count=None,
+                next_expiry=None, removed=True, **entry_data
+            )
+            return
+
+        grader_count, next_expiry = cls._count_graders(workflow.id)
+        updated = cls.objects.filter(workflow=workflow).update(
+            grader_count=grader_count, next_expiry=next_expiry
+        )
+        if not updated:
+            using = router.db_for_write(cls)
+            sid = transaction.savepoint(using=using)
+            try:
+                cls.objects.create(
+                    workflow=workflow,
+                    grader_count=grader_count,
+                    next_expiry=next_expiry,
+                    **entry_data
+                )
+                transaction.savepoint_commit(sid, using=using)
+            except IntegrityError:
+                # Another request created the entry in the meantime,
+                # so update theirs instead.
+                transaction.savepoint_rollback(sid, using=using)
+                cls.objects.filter(workflow=workflow).update(
+                    grader_count=grader_count, next_expiry=next_expiry
+                )
+
+        peer_queue_entry_updated.send(
+            sender=cls, workflow_id=workflow.id, grader_count=grader_count,
+            next_expiry=next_expiry, removed=False, **entry_data
+        )
+
+    @classmethod
+    def release_expired(cls, course_id=None, item_id=None):
+        """
+        Refresh the entries that have expired leases, so those submissions
+        become available to other scorers.
+
+        Only entries whose `next_expiry` has passed are touched, so this is
+        an indexed lookup rather than a scan of the lease time window.
+
+        Kwargs:
+            course_id (unicode): If provided, only release leases in this course.
+            item_id (unicode): If provided, only release leases for this item.
+
+        Returns:
+            int: The number of queue entries that were refreshed.
+
+        Raises:
+            DatabaseError
+
+        """
+        expired_entries = cls.objects.filter(next_expiry__lte=now())
+        if course_id is not None:
+            expired_entries = expired_entries.filter(course_id=course_id)
+        if item_id is not None:
+            expired_entries = expired_entries.filter(item_id=item_id)
+
+        count = 0
+        for entry in expired_entries:
+            entry.refresh()
+            count += 1
+        return count
+
+    def refresh(self):
+        """
+        Recount the graders of this entry's submission and save the entry.
+
+        Returns:
+            None
+
+        Raises:
+            DatabaseError
+
+        """
+        self.grader_count, self.next_expiry = self._count_graders(self.workflow_id)
+        PeerQueueEntry.objects.filter(pk=self.pk).update(
+            grader_count=self.grader_count, next_expiry=self.next_expiry
+        )
+        peer_queue_entry_updated.send(
+            sender=PeerQueueEntry,
+            course_id=self.course_id,
+            item_id=self.item_id,
+            workflow_id=self.workflow_id,
+            student_id=self.student_id,
+            submission_uuid=self.submission_uuid,
+            created_at=self.created_at,
+            grader_count=self.grader_count,
+            next_expiry=self.next_expiry,
+            removed=False,
+        )
+
+    @staticmethod
+    def _count_graders(workflow_id):
+        """
+        Count the completed assessments and active leases on a submission.
+
+        Args:
+            workflow_id (int): The ID of the author's peer workflow.
+
+        Returns:
+            tuple of (grader count, expiry of the oldest active lease or None)
+
+        Raises:
+            DatabaseError
+
+        """
+        current_time = now()
+        items = PeerWorkflowItem.objects.filter(
+            author_id=workflow_id
+        ).values_list('assessment_id', 'expires_at')
+
+        completed_count = 0
+        active_expiries = []
+        for assessment_id, expires_at in items:
+            if assessment_id is not None:
+                completed_count += 1
+            elif expires_at is not None and expires_at > current_time:
+                active_expiries.append(expires_at)
+
+        next_expiry = min(active_expiries) if active_expiries else None
+        return completed_count + len(active_expiries), next_expiry
+
+    def __repr__(self):
+        return (
+            "PeerQueueEntry(workflow={0.workflow_id}, course_id={0.course_id}, "
+            "item_id={0.item_id}, grader_count={0.grader_count}, "
+            "next_expiry={0.next_expiry})"
         ).format(self)
 
     def __unicode__(self):
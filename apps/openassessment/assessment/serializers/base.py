@@ -10,31 +10,12 @@ from rest_framework import serializers
 from openassessment.assessment.models import (
     Assessment, AssessmentPart, Criterion, CriterionOption, Rubric,
 )
+from openassessment.assessment.models.base import CACHE_VERSION, _versioned_cache_key
 
 
 logger = logging.getLogger(__name__)
 
 
-# Current version of the models in the cache
-# Increment this to ignore assessment models currently in the cache
-# when model fields change.
-CACHE_VERSION = 1
-
-
-def _versioned_cache_key(key):
-    """
-    Add a version number to a cache key, so we
-
-    Args:
-        key (unicode): The original, unversioned, cache key.
-
-    Returns:
-        unicode: Cache key with the version appended.
-
-    """
-    return u"{}.v{}".format(key, CACHE_VERSION)
-
-
 class InvalidRubric(Exception):
     """This can be raised during the deserialization process."""
     def __init__(self, errors):
@@ -126,12 +107,12 @@ class RubricSerializer(NestedModelSerializer):
         """For a given `Rubric` model object, return a serialized version.
 
         This method will attempt to use the cache if possible, first looking at
-        the `local_cache` dict you can pass in, and then looking at whatever
-        Django cache is configured.
+        the `local_cache` dict you can pass in, and then at the cached
+        :class:`CompiledRubric`.
 
         Args:
             rubric (Rubric): The Rubric model to get the serialized form of.
-            local_cach (dict): Mapping of `rubric.content_hash` to serialized
+            local_cache (dict): Mapping of `rubric.content_hash` to serialized
                 rubric dictionary. We include this so that we can call this
                 method in a loop.
 
@@ -147,19 +128,9 @@ class RubricSerializer(NestedModelSerializer):
         if rubric.content_hash in local_cache:
             return local_cache[rubric.content_hash]
 
-        # Check the external cache (e.g. memcached)
-        rubric_dict_cache_key = (
-            "RubricSerializer.serialized_from_cache.{}"
-            .format(rubric.content_hash)
-        )
-        rubric_dict = cache.get(rubric_dict_cache_key)
-        if rubric_dict:
-            local_cache[rubric.content_hash] = rubric_dict
-            return rubric_dict
-
-        # Grab it from the database
-        rubric_dict = RubricSerializer(rubric).data
-        cache.set(rubric_dict_cache_key, rubric_dict)
+        # The compiled rubric is cached in process memory and in the
+        # external cache (e.g. memcached)
+        rubric_dict = rubric.compiled.serialize()
         local_cache[rubric.content_hash] = rubric_dict
 
         return rubric_dict
@@ -301,6 +272,10 @@ def rubric_from_dict(rubric_dict):
     # Calculate the hash based on the rubric content...
     content_hash = Rubric.content_hash_from_dict(rubric_dict)
 
+    # Always look the rubric up, rather than trusting the ID of a cached
+    # compiled rubric: the cache may outlive the row (for example, if the
+    # transaction that created it was rolled back).  The compiled rubric
+    # is still loaded from the cache, keyed by the ID found here.
     try:
         rubric = Rubric.objects.get(content_hash=content_hash)
     except Rubric.DoesNotExist:
@@ -0,0 +1,26 @@
+"""
+Signals sent when the state of the peer assessment queue changes.
+
+These let alternative peer matchmaking backends (see
+`openassessment.assessment.matchmaking`) stay consistent with the
+database without having to hook each write path individually.
+
+The signals are sent when the change is written, before the surrounding
+transaction commits, and only within the process that made it, so
+receivers should treat them as hints and check the database before
+relying on them.
+"""
+from django.dispatch import Signal
+
+
+# Sent by `PeerQueueEntry` whenever the queue entry for a submission is
+# created, recounted, or removed because grading is complete.
+peer_queue_entry_updated = Signal(providing_args=[
+    "course_id", "item_id", "workflow_id", "student_id", "submission_uuid",
+    "created_at", "grader_count", "next_expiry", "removed",
+])
+
+# Sent by `PeerWorkflow` when a scorer completes an assessment of a submission.
+peer_assessment_completed = Signal(providing_args=[
+    "course_id", "item_id", "scorer_workflow_id", "author_workflow_id",
+])
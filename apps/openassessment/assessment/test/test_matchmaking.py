@@ -0,0 +1,177 @@
+"""
+Tests for the peer matchmaking backends.
+"""
+import datetime
+from django.conf import settings
+from django.db import DatabaseError
+from django.test.utils import override_settings
+from django.utils import timezone
+from mock import patch
+from nose.tools import raises
+
+from openassessment.test_utils import CacheResetTest
+from openassessment.assessment.api import peer as peer_api
+from openassessment.assessment.errors import PeerAssessmentInternalError
+from openassessment.assessment.matchmaking import (
+    get_matchmaker, SqlMatchmaker, InMemoryMatchmaker
+)
+from openassessment.assessment.models import PeerWorkflow, PeerQueueEntry
+from openassessment.assessment.test.test_peer import ASSESSMENT_DICT, RUBRIC_DICT
+from submissions import api as sub_api
+from submissions.tests.test_api import STUDENT_ITEM
+
+
+IN_MEMORY_BACKEND = "openassessment.assessment.matchmaking.InMemoryMatchmaker"
+IN_MEMORY_SETTINGS = dict(settings.EDX_ORA2, PEER_MATCHMAKING_BACKEND=IN_MEMORY_BACKEND)
+
+
+class GetMatchmakerTest(CacheResetTest):
+    """
+    Tests for choosing the matchmaking backend.
+    """
+
+    def test_default_backend(self):
+        self.assertIsInstance(get_matchmaker(), SqlMatchmaker)
+
+    @override_settings(EDX_ORA2=IN_MEMORY_SETTINGS)
+    def test_in_memory_backend(self):
+        matchmaker = get_matchmaker()
+        self.assertIsInstance(matchmaker, InMemoryMatchmaker)
+
+        # The backend is created once per process
+        self.assertIs(get_matchmaker(), matchmaker)
+
+
+@override_settings(EDX_ORA2=IN_MEMORY_SETTINGS)
+class InMemoryMatchmakerTest(CacheResetTest):
+    """
+    Tests for the in-memory matchmaking backend.
+    """
+
+    def setUp(self):
+        super(InMemoryMatchmakerTest, self).setUp()
+        self.matchmaker = get_matchmaker()
+        self.matchmaker.reset()
+
+    def test_loads_existing_queue(self):
+        buffy = self._create_workflow("Buffy")
+        xander = self._create_workflow("Xander")
+        willow = self._create_workflow("Willow")
+
+        # Xander's submission is leased before the shard is loaded
+        PeerWorkflow.create_item(willow, xander.submission_uuid)
+
+        self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 1), willow.submission_uuid)
+        self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 2), xander.submission_uuid)
+
+    def test_follows_writes(self):
+        buffy = self._create_workflow("Buffy")
+        xander = self._create_workflow("Xander")
+
+        # Load the shard
+        self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 1), xander.submission_uuid)
+
+        # Submissions created and leased after loading are reflected in the shard
+        willow = self._create_workflow("Willow")
+        PeerWorkflow.create_item(buffy, xander.submission_uuid)
+
+        # Each request only reads back the candidates it considers
+        with self.assertNumQueries(6):
+            self.assertEqual(self.matchmaker.get_submission_for_review(willow, 1), buffy.submission_uuid)
+            self.assertEqual(self.matchmaker.get_submission_for_review(xander, 1), buffy.submission_uuid)
+            self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 1), willow.submission_uuid)
+
+    def test_releases_expired_leases(self):
+        buffy = self._create_workflow("Buffy")
+        xander = self._create_workflow("Xander")
+        willow = self._create_workflow("Willow")
+
+        PeerWorkflow.create_item(buffy, xander.submission_uuid, time_limit=datetime.timedelta(minutes=5))
+        PeerWorkflow.create_item(xander, buffy.submission_uuid, time_limit=datetime.timedelta(minutes=5))
+        self.assertIs(self.matchmaker.get_submission_for_review(willow, 1), None)
+
+        # Once the lease runs out, the submission is handed out again
+        the_future = timezone.now() + datetime.timedelta(minutes=10)
+        with patch('openassessment.assessment.matchmaking.now') as mock_now:
+            mock_now.return_value = the_future
+            with patch('openassessment.assessment.models.peer.now') as mock_model_now:
+                mock_model_now.return_value = the_future
+                self.assertEqual(self.matchmaker.get_submission_for_review(willow, 1), buffy.submission_uuid)
+
+    def test_agrees_with_sql(self):
+        workflows = [self._create_workflow(name) for name in ["Buffy", "Xander", "Willow", "Giles", "Anya"]]
+        PeerWorkflow.create_item(workflows[0], workflows[1].submission_uuid)
+        PeerWorkflow.create_item(workflows[2], workflows[1].submission_uuid)
+        PeerWorkflow.create_item(workflows[3], workflows[2].submission_uuid)
+
+        for workflow in workflows:
+            for graded_by in range(1, 4):
+                self.assertEqual(
+                    self.matchmaker.get_submission_for_review(workflow, graded_by),
+                    workflow.get_submission_for_review(graded_by)
+                )
+
+    def test_excludes_scored_submissions(self):
+        tim_sub = self._create_submission("Tim")
+        bob_sub = self._create_submission("Bob")
+        sally_sub = self._create_submission("Sally")
+
+        # Bob assesses Tim's submission, which still needs more assessments
+        self.assertEqual(peer_api.get_submission_to_assess(bob_sub['uuid'], 3)['uuid'], tim_sub['uuid'])
+        peer_api.create_assessment(
+            bob_sub['uuid'], "Bob",
+            ASSESSMENT_DICT['options_selected'],
+            ASSESSMENT_DICT['criterion_feedback'],
+            ASSESSMENT_DICT['overall_feedback'],
+            RUBRIC_DICT, 3,
+        )
+
+        # Bob isn't given Tim's submission again
+        bob = PeerWorkflow.get_by_submission_uuid(bob_sub['uuid'])
+        self.assertEqual(self.matchmaker.get_submission_for_review(bob, 3), sally_sub['uuid'])
+
+    def test_rechecks_stale_shard(self):
+        buffy = self._create_workflow("Buffy")
+        xander = self._create_workflow("Xander")
+        willow = self._create_workflow("Willow")
+
+        # Load the shard
+        self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 1), xander.submission_uuid)
+
+        # Another process leases Xander's submission; this process is not told
+        PeerQueueEntry.objects.filter(workflow=xander).update(grader_count=1)
+        self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 1), willow.submission_uuid)
+
+        # Another process removes Willow's submission from the queue
+        PeerQueueEntry.objects.filter(workflow=willow).delete()
+        self.assertIs(self.matchmaker.get_submission_for_review(buffy, 1), None)
+
+    def test_falls_back_to_sql(self):
+        buffy = self._create_workflow("Buffy")
+        self.assertIs(self.matchmaker.get_submission_for_review(buffy, 1), None)
+
+        # Another process adds a submission to the queue; this process is not told
+        with patch('openassessment.assessment.models.peer.peer_queue_entry_updated'):
+            xander = self._create_workflow("Xander")
+
+        # The database has the final say, and the shard is reloaded
+        self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 1), xander.submission_uuid)
+        with self.assertNumQueries(3):
+            self.assertEqual(self.matchmaker.get_submission_for_review(buffy, 1), xander.submission_uuid)
+
+    @raises(PeerAssessmentInternalError)
+    def test_load_database_error(self):
+        buffy = self._create_workflow("Buffy")
+        with patch.object(PeerQueueEntry.objects, 'filter') as mock_filter:
+            mock_filter.side_effect = DatabaseError("Oh no!")
+            self.matchmaker.get_submission_for_review(buffy, 1)
+
+    def _create_submission(self, student_id):
+        student_item = dict(STUDENT_ITEM, student_id=student_id)
+        submission = sub_api.create_submission(student_item, u"{}'s answer".format(student_id))
+        peer_api.create_peer_workflow(submission['uuid'])
+        return submission
+
+    def _create_workflow(self, student_id):
+        submission = self._create_submission(student_id)
+        return PeerWorkflow.get_by_submission_uuid(submission['uuid'])
@@ -3,13 +3,18 @@
 Tests for assessment models.
 """
 
+import random
+from dogapi import dog_stats_api
+from mock import patch
 from openassessment.test_utils import CacheResetTest
 from submissions import api as sub_api
 from openassessment.assessment.models import (
-    Rubric, Criterion, CriterionOption, InvalidOptionSelection,
-    AssessmentFeedback, AssessmentFeedbackOption,
+    Rubric, CompiledRubric, Criterion, CriterionOption, InvalidOptionSelection,
+    Assessment, AssessmentPart, AssessmentFeedback, AssessmentFeedbackOption,
     PeerWorkflow, PeerWorkflowItem
 )
+from openassessment.assessment.models.base import CACHE_VERSION, _versioned_cache_key, _LRUCache
+from openassessment.assessment.serializers import rubric_from_dict, RubricSerializer
 
 
 class TestRubricOptionIds(CacheResetTest):
@@ -109,6 +114,94 @@ class TestRubricOptionIds(CacheResetTest):
             })
 
 
+class TestCompiledRubric(CacheResetTest):
+    """
+    Test the cached, compiled form of rubrics.
+    """
+
+    RUBRIC = {
+        'criteria': [
+            {
+                'order_num': criterion_num,
+                'name': u"𝓬𝓻𝓲𝓽𝓮𝓻𝓲𝓸𝓷 {}".format(criterion_num),
+                'prompt': u"prompt {}".format(criterion_num),
+                'options': [
+                    {
+                        'order_num': option_num,
+                        'name': u"option {}".format(option_num),
+                        'points': option_num * (criterion_num + 1),
+                        'explanation': u"explanation {}".format(option_num),
+                    }
+                    for option_num in range(3)
+                ]
+            }
+            for criterion_num in range(3)
+        ]
+    }
+
+    def test_compiled_rubric(self):
+        rubric = rubric_from_dict(self.RUBRIC)
+
+        # Every criterion and option is loaded in one query
+        with self.assertNumQueries(1):
+            compiled = CompiledRubric.for_rubric(rubric)
+
+        self.assertEqual(compiled.id, rubric.id)
+        self.assertEqual(compiled.content_hash, rubric.content_hash)
+        self.assertEqual(compiled.points_possible, 12)
+        self.assertEqual(compiled.max_scores, {
+            u"𝓬𝓻𝓲𝓽𝓮𝓻𝓲𝓸𝓷 0": 2,
+            u"𝓬𝓻𝓲𝓽𝓮𝓻𝓲𝓸𝓷 1": 4,
+            u"𝓬𝓻𝓲𝓽𝓮𝓻𝓲𝓸𝓷 2": 6,
+        })
+        self.assertEqual(compiled.serialize(), RubricSerializer(rubric).data)
+
+        option = CriterionOption.objects.get(criterion__rubric=rubric, criterion__order_num=1, order_num=2)
+        self.assertEqual(compiled.option_ids_by_name[u"𝓬𝓻𝓲𝓽𝓮𝓻𝓲𝓸𝓷 1"][u"option 2"], option.id)
+
+    def test_cache_tiers(self):
+        rubric = rubric_from_dict(self.RUBRIC)
+        compiled = CompiledRubric.for_rubric(rubric)
+
+        # The compiled rubric is kept in process memory
+        with self.assertNumQueries(0):
+            self.assertIs(CompiledRubric.for_rubric(rubric), compiled)
+            self.assertIs(CompiledRubric.for_content_hash(rubric.content_hash), compiled)
+
+        # If it's evicted from process memory, it's reloaded from the Django cache
+        CompiledRubric.clear_local_cache()
+        with patch.object(dog_stats_api, 'increment') as mock_increment:
+            with self.assertNumQueries(0):
+                reloaded = CompiledRubric.for_rubric(rubric)
+            mock_increment.assert_called_with(
+                'openassessment.assessment.cache.hit', tags=[u"cache:compiled_rubric"]
+            )
+        self.assertEqual(reloaded.serialize(), compiled.serialize())
+
+    def test_unknown_content_hash(self):
+        self.assertIs(CompiledRubric.for_content_hash(u"not a rubric"), None)
+
+    def test_serialize_returns_copy(self):
+        compiled = CompiledRubric.for_rubric(rubric_from_dict(self.RUBRIC))
+        serialized = compiled.serialize()
+        serialized['criteria'][0]['options'][0]['points'] = 100
+        self.assertEqual(compiled.serialize()['criteria'][0]['options'][0]['points'], 0)
+
+    def test_lru_eviction(self):
+        lru = _LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+
+        # Reading "a" makes "b" the least recently used
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('c', 3)
+
+        self.assertEqual(len(lru), 2)
+        self.assertIs(lru.get('b'), None)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.get('c'), 3)
+
+
 class AssessmentFeedbackTest(CacheResetTest):
     """
     Tests for assessment feedback.
@@ -202,6 +295,131 @@ class AssessmentFeedbackTest(CacheResetTest):
         self.assertEqual(AssessmentFeedbackOption.objects.count(), 2)
 
 
+class AssessmentMedianTest(CacheResetTest):
+    """
+    Tests for aggregating assessment scores by criterion.
+    """
+
+    RUBRIC = {
+        'prompt': u"Test prompt",
+        'criteria': [
+            {
+                'order_num': criterion_num,
+                'name': u"criterion {}".format(criterion_num),
+                'prompt': u"Criterion prompt",
+                'options': [
+                    {
+                        'order_num': points,
+                        'name': u"option {}".format(points),
+                        'points': points,
+                        'explanation': u"",
+                    }
+                    for points in range(5)
+                ]
+            }
+            for criterion_num in range(3)
+        ]
+    }
+
+    def test_median_scores_for_assessments(self):
+        rubric = rubric_from_dict(self.RUBRIC)
+        assessments = [
+            self._create_assessment(rubric, [0, 1, 4]),
+            self._create_assessment(rubric, [1, 2, 4]),
+            self._create_assessment(rubric, [4, 2, 3]),
+            self._create_assessment(rubric, [3, 3, 4]),
+        ]
+
+        # The parts of every assessment are loaded in a single query
+        with self.assertNumQueries(1):
+            medians = Assessment.get_median_scores_for_assessments(assessments)
+
+        self.assertEqual(medians, {
+            u"criterion 0": 2,
+            u"criterion 1": 2,
+            u"criterion 2": 4,
+        })
+
+    def test_median_scores_for_no_assessments(self):
+        self.assertEqual(Assessment.get_median_scores_for_assessments([]), {})
+
+    def test_median_score_dict_matches_median_score(self):
+        # Whether or not NumPy is available, every criterion median
+        # should be the same as computing it on its own.
+        for __ in range(20):
+            num_scores = random.randint(0, 7)
+            scores = {
+                u"criterion {}".format(num): [random.randint(0, 10) for __ in range(num_scores)]
+                for num in range(4)
+            }
+            expected = {
+                criterion: Assessment.get_median_score(criterion_scores)
+                for criterion, criterion_scores in scores.iteritems()
+            }
+            self.assertEqual(Assessment.get_median_score_dict(scores), expected)
+            with patch('openassessment.assessment.models.base.numpy', None):
+                self.assertEqual(Assessment.get_median_score_dict(scores), expected)
+
+    def test_median_score_dict_uneven_scores(self):
+        scores = {
+            u"foo": [1, 2, 3, 4, 5],
+            u"bar": [6, 8],
+        }
+        self.assertEqual(Assessment.get_median_score_dict(scores), {u"foo": 3, u"bar": 7})
+
+    def test_median_score_dict_rounds_up(self):
+        scores = {
+            u"foo": [1, 2],
+            u"bar": [5, 6, 12, 16, 22, 53],
+        }
+        self.assertEqual(Assessment.get_median_score_dict(scores), {u"foo": 2, u"bar": 14})
+        with patch('openassessment.assessment.models.base.numpy', None):
+            self.assertEqual(Assessment.get_median_score_dict(scores), {u"foo": 2, u"bar": 14})
+
+    def test_scores_by_criterion_cache(self):
+        rubric = rubric_from_dict(self.RUBRIC)
+        assessments = [self._create_assessment(rubric, [0, 1, 4]) for __ in range(3)]
+
+        with patch.object(dog_stats_api, 'increment') as mock_increment:
+            scores = Assessment.scores_by_criterion(assessments)
+            mock_increment.assert_called_with(
+                'openassessment.assessment.cache.miss', tags=[u"cache:scores_by_criterion"]
+            )
+
+            # The second time, the scores come from the cache
+            with self.assertNumQueries(0):
+                self.assertEqual(Assessment.scores_by_criterion(assessments), scores)
+            mock_increment.assert_called_with(
+                'openassessment.assessment.cache.hit', tags=[u"cache:scores_by_criterion"]
+            )
+
+    def test_versioned_cache_key_length(self):
+        # However many IDs there are, the key stays within memcached's limit
+        many_ids = range(100000, 110000)
+        key = _versioned_cache_key("assessments.scores_by_criterion", *many_ids)
+        self.assertLess(len(key), 250)
+
+        # The key is stable, and changes with the IDs
+        self.assertEqual(key, _versioned_cache_key("assessments.scores_by_criterion", *many_ids))
+        self.assertNotEqual(key, _versioned_cache_key("assessments.scores_by_criterion", *many_ids[1:]))
+        self.assertTrue(key.endswith(u".v{}".format(CACHE_VERSION)))
+
+    @staticmethod
+    def _create_assessment(rubric, points):
+        """
+        Create an assessment that selects the option worth `points[n]` for criterion n.
+        """
+        assessment = Assessment.objects.create(
+            rubric=rubric, scorer_id=u"scorer", submission_uuid=u"submission", score_type=u"PE"
+        )
+        options_selected = {
+            u"criterion {}".format(num): u"option {}".format(criterion_points)
+            for num, criterion_points in enumerate(points)
+        }
+        AssessmentPart.add_to_assessment(assessment, rubric.options_ids(options_selected))
+        return assessment
+
+
 class PeerWorkflowTest(CacheResetTest):
     """
     Tests for the peer workflow model.
@@ -2,17 +2,21 @@
 import datetime
 import pytz
 
+from django.conf import settings
+
 from django.db import DatabaseError, IntegrityError
+from django.test.utils import override_settings
 from django.utils import timezone
-from ddt import ddt, file_data
+from ddt import ddt, data, file_data
 from mock import patch
 from nose.tools import raises
 
 from openassessment.test_utils import CacheResetTest
 from openassessment.assessment.api import peer as peer_api
+from openassessment.assessment.matchmaking import get_matchmaker
 from openassessment.assessment.models import (
     Assessment, AssessmentPart, AssessmentFeedback,
-    PeerWorkflow, PeerWorkflowItem
+    PeerWorkflow, PeerWorkflowItem, PeerQueueEntry, SubmissionScoreSummary
 )
 from openassessment.workflow import api as workflow_api
 from submissions import api as sub_api
@@ -142,7 +146,12 @@ class TestPeerApi(CacheResetTest):
     Tests for the peer assessment API functions.
     """
 
-    CREATE_ASSESSMENT_NUM_QUERIES = 60
+    CREATE_ASSESSMENT_NUM_QUERIES = 40
+    GET_SCORE_NUM_QUERIES = 10
+
+    def setUp(self):
+        super(TestPeerApi, self).setUp()
+        get_matchmaker().reset()
 
     def test_create_assessment_points(self):
         self._create_student_and_submission("Tim", "Tim's answer")
@@ -293,6 +302,46 @@ class TestPeerApi(CacheResetTest):
         self.assertEqual(1, len(assessments))
         self.assertEqual(assessments[0]["scored_at"], MONDAY)
 
+    @data(True, False)
+    def test_get_assessments_read_replica(self, read_replica):
+        sub, __ = self._create_student_and_submission("Tim", "Tim's answer")
+        with patch.object(peer_api, 'use_read_replica', wraps=peer_api.use_read_replica) as mock_hint:
+            self.assertEqual(peer_api.get_assessments(sub["uuid"], read_replica=read_replica), [])
+        mock_hint.assert_called_once_with(read_replica)
+
+    def test_get_grading_counts(self):
+        tim_sub, __ = self._create_student_and_submission("Tim", "Tim's answer")
+        bob_sub, bob = self._create_student_and_submission("Bob", "Bob's answer")
+        self.assertEqual(peer_api.get_grading_counts(STUDENT_ITEM["course_id"], STUDENT_ITEM["item_id"]), {})
+
+        # Bob assesses Tim; Tim starts to assess Bob, but doesn't finish
+        peer_api.get_submission_to_assess(bob_sub['uuid'], 1)
+        peer_api.create_assessment(
+            bob_sub["uuid"], bob["student_id"],
+            ASSESSMENT_DICT['options_selected'],
+            ASSESSMENT_DICT['criterion_feedback'],
+            ASSESSMENT_DICT['overall_feedback'],
+            RUBRIC_DICT,
+            REQUIRED_GRADED_BY,
+        )
+        peer_api.get_submission_to_assess(tim_sub['uuid'], 1)
+
+        with self.assertNumQueries(1):
+            counts = peer_api.get_grading_counts(STUDENT_ITEM["course_id"], STUDENT_ITEM["item_id"])
+        self.assertEqual(counts, {
+            tim_sub['uuid']: {"graded": 0, "graded_by": 1},
+            bob_sub['uuid']: {"graded": 1, "graded_by": 0},
+        })
+
+        # Other items are not counted
+        self.assertEqual(peer_api.get_grading_counts(STUDENT_ITEM["course_id"], u"other item"), {})
+
+    @patch.object(PeerWorkflow.objects, 'filter')
+    @raises(peer_api.PeerAssessmentInternalError)
+    def test_get_grading_counts_db_error(self, mock_filter):
+        mock_filter.side_effect = DatabaseError("Bad things happened")
+        peer_api.get_grading_counts(STUDENT_ITEM["course_id"], STUDENT_ITEM["item_id"])
+
     def test_has_finished_evaluation(self):
         """
         Verify unfinished assessments do not get counted when determining a
@@ -339,6 +388,7 @@ class TestPeerApi(CacheResetTest):
         pwis = PeerWorkflowItem.objects.filter(submission_uuid=sub['uuid'])
         self.assertEqual(len(pwis), 1)
         pwis[0].started_at = yesterday
+        pwis[0].expires_at = yesterday
         pwis[0].save()
 
         sub = peer_api.get_submission_to_assess(tim_sub['uuid'], REQUIRED_GRADED)
@@ -839,6 +889,35 @@ class TestPeerApi(CacheResetTest):
         submission_uuid = buffy_workflow.find_active_assessments()
         self.assertEqual(xander_answer["uuid"], submission_uuid)
 
+    def test_item_time_limit(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+        buffy_workflow = PeerWorkflow.get_by_submission_uuid(buffy_answer['uuid'])
+
+        # The lease lasts for the time limit of the item
+        item = PeerWorkflow.create_item(
+            buffy_workflow, xander_answer["uuid"], time_limit=datetime.timedelta(minutes=30)
+        )
+        self.assertEqual(item.expires_at - item.started_at, datetime.timedelta(minutes=30))
+
+        # Without a time limit, the default applies
+        item = PeerWorkflow.create_item(buffy_workflow, xander_answer["uuid"])
+        self.assertEqual(item.expires_at - item.started_at, PeerWorkflow.TIME_LIMIT)
+
+        # Once the lease has expired, the assessment is no longer active
+        item = PeerWorkflow.create_item(
+            buffy_workflow, xander_answer["uuid"], time_limit=datetime.timedelta(0)
+        )
+        self.assertIs(buffy_workflow.find_active_assessments(), None)
+
+    def test_get_submission_to_assess_time_limit(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+
+        peer_api.get_submission_to_assess(buffy_answer['uuid'], 1, time_limit=datetime.timedelta(minutes=5))
+        item = PeerWorkflowItem.objects.get(submission_uuid=xander_answer['uuid'])
+        self.assertEqual(item.expires_at - item.started_at, datetime.timedelta(minutes=5))
+
     def test_get_workflow_by_uuid(self):
         buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
         self._create_student_and_submission("Xander", "Xander's answer")
@@ -860,6 +939,110 @@ class TestPeerApi(CacheResetTest):
         submission_uuid = buffy_workflow.get_submission_for_review(3)
         self.assertEqual(xander_answer["uuid"], submission_uuid)
 
+    @override_settings(EDX_ORA2=dict(settings.EDX_ORA2, USE_LEGACY_PEER_QUEUE=True))
+    def test_get_submission_for_review_legacy_query(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+        self._create_student_and_submission("Willow", "Willow's answer")
+
+        buffy_workflow = PeerWorkflow.get_by_submission_uuid(buffy_answer['uuid'])
+
+        # The legacy query should agree with the queue table
+        submission_uuid = buffy_workflow.get_submission_for_review(3)
+        self.assertEqual(xander_answer["uuid"], submission_uuid)
+
+    def test_queue_entry_counts_graders(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+        willow_answer, _ = self._create_student_and_submission("Willow", "Willow's answer")
+
+        xander_workflow = PeerWorkflow.get_by_submission_uuid(xander_answer['uuid'])
+        self.assertEqual(xander_workflow.queue_entry.grader_count, 0)
+        self.assertIs(xander_workflow.queue_entry.next_expiry, None)
+
+        # Active leases count towards the grader count
+        buffy_workflow = PeerWorkflow.get_by_submission_uuid(buffy_answer['uuid'])
+        willow_workflow = PeerWorkflow.get_by_submission_uuid(willow_answer['uuid'])
+        PeerWorkflow.create_item(buffy_workflow, xander_answer["uuid"])
+        PeerWorkflow.create_item(willow_workflow, xander_answer["uuid"])
+        entry = PeerQueueEntry.objects.get(workflow=xander_workflow)
+        self.assertEqual(entry.grader_count, 2)
+        self.assertIsNot(entry.next_expiry, None)
+
+        # With a requirement of two graders, Xander's submission is fully
+        # leased, so the next submission in the queue is Willow's
+        self.assertEqual(buffy_workflow.get_submission_for_review(2), willow_answer['uuid'])
+
+    def test_queue_entry_created_concurrently(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+        buffy_workflow = PeerWorkflow.get_by_submission_uuid(buffy_answer['uuid'])
+        xander_workflow = PeerWorkflow.get_by_submission_uuid(xander_answer['uuid'])
+        PeerWorkflowItem.objects.create(
+            scorer=buffy_workflow, author=xander_workflow, submission_uuid=xander_answer['uuid'],
+            started_at=timezone.now(), expires_at=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+        # Another request creates the entry after we tried to update it
+        original_filter = PeerQueueEntry.objects.filter
+        lookups = []
+
+        def entry_not_found_yet(*args, **kwargs):
+            lookups.append(kwargs)
+            if len(lookups) == 1:
+                return PeerQueueEntry.objects.none()
+            return original_filter(*args, **kwargs)
+
+        with patch.object(PeerQueueEntry.objects, 'filter', side_effect=entry_not_found_yet):
+            PeerQueueEntry.update_for_workflow(xander_workflow)
+
+        # We update their entry rather than failing
+        entry = PeerQueueEntry.objects.get(workflow=xander_workflow)
+        self.assertEqual(entry.grader_count, 1)
+
+    def test_queue_entry_releases_expired_lease(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+        willow_answer, _ = self._create_student_and_submission("Willow", "Willow's answer")
+
+        buffy_workflow = PeerWorkflow.get_by_submission_uuid(buffy_answer['uuid'])
+        xander_workflow = PeerWorkflow.get_by_submission_uuid(xander_answer['uuid'])
+        willow_workflow = PeerWorkflow.get_by_submission_uuid(willow_answer['uuid'])
+        PeerWorkflow.create_item(buffy_workflow, xander_answer["uuid"])
+        PeerWorkflow.create_item(xander_workflow, buffy_answer["uuid"])
+
+        # Willow cannot review either submission while the leases are held
+        self.assertIs(willow_workflow.get_submission_for_review(1), None)
+
+        # Expire Buffy's lease
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        PeerWorkflowItem.objects.filter(scorer=buffy_workflow).update(started_at=yesterday, expires_at=yesterday)
+        PeerQueueEntry.objects.filter(submission_uuid=xander_answer['uuid']).update(next_expiry=yesterday)
+
+        # Now Xander's submission is available again
+        self.assertEqual(willow_workflow.get_submission_for_review(1), xander_answer['uuid'])
+        entry = PeerQueueEntry.objects.get(submission_uuid=xander_answer['uuid'])
+        self.assertEqual(entry.grader_count, 0)
+        self.assertIs(entry.next_expiry, None)
+
+    def test_queue_entry_removed_when_grading_complete(self):
+        tim_sub, _ = self._create_student_and_submission("Tim", "Tim's answer")
+        bob_sub, bob = self._create_student_and_submission("Bob", "Bob's answer")
+
+        peer_api.get_submission_to_assess(bob_sub['uuid'], 1)
+        peer_api.create_assessment(
+            bob_sub["uuid"], bob["student_id"],
+            ASSESSMENT_DICT['options_selected'],
+            ASSESSMENT_DICT['criterion_feedback'],
+            ASSESSMENT_DICT['overall_feedback'],
+            RUBRIC_DICT,
+            1,
+        )
+
+        # Tim's submission has been graded by enough peers to leave the queue
+        self.assertFalse(PeerQueueEntry.objects.filter(submission_uuid=tim_sub['uuid']).exists())
+        self.assertTrue(PeerQueueEntry.objects.filter(submission_uuid=bob_sub['uuid']).exists())
+
     def test_get_submission_for_over_grading(self):
         buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
         xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
@@ -882,6 +1065,46 @@ class TestPeerApi(CacheResetTest):
         if not (buffy_answer["uuid"] == submission_uuid or willow_answer["uuid"] == submission_uuid):
             self.fail("Submission was not Buffy or Willow's.")
 
+    def test_get_submission_for_over_grading_wraps_around(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+        xander_workflow = PeerWorkflow.get_by_submission_uuid(xander_answer['uuid'])
+
+        # Probe past Xander's own workflow, which has the highest ID,
+        # so the search wraps around to Buffy's
+        with patch('openassessment.assessment.models.peer.random.randint') as mock_randint:
+            mock_randint.side_effect = lambda low, high: high
+            submission_uuid = xander_workflow.get_submission_for_over_grading()
+        self.assertEqual(submission_uuid, buffy_answer['uuid'])
+
+    def test_get_submission_for_over_grading_none_available(self):
+        buffy_answer, _ = self._create_student_and_submission("Buffy", "Buffy's answer")
+        xander_answer, _ = self._create_student_and_submission("Xander", "Xander's answer")
+        buffy_workflow = PeerWorkflow.get_by_submission_uuid(buffy_answer['uuid'])
+
+        # Buffy has already been given Xander's submission, so there is
+        # nothing left for her to over grade
+        PeerWorkflow.create_item(buffy_workflow, xander_answer["uuid"])
+        self.assertIs(buffy_workflow.get_submission_for_over_grading(), None)
+
+    def test_get_submission_for_over_grading_bounded_queries(self):
+        answers = [
+            self._create_student_and_submission(name, u"{}'s answer".format(name))[0]
+            for name in ["Buffy", "Xander", "Willow", "Giles", "Anya", "Tara"]
+        ]
+        buffy_workflow = PeerWorkflow.get_by_submission_uuid(answers[0]['uuid'])
+
+        # Every other submission can be chosen
+        chosen = set(buffy_workflow.get_submission_for_over_grading() for __ in range(100))
+        self.assertEqual(chosen, set(answer['uuid'] for answer in answers[1:]))
+
+        # The number of queries does not depend on the number of candidates:
+        # one for the ID range, and one for the probe
+        with patch('openassessment.assessment.models.peer.random.randint') as mock_randint:
+            mock_randint.side_effect = lambda low, high: low
+            with self.assertNumQueries(2):
+                buffy_workflow.get_submission_for_over_grading()
+
     def test_create_feedback_on_an_assessment(self):
         tim_sub, tim = self._create_student_and_submission("Tim", "Tim's answer")
         bob_sub, bob = self._create_student_and_submission("Bob", "Bob's answer")
@@ -973,7 +1196,7 @@ class TestPeerApi(CacheResetTest):
         submitted_assessments = peer_api.get_submitted_assessments(bob_sub["uuid"], scored_only=False)
         self.assertEqual(1, len(submitted_assessments))
 
-    @patch.object(PeerWorkflow.objects, 'raw')
+    @patch.object(PeerQueueEntry.objects, 'filter')
     @raises(peer_api.PeerAssessmentInternalError)
     def test_failure_to_get_review_submission(self, mock_filter):
         tim_answer, _ = self._create_student_and_submission("Tim", "Tim's answer", MONDAY)
@@ -981,6 +1204,23 @@ class TestPeerApi(CacheResetTest):
         mock_filter.side_effect = DatabaseError("Oh no.")
         tim_workflow.get_submission_for_review(3)
 
+    @override_settings(EDX_ORA2=dict(settings.EDX_ORA2, USE_LEGACY_PEER_QUEUE=True))
+    @patch.object(PeerWorkflow.objects, 'raw')
+    @raises(peer_api.PeerAssessmentInternalError)
+    def test_failure_to_get_review_submission_legacy_query(self, mock_filter):
+        tim_answer, _ = self._create_student_and_submission("Tim", "Tim's answer", MONDAY)
+        tim_workflow = PeerWorkflow.get_by_submission_uuid(tim_answer['uuid'])
+        mock_filter.side_effect = DatabaseError("Oh no.")
+        tim_workflow.get_submission_for_review(3)
+
+    @patch.object(PeerWorkflow.objects, 'filter')
+    @raises(peer_api.PeerAssessmentInternalError)
+    def test_failure_to_get_over_grading_submission(self, mock_filter):
+        tim_answer, _ = self._create_student_and_submission("Tim", "Tim's answer", MONDAY)
+        tim_workflow = PeerWorkflow.get_by_submission_uuid(tim_answer['uuid'])
+        mock_filter.side_effect = DatabaseError("Oh no.")
+        tim_workflow.get_submission_for_over_grading()
+
     @patch.object(AssessmentFeedback.objects, 'get')
     @raises(peer_api.PeerAssessmentInternalError)
     def test_get_assessment_feedback_error(self, mock_filter):
@@ -1094,7 +1334,7 @@ class TestPeerApi(CacheResetTest):
         tim, _ = self._create_student_and_submission("Tim", "Tim's answer")
         peer_api.get_rubric_max_scores(tim["uuid"])
 
-    @patch.object(PeerWorkflow.objects, 'get')
+    @patch.object(Assessment.objects, 'filter')
     @raises(peer_api.PeerAssessmentInternalError)
     def test_median_score_db_error(self, mock_filter):
         mock_filter.side_effect = DatabaseError("Bad things happened")
@@ -1152,6 +1392,78 @@ class TestPeerApi(CacheResetTest):
         self.assertEqual(16, Assessment.get_median_score([5, 6, 12, 16, 22, 53, 102]))
         self.assertEqual(16, Assessment.get_median_score([16, 6, 12, 102, 22, 53, 5]))
 
+    @data(1, 3, 5)
+    def test_get_score_num_queries(self, must_be_graded_by):
+        tim_sub, _ = self._create_student_and_submission("Tim", "Tim's answer")
+        for index in range(must_be_graded_by):
+            scorer_sub, scorer = self._create_student_and_submission(
+                "Scorer {}".format(index), "Scorer's answer"
+            )
+            peer_api.get_submission_to_assess(scorer_sub['uuid'], must_be_graded_by)
+            peer_api.create_assessment(
+                scorer_sub["uuid"], scorer["student_id"],
+                ASSESSMENT_DICT['options_selected'],
+                ASSESSMENT_DICT['criterion_feedback'],
+                ASSESSMENT_DICT['overall_feedback'],
+                RUBRIC_DICT,
+                must_be_graded_by,
+            )
+
+        # Tim doesn't need to grade anyone for this test
+        requirements = {"must_grade": 0, "must_be_graded_by": must_be_graded_by}
+
+        # The number of queries doesn't depend on the number of assessments
+        with self.assertNumQueries(self.GET_SCORE_NUM_QUERIES):
+            score = peer_api.get_score(tim_sub["uuid"], requirements)
+
+        self.assertEqual(score["points_earned"], 6)
+        self.assertEqual(score["points_possible"], 14)
+        self.assertEqual(
+            PeerWorkflowItem.objects.filter(submission_uuid=tim_sub["uuid"], scored=True).count(),
+            must_be_graded_by
+        )
+
+    def test_get_score_summary(self):
+        tim_sub, _ = self._create_student_and_submission("Tim", "Tim's answer")
+        self.assertIs(peer_api.get_score_summary(tim_sub["uuid"]), None)
+
+        for name in ["Bob", "Sally"]:
+            scorer_sub, scorer = self._create_student_and_submission(name, "Scorer's answer")
+            peer_api.get_submission_to_assess(scorer_sub['uuid'], 2)
+            peer_api.create_assessment(
+                scorer_sub["uuid"], scorer["student_id"],
+                ASSESSMENT_DICT['options_selected'],
+                ASSESSMENT_DICT['criterion_feedback'],
+                ASSESSMENT_DICT['overall_feedback'],
+                RUBRIC_DICT, 2,
+            )
+
+        score = peer_api.get_score(tim_sub["uuid"], {"must_grade": 0, "must_be_graded_by": 2})
+
+        # The summary matches the score and the per-criterion scores
+        summary = peer_api.get_score_summary(tim_sub["uuid"])
+        self.assertEqual(summary["points_earned"], score["points_earned"])
+        self.assertEqual(summary["points_possible"], score["points_possible"])
+        self.assertEqual(summary["median_scores"], peer_api.get_assessment_median_scores(tim_sub["uuid"]))
+        self.assertEqual(summary["max_scores"], peer_api.get_rubric_max_scores(tim_sub["uuid"]))
+        assessment_ids = Assessment.objects.filter(submission_uuid=tim_sub["uuid"]).values_list('id', flat=True)
+        self.assertItemsEqual(summary["assessment_ids"], assessment_ids)
+
+        # Reading the score again doesn't write the summary again
+        modified_at = SubmissionScoreSummary.objects.get(submission_uuid=tim_sub["uuid"]).modified_at
+        with patch.object(SubmissionScoreSummary.objects, 'create') as mock_create:
+            peer_api.get_score(tim_sub["uuid"], {"must_grade": 0, "must_be_graded_by": 2})
+        self.assertFalse(mock_create.called)
+        self.assertEqual(
+            SubmissionScoreSummary.objects.get(submission_uuid=tim_sub["uuid"]).modified_at, modified_at
+        )
+
+    @patch.object(SubmissionScoreSummary.objects, 'filter')
+    @raises(peer_api.PeerAssessmentInternalError)
+    def test_get_score_summary_db_error(self, mock_filter):
+        mock_filter.side_effect = DatabaseError("Bad things happened")
+        peer_api.get_score_summary("abc")
+
     @raises(peer_api.PeerAssessmentWorkflowError)
     def test_assess_before_submitting(self):
         # Create a submission for another student
@@ -1177,3 +1489,14 @@ class TestPeerApi(CacheResetTest):
         peer_api.create_peer_workflow(submission["uuid"])
         workflow_api.create_workflow(submission["uuid"], STEPS)
         return submission, new_student_item
+
+
+@override_settings(EDX_ORA2=dict(
+    settings.EDX_ORA2,
+    PEER_MATCHMAKING_BACKEND="openassessment.assessment.matchmaking.InMemoryMatchmaker"
+))
+class TestPeerApiInMemoryMatchmaking(TestPeerApi):
+    """
+    Run the peer assessment API tests against the in-memory matchmaking backend.
+    """
+    pass
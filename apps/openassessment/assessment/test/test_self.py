@@ -6,10 +6,13 @@ Tests for self-assessment API.
 import copy
 import datetime
 import pytz
+from mock import patch
 from openassessment.test_utils import CacheResetTest
+from openassessment.assessment.models import SubmissionScoreSummary
 from submissions.api import create_submission
 from openassessment.assessment.api.self import (
-    create_assessment, submitter_is_finished, get_assessment
+    create_assessment, submitter_is_finished, get_assessment,
+    get_score, get_score_summary
 )
 from openassessment.assessment.errors import SelfAssessmentRequestError
 
@@ -197,6 +200,61 @@ class TestSelfApi(CacheResetTest):
         retrieved = get_assessment(submission["uuid"])
         self.assertItemsEqual(assessment, retrieved)
 
+    def test_get_score_summary(self):
+        submission = create_submission(self.STUDENT_ITEM, "Test answer")
+        self.assertIs(get_score_summary(submission['uuid']), None)
+
+        create_assessment(
+            submission['uuid'], u'𝖙𝖊𝖘𝖙 𝖚𝖘𝖊𝖗',
+            self.OPTIONS_SELECTED, self.RUBRIC,
+        )
+        score = get_score(submission['uuid'], {})
+        self.assertEqual(score, {"points_earned": 8, "points_possible": 10})
+
+        summary = get_score_summary(submission['uuid'])
+        self.assertEqual(summary["points_earned"], 8)
+        self.assertEqual(summary["points_possible"], 10)
+        self.assertEqual(summary["median_scores"], {"clarity": 3, "accuracy": 5})
+        self.assertEqual(summary["max_scores"], {"clarity": 5, "accuracy": 5})
+        self.assertEqual(len(summary["assessment_ids"]), 1)
+
+        # Reading the score again doesn't write the summary again
+        with patch.object(SubmissionScoreSummary.objects, 'create') as mock_create:
+            with self.assertNumQueries(2):
+                self.assertEqual(get_score(submission['uuid'], {}), score)
+        self.assertFalse(mock_create.called)
+
+        # The criteria are stored in a stable order
+        stored = SubmissionScoreSummary.objects.get(submission_uuid=submission['uuid'])
+        self.assertEqual(stored.median_scores_json, '{"accuracy": 5, "clarity": 3}')
+
+    def test_get_score_summary_created_concurrently(self):
+        submission = create_submission(self.STUDENT_ITEM, "Test answer")
+        create_assessment(
+            submission['uuid'], u'𝖙𝖊𝖘𝖙 𝖚𝖘𝖊𝖗',
+            self.OPTIONS_SELECTED, self.RUBRIC,
+        )
+        get_score(submission['uuid'], {})
+        SubmissionScoreSummary.objects.update(points_earned=0)
+
+        # Another request creates the summary after we looked for it
+        original_filter = SubmissionScoreSummary.objects.filter
+        lookups = []
+
+        def summary_not_found_yet(*args, **kwargs):
+            lookups.append(kwargs)
+            if len(lookups) == 1:
+                return SubmissionScoreSummary.objects.none()
+            return original_filter(*args, **kwargs)
+
+        with patch.object(SubmissionScoreSummary.objects, 'filter', side_effect=summary_not_found_yet):
+            score = get_score(submission['uuid'], {})
+
+        # We replace their summary rather than failing
+        self.assertEqual(score, {"points_earned": 8, "points_possible": 10})
+        self.assertEqual(SubmissionScoreSummary.objects.count(), 1)
+        self.assertEqual(get_score_summary(submission['uuid'])["points_earned"], 8)
+
     def test_is_complete_no_submission(self):
         # This submission uuid does not exist
         self.assertFalse(submitter_is_finished('abc1234', {}))
@@ -4,6 +4,7 @@ Aggregate data for openassessment.
 import csv
 import json
 from submissions import api as sub_api
+from submissions.routers import use_read_replica
 from openassessment.workflow.models import AssessmentWorkflow
 from openassessment.assessment.models import AssessmentPart, AssessmentFeedback
 
@@ -90,9 +91,12 @@ class CsvWriter(object):
         Write assessment and submission data for a course to CSV files.
 
         NOTE: The current implementation optimizes for memory usage,
-        but not for the number of database queries.  All the queries
-        use indexed fields (the submission uuid), so they should be
-        relatively quick.
+        but not for the number of database queries.  Submissions are
+        retrieved in batches, but assessments and feedback are retrieved
+        one submission at a time.  All the queries use indexed fields
+        (the submission uuid), so they should be relatively quick.
+        They are sent to the read replica, if one is configured
+        (see `submissions.routers`), to keep the load off the primary.
 
         Args:
             course_id (unicode): The course ID from which to pull data.
@@ -100,13 +104,20 @@ class CsvWriter(object):
         Returns:
             None
 
+        """
+        with use_read_replica():
+            self._write_to_csv(course_id)
+
+    def _write_to_csv(self, course_id):
+        """
+        Write the CSV files, as described in `write_to_csv`.
         """
         self._write_csv_headers()
 
         rubric_points_cache = dict()
         feedback_option_set = set()
-        for submission_uuid in self._submission_uuids(course_id):
-            self._write_submission_to_csv(submission_uuid)
+        for submission_uuid, submission in self._submissions(course_id):
+            self._write_submission_to_csv(submission)
 
             # Django 1.4 doesn't follow reverse relations when using select_related,
             # so we select AssessmentPart and follow the foreign key to the Assessment.
@@ -131,6 +142,58 @@ class CsvWriter(object):
         # since they're not (currently) user-defined.
         self._write_feedback_options_to_csv(feedback_option_set)
 
+    def _submissions(self, course_id):
+        """
+        Iterate over submissions, including their student items.
+        Makes database calls every N submissions to avoid loading
+        all submissions into memory at once.
+
+        Args:
+            course_id (unicode): The ID of the course to retrieve submissions from.
+
+        Yields:
+            tuple of (submission_uuid, submission), where `submission` is
+            a serialized submission containing its serialized student item.
+
+        Raises:
+            SubmissionNotFoundError
+
+        """
+        batch = list()
+        for submission_uuid in self._submission_uuids(course_id):
+            batch.append(submission_uuid)
+            if len(batch) >= self.QUERY_INTERVAL:
+                for result in self._submission_batch(batch):
+                    yield result
+                batch = list()
+
+        for result in self._submission_batch(batch):
+            yield result
+
+    def _submission_batch(self, submission_uuids):
+        """
+        Retrieve a batch of submissions at once.
+
+        Args:
+            submission_uuids (list of unicode): The UUIDs of the submissions to retrieve.
+
+        Returns:
+            list of (submission_uuid, submission) tuples, in the same order as `submission_uuids`.
+
+        Raises:
+            SubmissionNotFoundError
+
+        """
+        submissions = sub_api.get_submission_and_student_many(submission_uuids)
+        results = list()
+        for submission_uuid in submission_uuids:
+            if submission_uuid not in submissions:
+                raise sub_api.SubmissionNotFoundError(
+                    u"No submission matching uuid {}".format(submission_uuid)
+                )
+            results.append((submission_uuid, submissions[submission_uuid]))
+        return results
+
     def _submission_uuids(self, course_id):
         """
         Iterate over submission uuids.
@@ -173,18 +236,19 @@ class CsvWriter(object):
         for name, writer in self.writers.iteritems():
             writer.writerow(self.HEADERS[name])
 
-    def _write_submission_to_csv(self, submission_uuid):
+    def _write_submission_to_csv(self, submission):
         """
         Write submission data to CSV.
 
         Args:
-            submission_uuid (unicode): The UUID of the submission to write.
+            submission (dict): The serialized submission to write,
+                including its serialized student item.
 
         Returns:
             None
 
         """
-        submission = sub_api.get_submission_and_student(submission_uuid)
+        submission_uuid = submission['uuid']
         self._write_unicode('submission', [
             submission['uuid'],
             submission['student_item']['student_id'],
@@ -0,0 +1,124 @@
+"""
+Measure the cost of decoding large submission answers.
+"""
+import json
+import time
+from uuid import uuid4
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from submissions import api as sub_api
+from submissions.models import StudentItem, Submission
+from submissions import serializers
+
+
+class Command(BaseCommand):
+    """
+    Measure how long it takes to decode answers of the maximum size
+    (`Submission.MAXSIZE`, 100KB) and to list submissions with them.
+
+    This reports:
+
+        * `stdlib`: decoding each answer with the standard library `json` module.
+        * `decoder`: decoding each answer with the JSON module the submissions
+            app chose at import time (ujson or simplejson if installed).
+        * `list_cold`: `get_submissions` with none of the submissions cached,
+            so every answer is read from the database and decoded.
+        * `list_warm`: `get_submissions` with the submissions cached.
+
+    It creates submissions in a new (randomly named) course and deletes
+    them afterwards.  This writes to the configured database, so don't
+    run it in production.
+    """
+
+    help = 'Measure the cost of decoding 100KB submission answers'
+    args = '[<NUM_SUBMISSIONS>]'
+
+    DEFAULT_NUM_SUBMISSIONS = 20
+
+    # Number of times to repeat each measurement
+    NUM_ITERATIONS = 10
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.results = dict()
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            num_submissions (int): The number of submissions to create and list.
+        """
+        try:
+            num_submissions = int(args[0]) if args else self.DEFAULT_NUM_SUBMISSIONS
+        except ValueError:
+            raise CommandError('Number of submissions must be an integer')
+
+        answer = self._max_size_answer()
+        raw_answer = json.dumps(answer).decode('utf-8')
+        student_item = {
+            'student_id': uuid4().hex[0:10],
+            'course_id': u"benchmark-{}".format(uuid4().hex[0:10]),
+            'item_id': u"answer_decoding",
+            'item_type': u"openassessment",
+        }
+        submission_uuids = [
+            sub_api.create_submission(student_item, answer)['uuid']
+            for __ in range(num_submissions)
+        ]
+
+        try:
+            self.results['stdlib'] = self._time(lambda: json.loads(raw_answer))
+            self.results['decoder'] = self._time(lambda: serializers.json_decoder.loads(raw_answer))
+            self.results['list_cold'] = self._time(
+                lambda: sub_api.get_submissions(student_item),
+                setup=lambda: cache.delete_many([
+                    "submissions.submission.{}".format(submission_uuid)
+                    for submission_uuid in submission_uuids
+                ])
+            )
+            self.results['list_warm'] = self._time(lambda: sub_api.get_submissions(student_item))
+        finally:
+            StudentItem.objects.filter(course_id=student_item['course_id']).delete()
+
+        print u"Answer size: {} bytes; JSON decoder: {}".format(
+            len(raw_answer.encode('utf-8')), serializers.json_decoder.__name__
+        )
+        print u"{:>10} {:>12}".format("operation", "ms")
+        for name in ['stdlib', 'decoder', 'list_cold', 'list_warm']:
+            print u"{:>10} {:>12.3f}".format(name, self.results[name])
+
+    def _time(self, func, setup=None):
+        """
+        Call a function `NUM_ITERATIONS` times.
+
+        Args:
+            func (callable): The function to time.
+
+        Kwargs:
+            setup (callable): Called before each call to `func`, untimed.
+
+        Returns:
+            float: The average milliseconds per call.
+        """
+        elapsed = 0.0
+        for __ in range(self.NUM_ITERATIONS):
+            if setup is not None:
+                setup()
+            start_time = time.time()
+            func()
+            elapsed += time.time() - start_time
+        return elapsed * 1000.0 / self.NUM_ITERATIONS
+
+    @staticmethod
+    def _max_size_answer():
+        """
+        Return an answer that is as large as a submission can hold,
+        with a mix of ASCII and non-ASCII text.
+        """
+        paragraph = u"Lorem ipsum dolor sit amet, \u00e7onsectetur adipiscing elit. "
+        text = paragraph * (Submission.MAXSIZE // len(paragraph))
+        answer = {'text': text}
+        while len(json.dumps(answer)) > Submission.MAXSIZE:
+            answer['text'] = answer['text'][:-len(paragraph)]
+        return answer
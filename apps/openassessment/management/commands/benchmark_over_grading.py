@@ -0,0 +1,91 @@
+"""
+Measure how long it takes to select a submission for over grading.
+"""
+import time
+from uuid import uuid4
+from django.core.management.base import BaseCommand, CommandError
+from openassessment.assessment.models import PeerWorkflow
+
+
+class Command(BaseCommand):
+    """
+    Measure the latency of over grading selection as the number of
+    submissions for a question grows.
+
+    For each requested size, this creates that many peer workflows
+    in a new (randomly named) course, times repeated calls to
+    `PeerWorkflow.get_submission_for_over_grading`, and then deletes
+    the workflows it created.  Latency should stay flat as the number
+    of submissions grows.
+
+    This writes to the configured database, so don't run it in production.
+    """
+
+    help = 'Measure the latency of over grading selection for increasing numbers of submissions'
+    args = '[<NUM_SUBMISSIONS> ...]'
+
+    DEFAULT_SIZES = [100, 1000, 10000]
+
+    # Number of selections to time for each size
+    NUM_ITERATIONS = 100
+
+    # Number of workflows to insert at a time
+    BATCH_SIZE = 500
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.results = list()
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            num_submissions (int): One or more numbers of submissions to benchmark.
+        """
+        try:
+            sizes = [int(arg) for arg in args] if args else self.DEFAULT_SIZES
+        except ValueError:
+            raise CommandError('Number of submissions must be an integer')
+
+        print u"{:>12} {:>12}".format("submissions", "ms/select")
+        for size in sizes:
+            avg_ms = self._benchmark(size)
+            self.results.append((size, avg_ms))
+            print u"{:>12} {:>12.3f}".format(size, avg_ms)
+
+    def _benchmark(self, num_submissions):
+        """
+        Time over grading selection for a question with `num_submissions` submissions.
+
+        Args:
+            num_submissions (int): The number of submissions to create.
+
+        Returns:
+            float: The average time per selection, in milliseconds.
+        """
+        course_id = u"benchmark-{}".format(uuid4().hex[0:10])
+        item_id = u"over-grading"
+
+        workflows = [
+            PeerWorkflow(
+                student_id=uuid4().hex[0:10],
+                course_id=course_id,
+                item_id=item_id,
+                submission_uuid=uuid4().hex,
+            )
+            for __ in range(num_submissions)
+        ]
+        for start in range(0, len(workflows), self.BATCH_SIZE):
+            PeerWorkflow.objects.bulk_create(workflows[start:start + self.BATCH_SIZE])
+
+        try:
+            scorer = PeerWorkflow.objects.filter(course_id=course_id, item_id=item_id)[0]
+            start_time = time.time()
+            for __ in range(self.NUM_ITERATIONS):
+                scorer.get_submission_for_over_grading()
+            elapsed = time.time() - start_time
+        finally:
+            PeerWorkflow.objects.filter(course_id=course_id, item_id=item_id).delete()
+
+        return elapsed * 1000.0 / self.NUM_ITERATIONS
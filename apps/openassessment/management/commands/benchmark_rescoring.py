@@ -0,0 +1,140 @@
+"""
+Measure the cost of re-scoring many submissions.
+"""
+import time
+from uuid import uuid4
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from submissions import api as sub_api
+from submissions.models import Score, ScoreSummary, StudentItem, Submission
+from submissions.serializers import ScoreSerializer
+
+
+class Command(BaseCommand):
+    """
+    Measure the latency and number of database queries of bulk re-scoring.
+
+    This creates submissions in a new (randomly named) course, then scores
+    every submission several times, first with `submissions.api.set_score`
+    and then with the score summary updated the way it was before scores
+    wrote through to their summaries: a `post_save` handler that re-read the
+    summary and its highest score and saved it again.  It then deletes the
+    student items, submissions and scores it created.
+
+    This writes to the configured database, so don't run it in production.
+    """
+
+    help = 'Measure the cost of re-scoring submissions, before and after write-through score summaries'
+    args = '[<NUM_SUBMISSIONS>]'
+
+    DEFAULT_NUM_SUBMISSIONS = 200
+
+    # Number of times to score each submission
+    NUM_ROUNDS = 3
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.results = dict()
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            num_submissions (int): The number of submissions to re-score.
+        """
+        try:
+            num_submissions = int(args[0]) if args else self.DEFAULT_NUM_SUBMISSIONS
+        except ValueError:
+            raise CommandError('Number of submissions must be an integer')
+
+        course_id = u"benchmark-{}".format(uuid4().hex[0:10])
+        submission_uuids = [
+            sub_api.create_submission({
+                'student_id': uuid4().hex[0:10],
+                'course_id': course_id,
+                'item_id': u"rescoring",
+                'item_type': u"openassessment",
+            }, u"Benchmark answer")['uuid']
+            for __ in range(num_submissions)
+        ]
+
+        try:
+            self.results['write_through'] = self._benchmark(submission_uuids, sub_api.set_score)
+            self.results['post_save'] = self._benchmark(submission_uuids, self._set_score_post_save)
+        finally:
+            Score.objects.filter(student_item__course_id=course_id).delete()
+            StudentItem.objects.filter(course_id=course_id).delete()
+
+        print u"{:>14} {:>12} {:>14}".format("summary update", "ms/score", "queries/score")
+        for name in ['post_save', 'write_through']:
+            avg_ms, avg_queries = self.results[name]
+            print u"{:>14} {:>12.3f} {:>14.1f}".format(name, avg_ms, avg_queries)
+
+    def _benchmark(self, submission_uuids, set_score):
+        """
+        Score every submission `NUM_ROUNDS` times.
+
+        Args:
+            submission_uuids (list of unicode): The submissions to score.
+            set_score (callable): Called with the submission UUID, points earned,
+                and points possible to score a submission.
+
+        Returns:
+            tuple of (average milliseconds per score, average queries per score)
+        """
+        num_scores = len(submission_uuids) * self.NUM_ROUNDS
+        if num_scores == 0:
+            return (0.0, 0.0)
+
+        # Record queries even if DEBUG is off
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        num_queries_before = len(connection.queries)
+        try:
+            start_time = time.time()
+            for points_earned in range(self.NUM_ROUNDS):
+                for submission_uuid in submission_uuids:
+                    set_score(submission_uuid, points_earned, self.NUM_ROUNDS)
+            elapsed = time.time() - start_time
+            num_queries = len(connection.queries) - num_queries_before
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+
+        return (elapsed * 1000.0 / num_scores, float(num_queries) / num_scores)
+
+    @staticmethod
+    def _set_score_post_save(submission_uuid, points_earned, points_possible):
+        """
+        Score a submission the way `set_score` did before score summaries
+        were written through: validate the score with the serializer, save
+        it, and then update the summary from a `post_save` handler.
+        """
+        submission = Submission.objects.get(uuid=submission_uuid)
+        serializer = ScoreSerializer(data={
+            "student_item": submission.student_item.pk,
+            "submission": submission.pk,
+            "points_earned": points_earned,
+            "points_possible": points_possible,
+        })
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+
+        # Skip `Score.save`, which would write through to the summary
+        score = serializer.object
+        models.Model.save(score)
+
+        try:
+            score_summary = ScoreSummary.objects.get(student_item=score.student_item)
+            score_summary.latest = score
+            if score.to_float() > score_summary.highest.to_float():
+                score_summary.highest = score
+                score_summary.highest_fraction = score.to_float()
+            score_summary.save()
+        except ScoreSummary.DoesNotExist:
+            ScoreSummary.objects.create(
+                student_item=score.student_item,
+                highest=score,
+                latest=score,
+                highest_fraction=score.to_float(),
+            )
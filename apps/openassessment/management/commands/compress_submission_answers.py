@@ -0,0 +1,165 @@
+"""
+Compress (or decompress) the answers of existing submissions,
+or report how much space compression would save.
+"""
+import cPickle as pickle
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from submissions import api as sub_api
+from submissions.models import Submission, compress_raw_answer, decompress_raw_answer
+from submissions.serializers import SubmissionSerializer, JsonFieldError
+
+
+class Command(BaseCommand):
+    """
+    Rewrite the stored answers of existing submissions, one batch at a time.
+
+    `compress` compresses every answer that is large enough to benefit,
+    and `decompress` restores every compressed answer (for example,
+    before turning off `EDX_ORA2["COMPRESS_SUBMISSION_ANSWERS"]` and
+    downgrading).  Submissions are read either way, so the command can
+    be stopped and re-run at any time.
+
+    `report` changes nothing; it reports the total size of the answers
+    and of the cached submissions, with and without compression, and how
+    many cached submissions would fit in memcached's default 64MB.
+    """
+
+    help = 'Compress, decompress, or report on the size of submission answers'
+    args = '<compress|decompress|report> [<BATCH_SIZE>]'
+
+    ACTIONS = ['compress', 'decompress', 'report']
+
+    DEFAULT_BATCH_SIZE = 500
+
+    # Memcached's default memory limit, used to report how many
+    # cached submissions fit in the cache.
+    CACHE_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.results = {
+            'num_submissions': 0,
+            'num_changed': 0,
+            'answer_bytes': 0,
+            'compressed_answer_bytes': 0,
+            'cache_bytes': 0,
+            'compressed_cache_bytes': 0,
+        }
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            action (unicode): "compress", "decompress", or "report".
+            batch_size (int): The number of submissions to process at a time.
+
+        Raises:
+            CommandError
+        """
+        if len(args) < 1 or args[0] not in self.ACTIONS:
+            raise CommandError(u"Usage: compress_submission_answers {}".format(self.args))
+        action = args[0]
+
+        try:
+            batch_size = int(args[1]) if len(args) > 1 else self.DEFAULT_BATCH_SIZE
+        except ValueError:
+            raise CommandError('Batch size must be an integer')
+        if batch_size < 1:
+            raise CommandError('Batch size must be positive')
+
+        last_id = 0
+        while True:
+            batch = list(
+                Submission.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'raw_answer')[:batch_size]
+            )
+            if not batch:
+                break
+
+            if action == 'report':
+                self._report_batch([submission_id for submission_id, __ in batch])
+            else:
+                self._rewrite_batch(batch, compress_raw_answer if action == 'compress' else decompress_raw_answer)
+
+            last_id = batch[-1][0]
+            self.results['num_submissions'] += len(batch)
+            print u"Processed {num} submissions...".format(num=self.results['num_submissions'])
+
+        if action == 'report':
+            self._print_report()
+        else:
+            print u"{action}ed {changed} of {num} answers".format(
+                action=action.capitalize(),
+                changed=self.results['num_changed'],
+                num=self.results['num_submissions'],
+            )
+
+    def _rewrite_batch(self, batch, rewrite):
+        """
+        Rewrite the stored answers of a batch of submissions in one transaction.
+
+        Args:
+            batch (list of tuple): (submission ID, stored answer) pairs.
+            rewrite (callable): Returns the new stored answer for a stored answer.
+        """
+        with transaction.commit_on_success():
+            for submission_id, raw_answer in batch:
+                try:
+                    new_raw_answer = rewrite(raw_answer)
+                except ValueError as ex:
+                    print u"Skipping submission {id}: {error}".format(id=submission_id, error=ex)
+                    continue
+
+                if new_raw_answer != raw_answer:
+                    Submission.objects.filter(id=submission_id).update(raw_answer=new_raw_answer)
+                    self.results['num_changed'] += 1
+                    self.results['answer_bytes'] += len(raw_answer)
+                    self.results['compressed_answer_bytes'] += len(new_raw_answer)
+
+    def _report_batch(self, submission_ids):
+        """
+        Add the sizes of a batch of submissions, compressed and not, to the results.
+
+        Args:
+            submission_ids (list of int): The submissions to measure.
+        """
+        for submission in Submission.objects.filter(id__in=submission_ids):
+            try:
+                raw_answer = decompress_raw_answer(submission.raw_answer)
+                submission_data = SubmissionSerializer(submission).data
+            except (ValueError, JsonFieldError) as ex:
+                print u"Skipping submission {id}: {error}".format(id=submission.id, error=ex)
+                continue
+
+            self.results['answer_bytes'] += len(raw_answer)
+            self.results['compressed_answer_bytes'] += len(compress_raw_answer(raw_answer))
+
+            # Measure the pickled size of the cache entry,
+            # which is what memcached stores.
+            self.results['cache_bytes'] += len(pickle.dumps(submission_data, pickle.HIGHEST_PROTOCOL))
+            self.results['compressed_cache_bytes'] += len(pickle.dumps(
+                sub_api._compress_cached_submission(submission_data),  # pylint:disable=W0212
+                pickle.HIGHEST_PROTOCOL
+            ))
+
+    def _print_report(self):
+        """
+        Print the space used with and without compression.
+        """
+        num = self.results['num_submissions']
+        print u"{:>16} {:>14} {:>14} {:>8} {:>16}".format(
+            "", "uncompressed", "compressed", "ratio", "entries in 64MB"
+        )
+        for name, key in [('answers', 'answer_bytes'), ('cache entries', 'cache_bytes')]:
+            uncompressed = self.results[key]
+            compressed = self.results['compressed_{}'.format(key)]
+            ratio = float(uncompressed) / compressed if compressed else 0.0
+            if key == 'cache_bytes' and num:
+                fit = u"{:d} / {:d}".format(
+                    self.CACHE_SIZE * num // max(uncompressed, 1),
+                    self.CACHE_SIZE * num // max(compressed, 1),
+                )
+            else:
+                fit = u""
+            print u"{:>16} {:>14d} {:>14d} {:>8.2f} {:>16}".format(name, uncompressed, compressed, ratio, fit)
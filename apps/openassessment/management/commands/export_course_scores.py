@@ -0,0 +1,102 @@
+"""
+Export the latest score of every student in a course.
+"""
+import csv
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from submissions import api as sub_api
+
+
+class Command(BaseCommand):
+    """
+    Write the latest score of every student in a course (or one item in
+    the course) as CSV or as JSON lines.
+
+    Scores are read with `submissions.api.iter_scores_for_course` and
+    written as they are read, so memory use does not depend on the size
+    of the course.  Use "-" as the output path to write to stdout.
+    """
+
+    help = 'Export the latest score of every student in a course as CSV or JSON lines'
+    args = '<COURSE_ID> <csv|jsonl> <OUTPUT_PATH> [<ITEM_ID>]'
+
+    COLUMNS = [
+        'student_id', 'item_id', 'points_earned', 'points_possible',
+        'created_at', 'submission_uuid',
+    ]
+
+    FORMATS = ['csv', 'jsonl']
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.num_scores = 0
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            course_id (unicode): The course whose scores to export.
+            output_format (unicode): Either "csv" or "jsonl".
+            output_path (unicode): The file to write, or "-" for stdout.
+            item_id (unicode): If provided, only export scores for this item.
+
+        Raises:
+            CommandError
+        """
+        if len(args) < 3:
+            raise CommandError(u"Usage: export_course_scores {}".format(self.args))
+
+        course_id = unicode(args[0])
+        output_format = args[1]
+        output_path = args[2]
+        item_id = unicode(args[3]) if len(args) > 3 else None
+
+        if output_format not in self.FORMATS:
+            raise CommandError(u"Format must be one of: {}".format(u", ".join(self.FORMATS)))
+
+        try:
+            output_file = sys.stdout if output_path == '-' else open(output_path, 'wb')
+        except IOError as ex:
+            raise CommandError(u"Could not open output file: {}".format(ex))
+
+        try:
+            write_row = getattr(self, '_{}_writer'.format(output_format))(output_file)
+            for row in sub_api.iter_scores_for_course(course_id, item_id=item_id):
+                write_row(row)
+                self.num_scores += 1
+        except sub_api.SubmissionError as ex:
+            raise CommandError(u"Could not export scores: {}".format(ex))
+        finally:
+            if output_file is not sys.stdout:
+                output_file.close()
+
+        sys.stderr.write(u"Exported {num} scores\n".format(num=self.num_scores))
+
+    def _csv_writer(self, output_file):
+        """
+        Write the header row, and return a function that writes a score as a CSV row.
+        """
+        writer = csv.writer(output_file)
+        writer.writerow(self.COLUMNS)
+
+        def write_row(row):  # pylint:disable=C0111
+            writer.writerow([
+                value.isoformat() if hasattr(value, 'isoformat')
+                else unicode(value).encode('utf-8') if value is not None
+                else ''
+                for value in row
+            ])
+        return write_row
+
+    def _jsonl_writer(self, output_file):
+        """
+        Return a function that writes a score as a line of JSON.
+        """
+        def write_row(row):  # pylint:disable=C0111
+            record = dict(zip(self.COLUMNS, row))
+            record['created_at'] = record['created_at'].isoformat()
+            output_file.write(json.dumps(record))
+            output_file.write('\n')
+        return write_row
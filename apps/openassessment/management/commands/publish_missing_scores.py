@@ -0,0 +1,107 @@
+"""
+Publish the scores of finished workflows that have none.
+"""
+import datetime
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+from openassessment.assessment.errors import PeerAssessmentError, SelfAssessmentError
+from openassessment.workflow.models import AssessmentWorkflow
+from submissions import api as sub_api
+
+
+# By default, skip workflows that finished in the last half hour, since
+# the tasks publishing their scores may still be queued or retrying.
+DEFAULT_GRACE_MINUTES = 30
+
+
+class Command(BaseCommand):
+    """
+    Find the finished workflows for an item whose submissions have no
+    score, and publish their scores again.
+
+    When `EDX_ORA2["ASYNC_SCORE_PUBLISHING"]` is enabled, a workflow is
+    marked "done" before a Celery task publishes its score.  If the task
+    gives up, the student never gets a score; this command recovers them.
+
+    The command can't tell a queued task from one that gave up, so it
+    only looks at workflows last modified more than `GRACE_MINUTES`
+    minutes ago (30 by default), which is well past the time the tasks
+    spend retrying.  Otherwise it would publish every recently finished
+    score a second time, emitting a duplicate score event.
+
+    The requirements are the ones passed to the workflow API by the
+    problem, as JSON; for example:
+
+        {"peer": {"must_grade": 5, "must_be_graded_by": 3}}
+
+    """
+
+    help = 'Publish the scores of finished workflows that have none'
+    args = '<COURSE_ID> <ITEM_ID> <REQUIREMENTS_JSON> [<GRACE_MINUTES>]'
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.results = {
+            'num_workflows': 0,
+            'num_published': 0,
+            'num_errors': 0,
+        }
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            course_id (unicode): The ID of the course.
+            item_id (unicode): The ID of the item in the course.
+            requirements (unicode): The assessment requirements, as JSON.
+            grace_minutes (unicode): If provided, skip workflows modified
+                within this many minutes.
+
+        Raises:
+            CommandError
+        """
+        if len(args) < 3:
+            raise CommandError(u"Usage: publish_missing_scores {}".format(self.args))
+        course_id, item_id = unicode(args[0]), unicode(args[1])
+
+        try:
+            requirements = json.loads(args[2])
+        except ValueError:
+            raise CommandError('Requirements must be valid JSON')
+        if not isinstance(requirements, dict):
+            raise CommandError('Requirements must be a JSON object')
+
+        try:
+            grace_minutes = int(args[3]) if len(args) > 3 else DEFAULT_GRACE_MINUTES
+        except ValueError:
+            raise CommandError('Grace period must be a number of minutes')
+        if grace_minutes < 0:
+            raise CommandError('Grace period must not be negative')
+
+        workflows = AssessmentWorkflow.objects.filter(
+            course_id=course_id, item_id=item_id,
+            status=AssessmentWorkflow.STATUS.done,
+            modified__lt=now() - datetime.timedelta(minutes=grace_minutes),
+        ).order_by('id')
+
+        for workflow in workflows.iterator():
+            self.results['num_workflows'] += 1
+            try:
+                published = workflow.publish_missing_score(requirements)
+            except (sub_api.SubmissionError, PeerAssessmentError, SelfAssessmentError) as ex:
+                print u"Could not publish the score for submission {uuid}: {error}".format(
+                    uuid=workflow.submission_uuid, error=ex
+                )
+                self.results['num_errors'] += 1
+                continue
+
+            if published:
+                self.results['num_published'] += 1
+
+        print u"Published {published} missing scores for {num} finished workflows, {errors} errors".format(
+            published=self.results['num_published'],
+            num=self.results['num_workflows'],
+            errors=self.results['num_errors'],
+        )
@@ -0,0 +1,53 @@
+"""
+Recompute the assessment counts stored on peer workflows.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from openassessment.assessment.models import PeerWorkflow
+
+
+class Command(BaseCommand):
+    """
+    Recount the completed peer assessments made and received by each
+    student, and fix the counts stored on their peer workflows.
+
+    The counts are incremented as assessments are completed, so they
+    should never need fixing; running this command after restoring
+    data or changing workflow items by hand makes sure they match.
+
+    If the number of assessments a submission must receive is given,
+    submissions whose fixed counts reach it are marked as fully graded.
+    """
+
+    help = 'Recompute the assessment counts stored on peer workflows'
+    args = '[<COURSE_ID> [<ITEM_ID> [<MUST_BE_GRADED_BY>]]]'
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            course_id (unicode): If provided, only reconcile workflows in this course.
+            item_id (unicode): If provided, only reconcile workflows for this item.
+            must_be_graded_by (unicode): If provided, the number of assessments
+                a submission for the item must receive to complete grading.
+
+        Raises:
+            CommandError
+        """
+        course_id = unicode(args[0]) if len(args) > 0 else None
+        item_id = unicode(args[1]) if len(args) > 1 else None
+
+        try:
+            must_be_graded_by = int(args[2]) if len(args) > 2 else None
+        except ValueError:
+            raise CommandError('The number of assessments must be an integer')
+
+        num_fixed, num_skipped = PeerWorkflow.reconcile_counts(
+            course_id=course_id, item_id=item_id, must_be_graded_by=must_be_graded_by
+        )
+        print u"Fixed the assessment counts of {num} peer workflows".format(num=num_fixed)
+        if num_skipped:
+            print (
+                u"Skipped {num} peer workflows whose counts changed while reconciling; "
+                u"run the command again to reconcile them"
+            ).format(num=num_skipped)
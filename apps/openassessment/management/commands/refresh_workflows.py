@@ -0,0 +1,189 @@
+"""
+Re-evaluate every workflow for an item, for example after a deadline
+passes or the problem's requirements change.
+"""
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from openassessment.assessment.api import peer as peer_api
+from openassessment.assessment.errors import PeerAssessmentError, SelfAssessmentError
+from openassessment.workflow.models import AssessmentWorkflow
+from submissions import api as sub_api
+
+
+class Command(BaseCommand):
+    """
+    Update the workflows for an item that have not finished, one batch at a time.
+
+    Workflows are otherwise only updated when a student loads the problem
+    or someone assesses them, so when requirements change, many of them
+    stay stale until their students come back.
+
+    Updating a workflow asks the peer assessment API, one submission at
+    a time, whether its author has assessed enough peers and whether it
+    has received enough assessments.  To avoid that for workflows that
+    cannot have changed, the command first reads the number of peer
+    assessments made and received by every submission to the item in one
+    query, and only updates workflows whose peer step could now be
+    finished.  Other steps only change when the student acts, which
+    updates the workflow right away, so they are assumed to be current.
+    The workflows are loaded with their steps and updated in place.
+
+    The requirements are the ones passed to the workflow API by the
+    problem, as JSON; for example:
+
+        {"peer": {"must_grade": 5, "must_be_graded_by": 3}}
+
+    """
+
+    help = 'Re-evaluate the unfinished workflows for an item'
+    args = '<COURSE_ID> <ITEM_ID> <REQUIREMENTS_JSON> [<BATCH_SIZE>]'
+
+    DEFAULT_BATCH_SIZE = 500
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.results = {
+            'num_workflows': 0,
+            'num_updated': 0,
+            'num_changed': 0,
+            'num_errors': 0,
+        }
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            course_id (unicode): The ID of the course.
+            item_id (unicode): The ID of the item in the course.
+            requirements (unicode): The assessment requirements, as JSON.
+            batch_size (int): The number of workflows to process at a time.
+
+        Raises:
+            CommandError
+        """
+        if len(args) < 3:
+            raise CommandError(u"Usage: refresh_workflows {}".format(self.args))
+        course_id, item_id = unicode(args[0]), unicode(args[1])
+
+        try:
+            requirements = json.loads(args[2])
+        except ValueError:
+            raise CommandError('Requirements must be valid JSON')
+        if not isinstance(requirements, dict):
+            raise CommandError('Requirements must be a JSON object')
+
+        try:
+            batch_size = int(args[3]) if len(args) > 3 else self.DEFAULT_BATCH_SIZE
+        except ValueError:
+            raise CommandError('Batch size must be an integer')
+        if batch_size < 1:
+            raise CommandError('Batch size must be positive')
+
+        grading_counts = peer_api.get_grading_counts(course_id, item_id)
+
+        start_time = time.time()
+        last_id = 0
+        while True:
+            batch = list(
+                AssessmentWorkflow.objects.filter(
+                    course_id=course_id, item_id=item_id, id__gt=last_id
+                ).exclude(
+                    status=AssessmentWorkflow.STATUS.done
+                ).order_by('id').prefetch_related('steps')[:batch_size]
+            )
+            if not batch:
+                break
+
+            for workflow in batch:
+                steps = list(workflow.steps.all())
+                workflow.set_loaded_steps(steps)
+                if self._may_have_changed(workflow, steps, requirements, grading_counts):
+                    self._update(workflow, requirements)
+
+            last_id = batch[-1].id
+            self.results['num_workflows'] += len(batch)
+            elapsed = time.time() - start_time
+            print u"Processed {num} workflows ({updated} updated) at {rate:.1f} workflows/sec...".format(
+                num=self.results['num_workflows'],
+                updated=self.results['num_updated'],
+                rate=self.results['num_workflows'] / elapsed if elapsed else 0.0,
+            )
+
+        print u"Updated {updated} of {num} unfinished workflows; {changed} changed status, {errors} errors".format(
+            updated=self.results['num_updated'],
+            num=self.results['num_workflows'],
+            changed=self.results['num_changed'],
+            errors=self.results['num_errors'],
+        )
+
+    def _may_have_changed(self, workflow, steps, requirements, grading_counts):
+        """
+        Decide, from the aggregate peer assessment counts, whether updating
+        a workflow could change it.
+
+        Args:
+            workflow (AssessmentWorkflow): The workflow.
+            steps (list of AssessmentWorkflowStep): The workflow's steps.
+            requirements (dict): The assessment requirements.
+            grading_counts (dict): The counts returned by `peer_api.get_grading_counts`.
+
+        Returns:
+            bool
+
+        Raises:
+            CommandError: The workflow has a peer step, but the
+                requirements don't say how many peer assessments it needs.
+        """
+        # Older workflows without steps get peer and self steps on their first update
+        step_names = [step.name for step in steps] or [AssessmentWorkflow.STATUS.peer]
+        peer_reqs = requirements.get(AssessmentWorkflow.STATUS.peer)
+        if AssessmentWorkflow.STATUS.peer in step_names and not (
+            isinstance(peer_reqs, dict) and "must_grade" in peer_reqs and "must_be_graded_by" in peer_reqs
+        ):
+            raise CommandError(
+                u"The workflow for submission {uuid} has a peer step, but the requirements "
+                u"have no \"peer\" section with \"must_grade\" and \"must_be_graded_by\"".format(
+                    uuid=workflow.submission_uuid
+                )
+            )
+
+        if not steps:
+            return True
+
+        # A waiting workflow whose steps are all assessed is waiting for a score
+        if all(step.is_submitter_complete() and step.is_assessment_complete() for step in steps):
+            return True
+
+        counts = grading_counts.get(workflow.submission_uuid, {"graded": 0, "graded_by": 0})
+        for step in steps:
+            if step.name != AssessmentWorkflow.STATUS.peer:
+                continue
+            if not step.is_submitter_complete() and counts["graded"] >= peer_reqs["must_grade"]:
+                return True
+            if not step.is_assessment_complete() and counts["graded_by"] >= peer_reqs["must_be_graded_by"]:
+                return True
+        return False
+
+    def _update(self, workflow, requirements):
+        """
+        Update a workflow, counting whether its status changed.
+
+        Args:
+            workflow (AssessmentWorkflow): The workflow to update (with its steps loaded).
+            requirements (dict): The assessment requirements.
+        """
+        old_status = workflow.status
+        try:
+            workflow.update_from_assessments(requirements)
+        except (sub_api.SubmissionError, PeerAssessmentError, SelfAssessmentError) as ex:
+            print u"Could not update the workflow for submission {uuid}: {error}".format(
+                uuid=workflow.submission_uuid, error=ex
+            )
+            self.results['num_errors'] += 1
+            return
+
+        self.results['num_updated'] += 1
+        if workflow.status != old_status:
+            self.results['num_changed'] += 1
@@ -0,0 +1,34 @@
+"""
+Release expired leases on peer assessment submissions.
+"""
+from django.core.management.base import BaseCommand
+from openassessment.assessment.models import PeerQueueEntry
+
+
+class Command(BaseCommand):
+    """
+    Release expired leases on submissions in the peer assessment queue.
+
+    Students who request a submission to assess hold a lease on it until
+    the lease expires.  Submissions with expired leases are released
+    lazily when another student in the same item requests a submission;
+    running this command periodically (for example, from cron) releases
+    them in bulk so the queue stays accurate between requests.
+    """
+
+    help = 'Release expired leases on peer assessment submissions'
+    args = '[<COURSE_ID> [<ITEM_ID>]]'
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            course_id (unicode): If provided, only release leases in this course.
+            item_id (unicode): If provided, only release leases for this item.
+        """
+        course_id = unicode(args[0]) if len(args) > 0 else None
+        item_id = unicode(args[1]) if len(args) > 1 else None
+
+        num_released = PeerQueueEntry.release_expired(course_id=course_id, item_id=item_id)
+        print u"Released expired leases on {num} submissions".format(num=num_released)
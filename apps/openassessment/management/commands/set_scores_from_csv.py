@@ -0,0 +1,89 @@
+"""
+Override the scores of submissions from a CSV file.
+"""
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from submissions import api as sub_api
+
+
+class Command(BaseCommand):
+    """
+    Set the scores of submissions from a CSV file of overrides.
+
+    The file must have a header row with the columns `submission_uuid`,
+    `points_earned`, and `points_possible`; any other columns are ignored.
+    Scores are set with `submissions.api.set_scores_bulk`, one batch of
+    rows at a time, so each batch is set (or fails) as a whole.
+    """
+
+    help = 'Set the scores of submissions from a CSV file of overrides'
+    args = '<CSV_PATH> [<BATCH_SIZE>]'
+
+    DEFAULT_BATCH_SIZE = 1000
+
+    REQUIRED_COLUMNS = ['submission_uuid', 'points_earned', 'points_possible']
+
+    def __init__(self, *args, **kwargs):
+        super(Command, self).__init__(*args, **kwargs)
+        self.num_scores = 0
+
+    def handle(self, *args, **options):
+        """
+        Execute the command.
+
+        Args:
+            csv_path (unicode): Path to the CSV file of score overrides.
+            batch_size (int): The number of scores to set at a time.
+
+        Raises:
+            CommandError
+        """
+        if len(args) < 1:
+            raise CommandError(u"Usage: set_scores_from_csv {}".format(self.args))
+
+        try:
+            batch_size = int(args[1]) if len(args) > 1 else self.DEFAULT_BATCH_SIZE
+        except ValueError:
+            raise CommandError('Batch size must be an integer')
+        if batch_size < 1:
+            raise CommandError('Batch size must be positive')
+
+        try:
+            with open(args[0], 'rb') as csv_file:
+                reader = csv.DictReader(csv_file)
+                missing_columns = set(self.REQUIRED_COLUMNS) - set(reader.fieldnames or [])
+                if missing_columns:
+                    raise CommandError(
+                        u"CSV file is missing columns: {}".format(u", ".join(sorted(missing_columns)))
+                    )
+
+                batch = []
+                for row in reader:
+                    batch.append(tuple(row[column].decode('utf-8') for column in self.REQUIRED_COLUMNS))
+                    if len(batch) >= batch_size:
+                        self._set_scores(batch)
+                        batch = []
+                if batch:
+                    self._set_scores(batch)
+        except IOError as ex:
+            raise CommandError(u"Could not read CSV file: {}".format(ex))
+
+        print u"Set {num} scores".format(num=self.num_scores)
+
+    def _set_scores(self, scores):
+        """
+        Set a batch of scores.
+
+        Args:
+            scores (list of tuple): Tuples of (submission_uuid, points_earned, points_possible).
+
+        Raises:
+            CommandError
+        """
+        try:
+            self.num_scores += sub_api.set_scores_bulk(scores)
+        except sub_api.SubmissionError as ex:
+            raise CommandError(
+                u"Could not set scores after setting {num}: {error}".format(num=self.num_scores, error=ex)
+            )
+        print u"Set {num} scores...".format(num=self.num_scores)
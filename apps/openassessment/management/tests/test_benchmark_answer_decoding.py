@@ -0,0 +1,35 @@
+"""
+Tests for the management command that benchmarks answer decoding.
+"""
+from django.core.cache import cache
+from openassessment.test_utils import CacheResetTest
+from openassessment.management.commands import benchmark_answer_decoding
+from submissions import api as sub_api
+from submissions.models import StudentItem, Submission
+from submissions.tests.test_api import STUDENT_ITEM
+
+
+class BenchmarkAnswerDecodingTest(CacheResetTest):
+
+    def test_benchmark(self):
+        cmd = benchmark_answer_decoding.Command()
+        cmd.NUM_ITERATIONS = 2
+        cmd.handle("3")
+
+        self.assertItemsEqual(cmd.results.keys(), ['stdlib', 'decoder', 'list_cold', 'list_warm'])
+
+        # The benchmark cleans up after itself
+        self.assertEqual(StudentItem.objects.count(), 0)
+        self.assertEqual(Submission.objects.count(), 0)
+
+    def test_queries_independent_of_queue_size(self):
+        answer = benchmark_answer_decoding.Command._max_size_answer()  # pylint:disable=W0212
+        for num_submissions in [3, 10]:
+            student_item = dict(STUDENT_ITEM, item_id=u"answer_decoding_{}".format(num_submissions))
+            for __ in range(num_submissions):
+                sub_api.create_submission(student_item, answer)
+
+            # Listing reads every uncached answer in one query
+            cache.clear()
+            with self.assertNumQueries(3):
+                self.assertEqual(len(sub_api.get_submissions(student_item)), num_submissions)
@@ -0,0 +1,47 @@
+"""
+Tests for the management command that benchmarks over grading selection.
+"""
+from uuid import uuid4
+from django.test import TestCase
+from mock import patch
+from openassessment.assessment.models import PeerWorkflow
+from openassessment.management.commands import benchmark_over_grading
+
+
+class BenchmarkOverGradingTest(TestCase):
+
+    def test_benchmark(self):
+        cmd = benchmark_over_grading.Command()
+        cmd.NUM_ITERATIONS = 5
+        cmd.handle("10", "50")
+
+        sizes = [size for size, __ in cmd.results]
+        self.assertEqual(sizes, [10, 50])
+
+        # The benchmark cleans up after itself
+        self.assertEqual(PeerWorkflow.objects.count(), 0)
+
+    def test_queries_independent_of_queue_size(self):
+        # Always start from the lowest ID, so the first lookup finds a candidate
+        with patch('openassessment.assessment.models.peer.random.randint') as mock_randint:
+            mock_randint.side_effect = lambda low, high: low
+            for num_submissions in [10, 100]:
+                scorer = self._create_workflows(num_submissions)
+                with self.assertNumQueries(2):
+                    self.assertIsNot(scorer.get_submission_for_over_grading(), None)
+
+    def _create_workflows(self, num_submissions):
+        """
+        Create peer workflows for a new item, and return the first.
+        """
+        course_id = uuid4().hex
+        PeerWorkflow.objects.bulk_create([
+            PeerWorkflow(
+                student_id=uuid4().hex[0:10],
+                course_id=course_id,
+                item_id=u"over-grading",
+                submission_uuid=uuid4().hex,
+            )
+            for __ in range(num_submissions)
+        ])
+        return PeerWorkflow.objects.filter(course_id=course_id).order_by('id')[0]
@@ -0,0 +1,27 @@
+"""
+Tests for the management command that benchmarks re-scoring.
+"""
+from openassessment.test_utils import CacheResetTest
+from submissions.models import Score, StudentItem
+from openassessment.management.commands import benchmark_rescoring
+
+
+class BenchmarkRescoringTest(CacheResetTest):
+
+    def test_benchmark(self):
+        cmd = benchmark_rescoring.Command()
+        cmd.handle("5")
+
+        # Writing through to the summary takes fewer queries
+        __, write_through_queries = cmd.results['write_through']
+        __, post_save_queries = cmd.results['post_save']
+        self.assertLess(write_through_queries, post_save_queries)
+
+        # The benchmark cleans up after itself
+        self.assertEqual(Score.objects.count(), 0)
+        self.assertEqual(StudentItem.objects.count(), 0)
+
+    def test_no_submissions(self):
+        cmd = benchmark_rescoring.Command()
+        cmd.handle("0")
+        self.assertEqual(cmd.results['write_through'], (0.0, 0.0))
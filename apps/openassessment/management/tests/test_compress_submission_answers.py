@@ -0,0 +1,80 @@
+"""
+Tests for the management command that compresses submission answers.
+"""
+from django.core.management.base import CommandError
+from openassessment.test_utils import CacheResetTest
+from openassessment.management.commands import compress_submission_answers
+from submissions import api as sub_api
+from submissions.models import Submission, COMPRESSED_ANSWER_PREFIX
+
+
+class CompressSubmissionAnswersTest(CacheResetTest):
+
+    STUDENT_ITEM = {
+        'student_id': u'test_student',
+        'course_id': u'test_course',
+        'item_id': u'test_item',
+        'item_type': u'openassessment',
+    }
+
+    LARGE_ANSWER = {'text': u"It was the best of times, it was the worst of times. " * 200}
+
+    def setUp(self):
+        super(CompressSubmissionAnswersTest, self).setUp()
+        self.large = [sub_api.create_submission(self.STUDENT_ITEM, self.LARGE_ANSWER) for __ in range(3)]
+        self.small = sub_api.create_submission(self.STUDENT_ITEM, u"short answer")
+
+    def _stored_answers(self):
+        return {
+            uuid: raw_answer
+            for uuid, raw_answer in Submission.objects.values_list('uuid', 'raw_answer')
+        }
+
+    def test_compress_and_decompress(self):
+        original = self._stored_answers()
+
+        cmd = compress_submission_answers.Command()
+        cmd.handle('compress', '2')
+        self.assertEqual(cmd.results['num_submissions'], 4)
+        self.assertEqual(cmd.results['num_changed'], 3)
+        self.assertLess(cmd.results['compressed_answer_bytes'], cmd.results['answer_bytes'])
+
+        stored = self._stored_answers()
+        for submission in self.large:
+            self.assertTrue(stored[submission['uuid']].startswith(COMPRESSED_ANSWER_PREFIX))
+        self.assertEqual(stored[self.small['uuid']], original[self.small['uuid']])
+
+        # Answers read the same as before
+        for submission in self.large + [self.small]:
+            self.assertEqual(sub_api.get_submission(submission['uuid']), submission)
+
+        # Running again changes nothing
+        cmd = compress_submission_answers.Command()
+        cmd.handle('compress')
+        self.assertEqual(cmd.results['num_changed'], 0)
+
+        cmd = compress_submission_answers.Command()
+        cmd.handle('decompress')
+        self.assertEqual(cmd.results['num_changed'], 3)
+        self.assertEqual(self._stored_answers(), original)
+
+    def test_report(self):
+        original = self._stored_answers()
+
+        cmd = compress_submission_answers.Command()
+        cmd.handle('report', '3')
+        self.assertEqual(cmd.results['num_submissions'], 4)
+        self.assertEqual(cmd.results['num_changed'], 0)
+        self.assertLess(cmd.results['compressed_answer_bytes'], cmd.results['answer_bytes'])
+        self.assertLess(cmd.results['compressed_cache_bytes'], cmd.results['cache_bytes'])
+
+        # The report doesn't change anything
+        self.assertEqual(self._stored_answers(), original)
+
+    def test_invalid_args(self):
+        with self.assertRaises(CommandError):
+            compress_submission_answers.Command().handle()
+        with self.assertRaises(CommandError):
+            compress_submission_answers.Command().handle('squash')
+        with self.assertRaises(CommandError):
+            compress_submission_answers.Command().handle('compress', 'lots')
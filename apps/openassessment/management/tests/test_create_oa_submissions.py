@@ -6,10 +6,10 @@ from submissions import api as sub_api
 from openassessment.assessment.api import peer as peer_api
 from openassessment.assessment.api import self as self_api
 from openassessment.management.commands import create_oa_submissions
-from django.test import TestCase
+from openassessment.test_utils import CacheResetTest
 
 
-class CreateSubmissionsTest(TestCase):
+class CreateSubmissionsTest(CacheResetTest):
 
     def test_create_submissions(self):
 
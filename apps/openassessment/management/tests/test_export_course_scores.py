@@ -0,0 +1,83 @@
+"""
+Tests for the management command that exports course scores.
+"""
+import csv
+import json
+import os
+import shutil
+import tempfile
+from django.core.management.base import CommandError
+from openassessment.test_utils import CacheResetTest
+from submissions import api as sub_api
+from openassessment.management.commands import export_course_scores
+
+
+class ExportCourseScoresTest(CacheResetTest):
+
+    STUDENT_ITEM = {
+        'course_id': u'test_course',
+        'item_id': u'test_item',
+        'item_type': u'openassessment',
+    }
+
+    def setUp(self):
+        super(ExportCourseScoresTest, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.temp_dir, 'scores')
+
+        self.tim_sub = self._create_submission(u'Tim')
+        self.bob_sub = self._create_submission(u'Bob')
+        self.sally_sub = self._create_submission(u'Sally', item_id=u'other_item')
+        sub_api.set_score(self.tim_sub['uuid'], 1, 10)
+        sub_api.set_score(self.tim_sub['uuid'], 7, 10)
+        sub_api.set_score(self.bob_sub['uuid'], 2, 10)
+        sub_api.set_score(self.sally_sub['uuid'], 3, 10)
+
+        # Scores in other courses aren't exported
+        other_sub = sub_api.create_submission(
+            dict(self.STUDENT_ITEM, student_id=u'Tim', course_id=u'other_course'), u"answer"
+        )
+        sub_api.set_score(other_sub['uuid'], 9, 10)
+
+    def tearDown(self):
+        super(ExportCourseScoresTest, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def _create_submission(self, student_id, item_id=u'test_item'):
+        student_item = dict(self.STUDENT_ITEM, student_id=student_id, item_id=item_id)
+        return sub_api.create_submission(student_item, {'text': u"{}'s answer".format(student_id)})
+
+    def test_export_csv(self):
+        cmd = export_course_scores.Command()
+        cmd.handle(u'test_course', 'csv', self.output_path)
+        self.assertEqual(cmd.num_scores, 3)
+
+        with open(self.output_path, 'rb') as output_file:
+            rows = list(csv.reader(output_file))
+        self.assertEqual(rows[0], export_course_scores.Command.COLUMNS)
+        self.assertEqual(
+            [row[:4] + row[5:] for row in rows[1:]],
+            [
+                ['Tim', 'test_item', '7', '10', self.tim_sub['uuid']],
+                ['Bob', 'test_item', '2', '10', self.bob_sub['uuid']],
+                ['Sally', 'other_item', '3', '10', self.sally_sub['uuid']],
+            ]
+        )
+
+    def test_export_jsonl_item(self):
+        cmd = export_course_scores.Command()
+        cmd.handle(u'test_course', 'jsonl', self.output_path, u'test_item')
+
+        with open(self.output_path, 'rb') as output_file:
+            records = [json.loads(line) for line in output_file]
+        self.assertEqual([record['student_id'] for record in records], [u'Tim', u'Bob'])
+        self.assertEqual(records[0]['points_earned'], 7)
+        self.assertEqual(records[0]['submission_uuid'], self.tim_sub['uuid'])
+
+    def test_invalid_format(self):
+        with self.assertRaises(CommandError):
+            export_course_scores.Command().handle(u'test_course', 'xml', self.output_path)
+
+    def test_missing_args(self):
+        with self.assertRaises(CommandError):
+            export_course_scores.Command().handle(u'test_course')
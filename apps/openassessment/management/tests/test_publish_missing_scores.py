@@ -0,0 +1,116 @@
+"""
+Tests for the management command that publishes the missing scores of finished workflows.
+"""
+import datetime
+import json
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django.utils.timezone import now
+from mock import patch
+from openassessment.test_utils import CacheResetTest
+from submissions import api as sub_api
+from submissions.models import Score
+from openassessment.assessment.api import self as self_api
+from openassessment.workflow import api as workflow_api
+from openassessment.workflow import tasks
+from openassessment.management.commands import publish_missing_scores
+
+
+RUBRIC = {
+    'criteria': [
+        {
+            'name': u'clarity',
+            'prompt': u'How clear was it?',
+            'options': [
+                {'name': u'unclear', 'points': 0, 'explanation': u''},
+                {'name': u'clear', 'points': 2, 'explanation': u''},
+            ]
+        }
+    ]
+}
+
+
+@patch('openassessment.workflow.models.emit_event')
+class PublishMissingScoresTest(CacheResetTest):
+
+    STUDENT_ITEM = {
+        'course_id': u'test_course',
+        'item_id': u'test_item',
+        'item_type': u'openassessment',
+    }
+
+    def _create_finished_submission(self, student_id, publish=True):
+        """
+        Create a submission and finish its self-assessment workflow,
+        optionally losing the task that publishes its score.
+        """
+        student_item = dict(self.STUDENT_ITEM, student_id=student_id)
+        submission = sub_api.create_submission(student_item, {'text': u"{}'s answer".format(student_id)})
+        workflow_api.create_workflow(submission['uuid'], ['self'])
+        self_api.create_assessment(submission['uuid'], student_id, {u'clarity': u'clear'}, RUBRIC)
+        with override_settings(EDX_ORA2={"ASYNC_SCORE_PUBLISHING": True}):
+            if publish:
+                workflow_api.update_from_assessments(submission['uuid'], {})
+            else:
+                with patch.object(tasks.publish_score, 'delay'):
+                    workflow_api.update_from_assessments(submission['uuid'], {})
+        return submission
+
+    def test_publish_missing_scores(self, mock_emit):
+        tim_sub = self._create_finished_submission(u'Tim', publish=False)
+        bob_sub = self._create_finished_submission(u'Bob')
+        self.assertIs(sub_api.get_latest_score_for_submission(tim_sub['uuid']), None)
+
+        cmd = publish_missing_scores.Command()
+        cmd.handle(u'test_course', u'test_item', json.dumps({}), u'0')
+
+        self.assertEqual(sub_api.get_latest_score_for_submission(tim_sub['uuid'])['points_earned'], 2)
+        self.assertEqual(cmd.results['num_workflows'], 2)
+        self.assertEqual(cmd.results['num_published'], 1)
+
+        # Bob's score was already published, so it was left alone
+        self.assertEqual(Score.objects.filter(submission__uuid=bob_sub['uuid']).count(), 1)
+
+        # Running the command again publishes nothing
+        cmd = publish_missing_scores.Command()
+        cmd.handle(u'test_course', u'test_item', json.dumps({}), u'0')
+        self.assertEqual(cmd.results['num_published'], 0)
+
+    def test_grace_period(self, mock_emit):
+        tim_sub = self._create_finished_submission(u'Tim', publish=False)
+
+        # The task publishing Tim's score may still be queued
+        cmd = publish_missing_scores.Command()
+        cmd.handle(u'test_course', u'test_item', json.dumps({}))
+        self.assertEqual(cmd.results['num_workflows'], 0)
+        self.assertIs(sub_api.get_latest_score_for_submission(tim_sub['uuid']), None)
+
+        # Once the grace period is over, the score is published
+        the_future = now() + datetime.timedelta(minutes=publish_missing_scores.DEFAULT_GRACE_MINUTES + 1)
+        with patch('openassessment.management.commands.publish_missing_scores.now') as mock_now:
+            mock_now.return_value = the_future
+            cmd = publish_missing_scores.Command()
+            cmd.handle(u'test_course', u'test_item', json.dumps({}))
+        self.assertEqual(cmd.results['num_published'], 1)
+
+    def test_publish_error(self, mock_emit):
+        self._create_finished_submission(u'Tim', publish=False)
+
+        cmd = publish_missing_scores.Command()
+        with patch.object(sub_api, 'set_score') as mock_set_score:
+            mock_set_score.side_effect = sub_api.SubmissionInternalError("Kaboom!")
+            cmd.handle(u'test_course', u'test_item', json.dumps({}), u'0')
+        self.assertEqual(cmd.results['num_errors'], 1)
+        self.assertEqual(cmd.results['num_published'], 0)
+
+    def test_invalid_arguments(self, mock_emit):
+        cmd = publish_missing_scores.Command()
+        for args in [
+            (u'test_course', u'test_item'),
+            (u'test_course', u'test_item', u'not json'),
+            (u'test_course', u'test_item', u'[]'),
+            (u'test_course', u'test_item', u'{}', u'soon'),
+            (u'test_course', u'test_item', u'{}', u'-1'),
+        ]:
+            with self.assertRaises(CommandError):
+                cmd.handle(*args)
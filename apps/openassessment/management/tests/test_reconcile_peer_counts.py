@@ -0,0 +1,124 @@
+"""
+Tests for the management command that recomputes peer workflow assessment counts.
+"""
+from django.core.management.base import CommandError
+from django.db.models import F
+from mock import patch
+from openassessment.test_utils import CacheResetTest
+from submissions import api as sub_api
+from openassessment.assessment.api import peer as peer_api
+from openassessment.assessment.models import PeerWorkflow, PeerQueueEntry
+from openassessment.management.commands import reconcile_peer_counts
+
+
+RUBRIC = {
+    'criteria': [
+        {
+            'name': u'clarity',
+            'prompt': u'How clear was it?',
+            'options': [
+                {'name': u'unclear', 'points': 0, 'explanation': u''},
+                {'name': u'clear', 'points': 2, 'explanation': u''},
+            ]
+        }
+    ]
+}
+
+
+class ReconcilePeerCountsTest(CacheResetTest):
+
+    STUDENT_ITEM = {
+        'course_id': u'test_course',
+        'item_id': u'test_item',
+        'item_type': u'openassessment',
+    }
+
+    def setUp(self):
+        super(ReconcilePeerCountsTest, self).setUp()
+
+        # Bob assesses Tim
+        self.tim_sub = self._create_submission(u'Tim')
+        self.bob_sub = self._create_submission(u'Bob')
+        peer_api.get_submission_to_assess(self.bob_sub['uuid'], 1)
+        peer_api.create_assessment(
+            self.bob_sub['uuid'], u'Bob', {u'clarity': u'clear'}, {}, u'', RUBRIC, 1
+        )
+
+    def _create_submission(self, student_id):
+        student_item = dict(self.STUDENT_ITEM, student_id=student_id)
+        submission = sub_api.create_submission(student_item, {'text': u"{}'s answer".format(student_id)})
+        peer_api.create_peer_workflow(submission['uuid'])
+        return submission
+
+    def _counts(self, submission):
+        workflow = PeerWorkflow.objects.get(submission_uuid=submission['uuid'])
+        return workflow.graded_count, workflow.graded_by_count
+
+    def test_counts_maintained(self):
+        self.assertEqual(self._counts(self.tim_sub), (0, 1))
+        self.assertEqual(self._counts(self.bob_sub), (1, 0))
+
+        cmd = reconcile_peer_counts.Command()
+        cmd.handle()
+        self.assertEqual(PeerWorkflow.reconcile_counts(), (0, 0))
+
+    def test_reconcile(self):
+        PeerWorkflow.objects.update(graded_count=5, graded_by_count=5)
+
+        cmd = reconcile_peer_counts.Command()
+        cmd.handle(u'test_course', u'test_item')
+
+        self.assertEqual(self._counts(self.tim_sub), (0, 1))
+        self.assertEqual(self._counts(self.bob_sub), (1, 0))
+
+    def test_reconcile_other_course(self):
+        PeerWorkflow.objects.update(graded_count=5, graded_by_count=5)
+
+        # Workflows in other courses are left alone
+        self.assertEqual(PeerWorkflow.reconcile_counts(course_id=u'other_course'), (0, 0))
+        self.assertEqual(self._counts(self.tim_sub), (5, 5))
+        self.assertEqual(PeerWorkflow.reconcile_counts(course_id=u'test_course'), (2, 0))
+
+    def test_reconcile_completes_grading(self):
+        # Bob's assessment of Tim was lost, and is restored by hand
+        PeerWorkflow.objects.update(graded_by_count=0, grading_completed_at=None)
+        PeerQueueEntry.update_for_workflow(PeerWorkflow.objects.get(submission_uuid=self.tim_sub['uuid']))
+        self.assertTrue(PeerQueueEntry.objects.filter(submission_uuid=self.tim_sub['uuid']).exists())
+
+        cmd = reconcile_peer_counts.Command()
+        cmd.handle(u'test_course', u'test_item', u'1')
+
+        # Tim's submission has all the assessments it needs, so it leaves the queue
+        tim = PeerWorkflow.objects.get(submission_uuid=self.tim_sub['uuid'])
+        self.assertEqual(tim.graded_by_count, 1)
+        self.assertIsNot(tim.grading_completed_at, None)
+        self.assertFalse(PeerQueueEntry.objects.filter(submission_uuid=self.tim_sub['uuid']).exists())
+
+        # Bob's submission still needs an assessment
+        bob = PeerWorkflow.objects.get(submission_uuid=self.bob_sub['uuid'])
+        self.assertIs(bob.grading_completed_at, None)
+        self.assertTrue(PeerQueueEntry.objects.filter(submission_uuid=self.bob_sub['uuid']).exists())
+
+    def test_invalid_must_be_graded_by(self):
+        cmd = reconcile_peer_counts.Command()
+        with self.assertRaises(CommandError):
+            cmd.handle(u'test_course', u'test_item', u'three')
+
+    def test_reconcile_concurrent_assessment(self):
+        PeerWorkflow.objects.update(graded_count=5, graded_by_count=5)
+        original_filter = PeerWorkflow.objects.filter
+
+        def concurrent_assessment(*args, **kwargs):
+            """Someone completes an assessment just before the counts are fixed."""
+            if 'graded_count' in kwargs:
+                PeerWorkflow.objects.update(graded_count=F('graded_count') + 1)
+            return original_filter(*args, **kwargs)
+
+        with patch.object(PeerWorkflow.objects, 'filter', side_effect=concurrent_assessment):
+            self.assertEqual(PeerWorkflow.reconcile_counts(), (0, 2))
+
+        # The concurrent increments were not overwritten,
+        # and the next run fixes the counts
+        self.assertEqual(self._counts(self.tim_sub), (7, 5))
+        self.assertEqual(PeerWorkflow.reconcile_counts(), (2, 0))
+        self.assertEqual(self._counts(self.tim_sub), (0, 1))
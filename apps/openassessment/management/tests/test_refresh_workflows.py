@@ -0,0 +1,145 @@
+"""
+Tests for the management command that re-evaluates the workflows for an item.
+"""
+import json
+from django.core.management.base import CommandError
+from mock import patch
+from openassessment.test_utils import CacheResetTest
+from submissions import api as sub_api
+from openassessment.assessment.api import peer as peer_api
+from openassessment.workflow import api as workflow_api
+from openassessment.workflow.models import AssessmentWorkflow, AssessmentWorkflowStep
+from openassessment.management.commands import refresh_workflows
+
+
+RUBRIC = {
+    'criteria': [
+        {
+            'name': u'clarity',
+            'prompt': u'How clear was it?',
+            'options': [
+                {'name': u'unclear', 'points': 0, 'explanation': u''},
+                {'name': u'clear', 'points': 2, 'explanation': u''},
+            ]
+        }
+    ]
+}
+
+REQUIREMENTS = {"peer": {"must_grade": 1, "must_be_graded_by": 1}}
+
+
+@patch('openassessment.workflow.models.emit_event')
+class RefreshWorkflowsTest(CacheResetTest):
+
+    STUDENT_ITEM = {
+        'course_id': u'test_course',
+        'item_id': u'test_item',
+        'item_type': u'openassessment',
+    }
+
+    def _create_submission(self, student_id):
+        student_item = dict(self.STUDENT_ITEM, student_id=student_id)
+        submission = sub_api.create_submission(student_item, {'text': u"{}'s answer".format(student_id)})
+        workflow_api.create_workflow(submission['uuid'], ['peer'])
+        return submission
+
+    def _assess(self, scorer_sub, scorer_id):
+        """
+        Assess the next available submission, without updating any workflows.
+        """
+        peer_api.get_submission_to_assess(scorer_sub['uuid'], 1)
+        peer_api.create_assessment(
+            scorer_sub['uuid'], scorer_id, {u'clarity': u'clear'}, {}, u'', RUBRIC, 1
+        )
+
+    def _status(self, submission):
+        return AssessmentWorkflow.objects.get(submission_uuid=submission['uuid']).status
+
+    def test_refresh(self, mock_emit):
+        tim_sub = self._create_submission(u'Tim')
+        bob_sub = self._create_submission(u'Bob')
+        sally_sub = self._create_submission(u'Sally')
+
+        # Tim and Bob assess each other; Sally does nothing
+        self._assess(tim_sub, u'Tim')
+        self._assess(bob_sub, u'Bob')
+
+        cmd = refresh_workflows.Command()
+        with patch.object(peer_api, 'get_score', wraps=peer_api.get_score) as mock_get_score:
+            cmd.handle(u'test_course', u'test_item', json.dumps(REQUIREMENTS), '2')
+
+        self.assertEqual(self._status(tim_sub), 'done')
+        self.assertEqual(self._status(bob_sub), 'done')
+        self.assertEqual(self._status(sally_sub), 'peer')
+        self.assertEqual(cmd.results['num_workflows'], 3)
+        self.assertEqual(cmd.results['num_updated'], 2)
+        self.assertEqual(cmd.results['num_changed'], 2)
+
+        # Sally's workflow could not have changed, so it wasn't updated
+        scored_uuids = set(call[0][0] for call in mock_get_score.call_args_list)
+        self.assertNotIn(sally_sub['uuid'], scored_uuids)
+
+        # Done workflows are skipped the next time
+        cmd = refresh_workflows.Command()
+        cmd.handle(u'test_course', u'test_item', json.dumps(REQUIREMENTS))
+        self.assertEqual(cmd.results['num_workflows'], 1)
+        self.assertEqual(cmd.results['num_updated'], 0)
+
+    def test_other_item(self, mock_emit):
+        tim_sub = self._create_submission(u'Tim')
+        bob_sub = self._create_submission(u'Bob')
+        self._assess(tim_sub, u'Tim')
+        self._assess(bob_sub, u'Bob')
+
+        cmd = refresh_workflows.Command()
+        cmd.handle(u'test_course', u'other_item', json.dumps(REQUIREMENTS))
+        self.assertEqual(cmd.results['num_workflows'], 0)
+        self.assertEqual(self._status(tim_sub), 'peer')
+
+    def test_update_error(self, mock_emit):
+        tim_sub = self._create_submission(u'Tim')
+        bob_sub = self._create_submission(u'Bob')
+        self._assess(tim_sub, u'Tim')
+        self._assess(bob_sub, u'Bob')
+
+        cmd = refresh_workflows.Command()
+        with patch.object(peer_api, 'get_score') as mock_get_score:
+            mock_get_score.side_effect = peer_api.PeerAssessmentInternalError("Kaboom!")
+            cmd.handle(u'test_course', u'test_item', json.dumps(REQUIREMENTS))
+        self.assertEqual(cmd.results['num_errors'], 2)
+        self.assertEqual(cmd.results['num_updated'], 0)
+
+    def test_updates_loaded_workflows(self, mock_emit):
+        tim_sub = self._create_submission(u'Tim')
+        bob_sub = self._create_submission(u'Bob')
+        self._assess(tim_sub, u'Tim')
+        self._assess(bob_sub, u'Bob')
+
+        # The workflows and their steps are loaded in batches, not one at a time
+        cmd = refresh_workflows.Command()
+        with patch.object(workflow_api, '_get_workflow_model') as mock_get_workflow:
+            with patch.object(AssessmentWorkflowStep.objects, 'filter') as mock_filter_steps:
+                cmd.handle(u'test_course', u'test_item', json.dumps(REQUIREMENTS))
+        self.assertFalse(mock_get_workflow.called)
+        self.assertFalse(mock_filter_steps.called)
+        self.assertEqual(cmd.results['num_changed'], 2)
+        self.assertEqual(self._status(tim_sub), 'done')
+
+    def test_missing_peer_requirements(self, mock_emit):
+        self._create_submission(u'Tim')
+        cmd = refresh_workflows.Command()
+        for requirements in [{}, {"peer": {"must_grade": 1}}]:
+            with self.assertRaises(CommandError):
+                cmd.handle(u'test_course', u'test_item', json.dumps(requirements))
+
+    def test_invalid_arguments(self, mock_emit):
+        cmd = refresh_workflows.Command()
+        for args in [
+            (u'test_course', u'test_item'),
+            (u'test_course', u'test_item', u'not json'),
+            (u'test_course', u'test_item', u'[]'),
+            (u'test_course', u'test_item', json.dumps(REQUIREMENTS), u'abc'),
+            (u'test_course', u'test_item', json.dumps(REQUIREMENTS), u'0'),
+        ]:
+            with self.assertRaises(CommandError):
+                cmd.handle(*args)
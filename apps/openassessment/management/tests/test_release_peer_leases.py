@@ -0,0 +1,65 @@
+"""
+Tests for the management command that releases expired peer leases.
+"""
+import datetime
+from openassessment.test_utils import CacheResetTest
+from django.utils import timezone
+from submissions import api as sub_api
+from openassessment.assessment.api import peer as peer_api
+from openassessment.assessment.models import PeerWorkflowItem, PeerQueueEntry
+from openassessment.management.commands import release_peer_leases
+
+
+class ReleasePeerLeasesTest(CacheResetTest):
+
+    STUDENT_ITEM = {
+        'course_id': u'test_course',
+        'item_id': u'test_item',
+        'item_type': u'openassessment',
+    }
+
+    def _create_submission(self, student_id):
+        student_item = dict(self.STUDENT_ITEM, student_id=student_id)
+        submission = sub_api.create_submission(student_item, {'text': u"{}'s answer".format(student_id)})
+        peer_api.create_peer_workflow(submission['uuid'])
+        return submission
+
+    def test_release_expired_leases(self):
+        tim_sub = self._create_submission(u'Tim')
+        bob_sub = self._create_submission(u'Bob')
+        sally_sub = self._create_submission(u'Sally')
+
+        # Tim leases Bob's submission and Bob leases Tim's
+        peer_api.get_submission_to_assess(tim_sub['uuid'], 1)
+        peer_api.get_submission_to_assess(bob_sub['uuid'], 1)
+        self.assertEqual(PeerQueueEntry.objects.get(submission_uuid=bob_sub['uuid']).grader_count, 1)
+
+        # Expire Tim's lease on Bob's submission
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        PeerWorkflowItem.objects.filter(submission_uuid=bob_sub['uuid']).update(expires_at=yesterday)
+        PeerQueueEntry.objects.filter(submission_uuid=bob_sub['uuid']).update(next_expiry=yesterday)
+
+        cmd = release_peer_leases.Command()
+        cmd.handle()
+
+        # Bob's submission has been released, but Tim's is still leased
+        self.assertEqual(PeerQueueEntry.objects.get(submission_uuid=bob_sub['uuid']).grader_count, 0)
+        self.assertEqual(PeerQueueEntry.objects.get(submission_uuid=tim_sub['uuid']).grader_count, 1)
+        self.assertEqual(PeerQueueEntry.objects.get(submission_uuid=sally_sub['uuid']).grader_count, 0)
+
+    def test_release_other_course(self):
+        tim_sub = self._create_submission(u'Tim')
+        bob_sub = self._create_submission(u'Bob')
+        peer_api.get_submission_to_assess(tim_sub['uuid'], 1)
+
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        PeerWorkflowItem.objects.filter(submission_uuid=bob_sub['uuid']).update(expires_at=yesterday)
+        PeerQueueEntry.objects.filter(submission_uuid=bob_sub['uuid']).update(next_expiry=yesterday)
+
+        # Leases in other courses are left alone
+        cmd = release_peer_leases.Command()
+        cmd.handle(u'other_course')
+        self.assertEqual(PeerQueueEntry.objects.get(submission_uuid=bob_sub['uuid']).grader_count, 1)
+
+        cmd.handle(u'test_course', u'test_item')
+        self.assertEqual(PeerQueueEntry.objects.get(submission_uuid=bob_sub['uuid']).grader_count, 0)
@@ -0,0 +1,75 @@
+"""
+Tests for the management command that sets scores from a CSV file.
+"""
+import os
+import shutil
+import tempfile
+from django.core.management.base import CommandError
+from openassessment.test_utils import CacheResetTest
+from submissions import api as sub_api
+from openassessment.management.commands import set_scores_from_csv
+
+
+class SetScoresFromCsvTest(CacheResetTest):
+
+    STUDENT_ITEM = {
+        'course_id': u'test_course',
+        'item_id': u'test_item',
+        'item_type': u'openassessment',
+    }
+
+    def setUp(self):
+        super(SetScoresFromCsvTest, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.temp_dir, 'scores.csv')
+
+    def tearDown(self):
+        super(SetScoresFromCsvTest, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def _create_submission(self, student_id):
+        student_item = dict(self.STUDENT_ITEM, student_id=student_id)
+        return sub_api.create_submission(student_item, {'text': u"{}'s answer".format(student_id)})
+
+    def _write_csv(self, rows):
+        with open(self.csv_path, 'w') as csv_file:
+            csv_file.write("\n".join(",".join(row) for row in rows))
+
+    def test_set_scores(self):
+        tim_sub = self._create_submission(u'Tim')
+        bob_sub = self._create_submission(u'Bob')
+        sally_sub = self._create_submission(u'Sally')
+        self._write_csv([
+            ['submission_uuid', 'points_earned', 'points_possible', 'comment'],
+            [tim_sub['uuid'], '1', '10', 'regraded'],
+            [bob_sub['uuid'], '2', '10', ''],
+            [sally_sub['uuid'], '3', '10', ''],
+        ])
+
+        cmd = set_scores_from_csv.Command()
+        cmd.handle(self.csv_path, '2')
+        self.assertEqual(cmd.num_scores, 3)
+
+        for student_id, points_earned in [(u'Tim', 1), (u'Bob', 2), (u'Sally', 3)]:
+            score = sub_api.get_score(dict(self.STUDENT_ITEM, student_id=student_id))
+            self.assertEqual(score['points_earned'], points_earned)
+            self.assertEqual(score['points_possible'], 10)
+
+    def test_missing_columns(self):
+        self._write_csv([['submission_uuid', 'points_earned']])
+        with self.assertRaises(CommandError):
+            set_scores_from_csv.Command().handle(self.csv_path)
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            set_scores_from_csv.Command().handle(os.path.join(self.temp_dir, 'no_such_file.csv'))
+
+    def test_invalid_score(self):
+        tim_sub = self._create_submission(u'Tim')
+        self._write_csv([
+            ['submission_uuid', 'points_earned', 'points_possible'],
+            [tim_sub['uuid'], 'ten', '10'],
+        ])
+        with self.assertRaises(CommandError):
+            set_scores_from_csv.Command().handle(self.csv_path)
+        self.assertIs(sub_api.get_score(dict(self.STUDENT_ITEM, student_id=u'Tim')), None)
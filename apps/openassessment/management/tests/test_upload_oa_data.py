@@ -4,7 +4,7 @@ Tests for management command that uploads submission/assessment data.
 """
 from StringIO import StringIO
 import tarfile
-from django.test import TestCase
+from openassessment.test_utils import CacheResetTest
 import boto
 import moto
 from openassessment.management.commands import upload_oa_data
@@ -12,7 +12,7 @@ from openassessment.workflow import api as workflow_api
 from submissions import api as sub_api
 
 
-class UploadDataTest(TestCase):
+class UploadDataTest(CacheResetTest):
     """
     Test the upload management command.  Archiving and upload are in-scope,
     but the contents of the generated CSV files are tested elsewhere.
@@ -3,6 +3,7 @@ Test utilities
 """
 from django.core.cache import cache
 from django.test import TestCase
+from openassessment.assessment.models import CompiledRubric
 
 
 class CacheResetTest(TestCase):
@@ -11,8 +12,15 @@ class CacheResetTest(TestCase):
     """
     def setUp(self):
         super(CacheResetTest, self).setUp()
-        cache.clear()
+        self._clear_all_caches()
 
     def tearDown(self):
         super(CacheResetTest, self).tearDown()
+        self._clear_all_caches()
+
+    def _clear_all_caches(self):
+        """
+        Clear the Django cache and the in-process caches.
+        """
         cache.clear()
+        CompiledRubric.clear_local_cache()
@@ -8,9 +8,11 @@ from StringIO import StringIO
 import csv
 from django.core.management import call_command
 import ddt
+from mock import patch
 from openassessment.test_utils import CacheResetTest
 from submissions import api as sub_api
 from openassessment.workflow import api as workflow_api
+from openassessment import data as data_module
 from openassessment.data import CsvWriter
 
 
@@ -116,6 +118,14 @@ class CsvWriterTest(CacheResetTest):
             rows = content.split('\n')
             self.assertGreater(len(rows), 2)
 
+    def test_read_replica(self):
+        # The export can tolerate replication lag
+        self._load_fixture('db_fixtures/scored.json')
+        output_streams = self._output_streams(CsvWriter.MODELS)
+        with patch.object(data_module, 'use_read_replica', wraps=data_module.use_read_replica) as mock_hint:
+            CsvWriter(output_streams).write_to_csv('edX/Enchantment_101/April_1')
+        mock_hint.assert_called_once_with()
+
     def _output_streams(self, names):
         """
         Create in-memory buffers.
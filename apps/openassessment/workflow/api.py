@@ -4,17 +4,32 @@ Public interface for the Assessment Workflow.
 """
 import copy
 import logging
+import socket
 
+from amqp.exceptions import AMQPError
+from django.conf import settings
+from django.core.cache import cache
 from django.db import DatabaseError
+from django.db.models import Count
+from kombu.exceptions import KombuError
 
 from openassessment.assessment.api import peer as peer_api
 from openassessment.assessment.errors import PeerAssessmentError
 from submissions import api as sub_api
-from .models import AssessmentWorkflow, AssessmentWorkflowStep
+from submissions.routers import use_read_replica
+from .models import (
+    AssessmentWorkflow, AssessmentWorkflowStep,
+    async_workflow_updates_enabled, status_counts_cache_key
+)
 from .serializers import AssessmentWorkflowSerializer
 
 logger = logging.getLogger(__name__)
 
+# Seconds to cache the workflow status counts shown to course staff.
+# Saving a workflow invalidates the counts for its item, so this only
+# bounds how long counts read from a lagging read replica may be stale.
+DEFAULT_STATUS_COUNTS_CACHE_TIMEOUT = 30
+
 
 class AssessmentWorkflowError(Exception):
     """An error that occurs during workflow actions.
@@ -166,7 +181,7 @@ def create_workflow(submission_uuid, steps):
     return AssessmentWorkflowSerializer(workflow).data
 
 
-def get_workflow_for_submission(submission_uuid, assessment_requirements):
+def get_workflow_for_submission(submission_uuid, assessment_requirements, update=True):
     """Returns Assessment Workflow information
 
     This will implicitly call `update_from_assessments()` to make sure we
@@ -176,6 +191,12 @@ def get_workflow_for_submission(submission_uuid, assessment_requirements):
     canonical requirements are stored in the `OpenAssessmentBlock` problem
     definition and may change over time.
 
+    If `update` is False, we instead return the workflow as it was last
+    updated, without querying the assessment APIs.  This is much cheaper,
+    and is accurate if the workflow is updated whenever it is assessed
+    (see `schedule_update_from_assessments()`).  Workflows that have
+    never been updated are still updated here.
+
     Args:
         submission_uuid (str): Identifier for the submission the
             `AssessmentWorkflow` was created to track. There is a 1:1
@@ -190,6 +211,9 @@ def get_workflow_for_submission(submission_uuid, assessment_requirements):
             The intention is to eventually pass in more assessment sequence
             specific requirements in this dict.
 
+    Kwargs:
+        update (bool): Whether to re-evaluate the workflow before returning it.
+
     Returns:
         dict: Assessment workflow information with the following
             `uuid` = UUID of this `AssessmentWorkflow`
@@ -241,6 +265,14 @@ def get_workflow_for_submission(submission_uuid, assessment_requirements):
         }
 
     """
+    if not update:
+        workflow = _get_workflow_model(submission_uuid)
+        status_details = workflow.stored_status_details()
+        if status_details is not None:
+            data_dict = AssessmentWorkflowSerializer(workflow).data
+            data_dict["status_details"] = status_details
+            return data_dict
+
     return update_from_assessments(submission_uuid, assessment_requirements)
 
 
@@ -333,14 +365,58 @@ def update_from_assessments(submission_uuid, assessment_requirements):
         raise AssessmentWorkflowInternalError(err_msg)
 
 
-def get_status_counts(course_id, item_id, steps):
+def schedule_update_from_assessments(submission_uuid, assessment_requirements):
+    """Update a workflow after its submission has been assessed by someone else.
+
+    If `EDX_ORA2["ASYNC_WORKFLOW_UPDATES"]` is enabled, the workflow is
+    updated by a Celery task, outside of the assessor's request; otherwise,
+    it is updated right away.  Either way, this is what keeps the stored
+    status current for `get_workflow_for_submission(..., update=False)`.
+
+    If the task can't be queued (for example, because the broker is
+    down), the workflow is updated right away instead.
+
+    Args:
+        submission_uuid (str): The submission that was assessed.
+        assessment_requirements (dict): See `update_from_assessments()`.
+
+    Returns:
+        None
+
+    Raises:
+        AssessmentWorkflowError: The workflow could not be updated
+            (only raised when it is updated right away).
+
+    """
+    if async_workflow_updates_enabled():
+        from openassessment.workflow import tasks
+        try:
+            tasks.update_workflow.delay(submission_uuid, assessment_requirements)
+            return
+        except (KombuError, AMQPError, socket.error):
+            logger.exception(
+                u"Could not queue the workflow update for submission {}; updating it now".format(submission_uuid)
+            )
+
+    update_from_assessments(submission_uuid, assessment_requirements)
+
+
+def get_status_counts(course_id, item_id, steps, read_replica=True):
     """
     Count how many workflows have each status, for a given item in a course.
 
+    The counts are only shown to course staff, so by default they are read
+    from the read replica, if one is configured (see `submissions.routers`).
+
+    All statuses are counted in one `GROUP BY` query, and the counts are
+    cached for `EDX_ORA2["STATUS_COUNTS_CACHE_TIMEOUT"]` seconds, or until
+    a workflow for the item is saved.
+
     Kwargs:
         course_id (unicode): The ID of the course.
         item_id (unicode): The ID of the item in the course.
         steps (list): A list of assessment steps for this problem.
+        read_replica (bool): Whether to read from the read replica.
 
     Returns:
         list of dictionaries with keys "status" (str) and "count" (int)
@@ -355,15 +431,24 @@ def get_status_counts(course_id, item_id, steps):
         ]
 
     """
-    return [
-        {
-            "status": status,
-            "count": AssessmentWorkflow.objects.filter(
-                status=status,
+    cache_key = status_counts_cache_key(course_id, item_id)
+    counts = cache.get(cache_key)
+    if counts is None:
+        with use_read_replica(read_replica):
+            # Clear the default ordering, which would otherwise be added to the GROUP BY
+            rows = AssessmentWorkflow.objects.filter(
                 course_id=course_id,
                 item_id=item_id,
-            ).count()
-        }
+            ).order_by().values('status').annotate(count=Count('id'))
+            counts = {row['status']: row['count'] for row in rows}
+
+        timeout = getattr(settings, "EDX_ORA2", {}).get(
+            "STATUS_COUNTS_CACHE_TIMEOUT", DEFAULT_STATUS_COUNTS_CACHE_TIMEOUT
+        )
+        cache.set(cache_key, counts, timeout)
+
+    return [
+        {"status": status, "count": counts.get(status, 0)}
         for status in steps + AssessmentWorkflow.STATUSES
     ]
 
@@ -400,7 +485,21 @@ def _get_workflow_model(submission_uuid):
         raise AssessmentWorkflowRequestError("submission_uuid must be a string type")
 
     try:
-        workflow = AssessmentWorkflow.objects.get(submission_uuid=submission_uuid)
+        # We almost always need the steps too, so load the workflow
+        # along with its steps in a single query.
+        steps = list(
+            AssessmentWorkflowStep.objects.select_related('workflow').filter(
+                workflow__submission_uuid=submission_uuid
+            )
+        )
+        if steps:
+            workflow = steps[0].workflow
+            for step in steps:
+                step.workflow = workflow
+            workflow.set_loaded_steps(steps)
+        else:
+            # Older workflows may not have any steps
+            workflow = AssessmentWorkflow.objects.get(submission_uuid=submission_uuid)
     except AssessmentWorkflow.DoesNotExist:
         raise AssessmentWorkflowNotFoundError(
             u"No assessment workflow matching submission_uuid {}".format(submission_uuid)
@@ -423,6 +522,11 @@ def _serialized_with_details(workflow, assessment_requirements):
     `update_from_assessments()` for details on params and return values.
     """
     data_dict = AssessmentWorkflowSerializer(workflow).data
-    data_dict["status_details"] = workflow.status_details(assessment_requirements)
+    status_details = None
+    if workflow.has_stored_status_details():
+        status_details = workflow.stored_status_details()
+    if status_details is None:
+        status_details = workflow.status_details(assessment_requirements)
+    data_dict["status_details"] = status_details
     return data_dict
 
@@ -10,13 +10,16 @@ need to then generate a matching migration for it using:
 
 """
 from datetime import datetime
+from hashlib import sha1
 import logging
 import importlib
 
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django_extensions.db.fields import UUIDField
 from django.utils.timezone import now
+from dogapi import dog_stats_api
 from model_utils import Choices
 from model_utils.models import StatusModel, TimeStampedModel
 
@@ -34,6 +37,66 @@ else:
     emit_event = lambda event: logger.info("Event: " + unicode(event))
 
 
+def async_score_publishing_enabled():
+    """
+    Check whether finished workflows publish their scores from a Celery task.
+
+    Returns:
+        bool
+
+    """
+    return getattr(settings, "EDX_ORA2", {}).get("ASYNC_SCORE_PUBLISHING", False)
+
+
+def async_workflow_updates_enabled():
+    """
+    Check whether workflows are re-evaluated by a Celery task when they are
+    assessed, rather than every time a student loads the problem.
+
+    Returns:
+        bool
+
+    """
+    return getattr(settings, "EDX_ORA2", {}).get("ASYNC_WORKFLOW_UPDATES", False)
+
+
+def status_counts_cache_key(course_id, item_id):
+    """
+    Return the cache key for the workflow status counts of an item.
+
+    Args:
+        course_id (unicode): The ID of the course.
+        item_id (unicode): The ID of the item in the course.
+
+    Returns:
+        str
+
+    """
+    # Course and item IDs may contain characters memcached doesn't allow in keys
+    digest = sha1(u"{},{}".format(course_id, item_id).encode('utf-8')).hexdigest()
+    return "workflow.status_counts.{}".format(digest)
+
+
+def _record_update(status, short_circuited):
+    """
+    Count workflow updates, so we can tell how many of them
+    were decided from the stored workflow alone.
+
+    Args:
+        status (unicode): The workflow's status before the update.
+        short_circuited (bool): Whether the update returned early.
+
+    Returns:
+        None
+
+    """
+    metric = (
+        'openassessment.workflow.update.short_circuit' if short_circuited
+        else 'openassessment.workflow.update.full'
+    )
+    dog_stats_api.increment(metric, tags=[u"status:{}".format(status)])
+
+
 class AssessmentWorkflow(TimeStampedModel, StatusModel):
     """Tracks the open-ended assessment status of a student submission.
 
@@ -84,6 +147,9 @@ class AssessmentWorkflow(TimeStampedModel, StatusModel):
 
         Note that while it is usually the case that we're setting the score,
         that may not always be the case. We may have some course staff override.
+
+        The submissions API caches the score once it is set, so this
+        doesn't query for the score of a finished workflow.
         """
         return sub_api.get_latest_score_for_submission(self.submission_uuid)
 
@@ -92,13 +158,46 @@ class AssessmentWorkflow(TimeStampedModel, StatusModel):
         steps = self._get_steps()
         for step in steps:
             status_dict[step.name] = {
-                "complete": step.api().submitter_is_finished(
+                "complete": step.submitter_is_finished(
                     self.submission_uuid,
                     assessment_requirements.get(step.name, {})
                 )
             }
         return status_dict
 
+    def has_stored_status_details(self):
+        """
+        Check whether `stored_status_details` is known to match
+        `status_details` without asking the assessment APIs.
+        Once a workflow is waiting or done, the submitter has completed
+        every step, and completed steps are never revisited.
+
+        Returns:
+            bool
+
+        """
+        return (
+            self.status in (self.STATUS.waiting, self.STATUS.done) and
+            all(step.is_submitter_complete() for step in self._get_steps(create=False))
+        )
+
+    def stored_status_details(self):
+        """
+        Like `status_details`, but from the completion times recorded the
+        last time the workflow was updated, without querying the assessment APIs.
+
+        Returns:
+            dict, or None if the workflow has never been updated.
+
+        """
+        steps = self._get_steps(create=False)
+        if not steps:
+            return None
+        return {
+            step.name: {"complete": step.is_submitter_complete()}
+            for step in steps
+        }
+
     def update_from_assessments(self, assessment_requirements):
         """Query self and peer APIs and change our status if appropriate.
 
@@ -131,19 +230,37 @@ class AssessmentWorkflow(TimeStampedModel, StatusModel):
 
         """
         from openassessment.assessment.api import peer as peer_api
-        from openassessment.assessment.api import self as self_api
 
         # If we're done, we're done -- it doesn't matter if requirements have
         # changed because we've already written a score.
         if self.status == self.STATUS.done:
+            _record_update(self.status, True)
             return
 
         # Update our AssessmentWorkflowStep models with the latest from our APIs
         steps = self._get_steps()
 
-        # Go through each step and update its status.
+        # If we're waiting, the submitter has completed every step, and
+        # completed steps are never revisited, so the only thing that can
+        # change is whether the steps still awaiting assessment have finished.
+        # If none of them has, there's nothing else to do.
+        updated_steps = []
+        if self.status == self.STATUS.waiting and all(step.is_submitter_complete() for step in steps):
+            updated_steps = [step for step in steps if not step.is_assessment_complete()]
+            if updated_steps and not any([
+                step.update(self.submission_uuid, assessment_requirements)
+                for step in updated_steps
+            ]):
+                _record_update(self.status, True)
+                return
+
+        _record_update(self.status, False)
+
+        # Go through each step and update its status,
+        # skipping the steps we just updated above.
         for step in steps:
-            step.update(self.submission_uuid, assessment_requirements)
+            if step not in updated_steps:
+                step.update(self.submission_uuid, assessment_requirements)
 
         # Fetch name of the first step that the submitter hasn't yet completed.
         new_status = next(
@@ -161,21 +278,16 @@ class AssessmentWorkflow(TimeStampedModel, StatusModel):
         if (new_status == self.STATUS.waiting and
             all(step.assessment_completed_at for step in steps)):
 
-            # At this point, we're trying to give a score. We currently have a
-            # very simple rule for this -- if it has a peer step, use that for
-            # scoring. If not, use the self step. Later on, we may put more
-            # interesting rules here.
-            step_names = [step.name for step in steps]
-            score = None
-            if self.STATUS.peer in step_names:
-                score = peer_api.get_score(
-                    self.submission_uuid,
-                    assessment_requirements[self.STATUS.peer]
-                )
-            elif self.STATUS.self in step_names:
-                score = self_api.get_score(self.submission_uuid, {})
-
+            score = self._calculate_score(steps, assessment_requirements)
             if score:
+                if async_score_publishing_enabled():
+                    # The tasks publishing the score may run as soon as
+                    # they're enqueued, so commit the new status first;
+                    # otherwise they could publish the score of a workflow
+                    # whose change is then rolled back.
+                    self.status = self.STATUS.done
+                    with transaction.commit_on_success():
+                        self.save()
                 self.set_score(score)
                 new_status = self.STATUS.done
 
@@ -184,20 +296,107 @@ class AssessmentWorkflow(TimeStampedModel, StatusModel):
             self.status = new_status
             self.save()
 
-    def _get_steps(self):
+    def _calculate_score(self, steps, assessment_requirements):
+        """
+        Calculate the score for a workflow whose steps have all been assessed.
+
+        Args:
+            steps (list of AssessmentWorkflowStep): The workflow's steps.
+            assessment_requirements (dict): The requirements for each step,
+                as passed to `update_from_assessments`.
+
+        Returns:
+            dict with 'points_earned' and 'points_possible', or None if the
+            submission can't be scored yet.
+
+        """
+        from openassessment.assessment.api import peer as peer_api
+        from openassessment.assessment.api import self as self_api
+
+        # At this point, we're trying to give a score. We currently have a
+        # very simple rule for this -- if it has a peer step, use that for
+        # scoring. If not, use the self step. Later on, we may put more
+        # interesting rules here.
+        step_names = [step.name for step in steps]
+        if self.STATUS.peer in step_names:
+            return peer_api.get_score(
+                self.submission_uuid,
+                assessment_requirements[self.STATUS.peer]
+            )
+        elif self.STATUS.self in step_names:
+            return self_api.get_score(self.submission_uuid, {})
+        return None
+
+    def publish_missing_score(self, assessment_requirements):
+        """
+        Publish the score again for a finished workflow that has none,
+        for example because the Celery task publishing it gave up.
+
+        Args:
+            assessment_requirements (dict): The requirements for each step,
+                as passed to `update_from_assessments`.
+
+        Returns:
+            bool: True if a score was published.
+
+        """
+        if self.status != self.STATUS.done or self.score is not None:
+            return False
+
+        score = self._calculate_score(self._get_steps(), assessment_requirements)
+        if not score:
+            return False
+
+        self.set_score(score)
+        return True
+
+    def save(self, *args, **kwargs):
+        """
+        Save the workflow, and invalidate the cached status counts
+        for its item, since its status may have changed.
+        """
+        super(AssessmentWorkflow, self).save(*args, **kwargs)
+        cache.delete(status_counts_cache_key(self.course_id, self.item_id))
+
+    def set_loaded_steps(self, steps):
+        """
+        Provide the workflow's steps, if they were loaded along with it,
+        so `_get_steps` doesn't query for them again.
+
+        Args:
+            steps (list of `AssessmentWorkflowStep`): All the workflow's steps, in order.
+
+        """
+        self._steps = steps
+
+    def _get_steps(self, create=True):
         """
         Simple helper function for retrieving all the steps in the given
         Workflow.
+
+        The steps are loaded once per workflow instance (unless they were
+        loaded along with the workflow), so that the workflow and its steps
+        share the answers the assessment APIs have already given.
+
+        Kwargs:
+            create (bool): If True and the workflow has no steps, create
+                the default steps.
+
+        Returns:
+            list of `AssessmentWorkflowStep`
+
         """
-        steps = list(self.steps.all())
-        if not steps:
+        steps = getattr(self, '_steps', None)
+        if steps is None:
+            steps = self._steps = list(self.steps.all())
+        if not steps and create:
             # If no steps exist for this AssessmentWorkflow, assume
             # peer -> self for backwards compatibility
-            self.steps.add(
+            steps = self._steps = [
                 AssessmentWorkflowStep(name=self.STATUS.peer, order_num=0),
                 AssessmentWorkflowStep(name=self.STATUS.self, order_num=1)
-            )
-            steps = list(self.steps.all())
+            ]
+            self.steps.add(*steps)
         return steps
 
     def set_score(self, score):
@@ -207,20 +406,20 @@ class AssessmentWorkflow(TimeStampedModel, StatusModel):
         Scores are persisted via the Submissions API, separate from the Workflow
         Data. Score is associated with the same submission_uuid as this workflow
 
+        If `EDX_ORA2["ASYNC_SCORE_PUBLISHING"]` is enabled, the score is
+        published and the event emitted by Celery tasks instead, so the
+        student doesn't wait for them; until the task runs, the workflow's
+        `score` is None.  The tasks are enqueued right away, so the workflow
+        should already be saved as done and committed.
+
         Args:
             score (dict): A dict containing 'points_earned' and
                 'points_possible'.
 
         """
-        sub_api.set_score(
-            self.submission_uuid,
-            score["points_earned"],
-            score["points_possible"]
-        )
-
         # This should be replaced by using the event tracking API, but
         # that's not quite ready yet. So we're making this temp hack.
-        emit_event({
+        event = {
             "context": {
                 "course_id": self.course_id
             },
@@ -232,7 +431,24 @@ class AssessmentWorkflow(TimeStampedModel, StatusModel):
             "event_source": "server",
             "event_type": "openassessment.workflow.score",
             "time": datetime.utcnow(),
-        })
+        }
+
+        if async_score_publishing_enabled():
+            from openassessment.workflow import tasks
+            tasks.publish_score.delay(
+                self.submission_uuid,
+                score["points_earned"],
+                score["points_possible"],
+                scored_at=now()
+            )
+            tasks.emit_event.delay(event)
+        else:
+            sub_api.set_score(
+                self.submission_uuid,
+                score["points_earned"],
+                score["points_possible"]
+            )
+            emit_event(event)
 
 
 class AssessmentWorkflowStep(models.Model):
@@ -278,6 +494,51 @@ class AssessmentWorkflowStep(models.Model):
             api = student_training
         return api
 
+    def submitter_is_finished(self, submission_uuid, step_reqs):
+        """
+        Ask the step's API whether the submitter has finished the step.
+
+        The answer is memoized on this step, so asking again
+        (for example, from `AssessmentWorkflow.status_details`)
+        does not query the API again.
+
+        Args:
+            submission_uuid (str): The submission being tracked.
+            step_reqs (dict): The requirements for this step.
+
+        Returns:
+            bool
+
+        """
+        return self._memoized_api_call('submitter_is_finished', submission_uuid, step_reqs)
+
+    def assessment_is_finished(self, submission_uuid, step_reqs):
+        """
+        Ask the step's API whether the submission has been fully assessed
+        in this step.  The answer is memoized like `submitter_is_finished`.
+
+        Args:
+            submission_uuid (str): The submission being tracked.
+            step_reqs (dict): The requirements for this step.
+
+        Returns:
+            bool
+
+        """
+        return self._memoized_api_call('assessment_is_finished', submission_uuid, step_reqs)
+
+    def _memoized_api_call(self, func_name, submission_uuid, step_reqs):
+        """
+        Call a function of the step's API, reusing the answer if this step
+        already asked it the same question.
+        """
+        if not hasattr(self, '_api_answers'):
+            self._api_answers = {}
+        key = (func_name, submission_uuid, repr(sorted(step_reqs.items())))
+        if key not in self._api_answers:
+            self._api_answers[key] = getattr(self.api(), func_name)(submission_uuid, step_reqs)
+        return self._api_answers[key]
+
     def update(self, submission_uuid, assessment_requirements):
         """
         Updates the AssessmentWorkflowStep models with the requirements
@@ -285,7 +546,13 @@ class AssessmentWorkflowStep(models.Model):
 
         Intended for internal use by update_from_assessments(). See
         update_from_assessments() documentation for more details.
+
+        Returns:
+            bool: Whether the step changed.
         """
+        # Ask the API afresh, but remember the answers for the rest of this request.
+        self._api_answers = {}
+
         # Once a step is completed, it will not be revisited based on updated
         # requirements.
         step_changed = False
@@ -293,18 +560,19 @@ class AssessmentWorkflowStep(models.Model):
 
         # Has the user completed their obligations for this step?
         if (not self.is_submitter_complete() and
-                self.api().submitter_is_finished(submission_uuid, step_reqs)):
+                self.submitter_is_finished(submission_uuid, step_reqs)):
             self.submitter_completed_at = now()
             step_changed = True
 
         # Has the step received a score?
         if (not self.is_assessment_complete() and
-                self.api().assessment_is_finished(submission_uuid, step_reqs)):
+                self.assessment_is_finished(submission_uuid, step_reqs)):
             self.assessment_completed_at = now()
             step_changed = True
 
         if step_changed:
             self.save()
+        return step_changed
 
 
 # Just here to record thoughts for later:
@@ -0,0 +1,133 @@
+"""
+Celery tasks for updating workflows and publishing their scores.
+
+When `EDX_ORA2["ASYNC_WORKFLOW_UPDATES"]` is enabled, a workflow is
+re-evaluated by `update_workflow` after someone else assesses its
+submission, rather than while its student loads the problem.
+
+When `EDX_ORA2["ASYNC_SCORE_PUBLISHING"]` is enabled, a workflow that
+finishes records its new status right away, and these tasks publish its
+score to the submissions API and emit the score event afterwards, outside
+of the student's request.
+
+The tasks can safely be run more than once, so they are retried when
+the workflow, the submissions API or the event logger fails.
+"""
+import logging
+
+from celery.task import task
+from dogapi import dog_stats_api
+
+from submissions import api as sub_api
+
+logger = logging.getLogger(__name__)
+
+# Number of times to retry a task before giving up
+MAX_RETRIES = 5
+
+# Seconds to wait before retrying a task
+RETRY_DELAY_SECONDS = 30
+
+
+@task(max_retries=MAX_RETRIES, default_retry_delay=RETRY_DELAY_SECONDS)
+def update_workflow(submission_uuid, assessment_requirements):
+    """
+    Re-evaluate the workflow for a submission.
+
+    Args:
+        submission_uuid (str): The submission whose workflow to update.
+        assessment_requirements (dict): The requirements for each step
+            of the workflow, as passed to `update_from_assessments`.
+
+    Returns:
+        None
+
+    """
+    from openassessment.workflow import api as workflow_api
+
+    try:
+        workflow_api.update_from_assessments(submission_uuid, assessment_requirements)
+    except (workflow_api.AssessmentWorkflowRequestError, workflow_api.AssessmentWorkflowNotFoundError):
+        # Retrying won't help
+        logger.exception(u"Could not update the workflow for submission {}".format(submission_uuid))
+    except workflow_api.AssessmentWorkflowInternalError as ex:
+        logger.exception(u"Could not update the workflow for submission {}, retrying".format(submission_uuid))
+        raise update_workflow.retry(exc=ex)
+
+
+@task(max_retries=MAX_RETRIES, default_retry_delay=RETRY_DELAY_SECONDS)
+def publish_score(submission_uuid, points_earned, points_possible, scored_at=None):
+    """
+    Set the score for a submission, unless it has already been set.
+
+    The task may be retried after the score was set (or enqueued twice),
+    so it does nothing if the submission already has a score created at
+    or after `scored_at`, the time the workflow decided on this score.
+    A later score with the same points is still published, because it
+    is decided at a later time.
+
+    If the task gives up, the workflow is left "done" with no score;
+    the `publish_missing_scores` management command publishes it again.
+
+    Args:
+        submission_uuid (str): The submission to score.
+        points_earned (int): The points earned.
+        points_possible (int): The points possible.
+
+    Kwargs:
+        scored_at (datetime): When the workflow decided on this score.
+            If not provided, the score is always published.
+
+    Returns:
+        None
+
+    """
+    try:
+        latest_score = sub_api.get_latest_score_for_submission(submission_uuid)
+        if (
+            scored_at is not None and latest_score is not None and
+            latest_score['created_at'] >= scored_at
+        ):
+            logger.info(
+                u"Score {}/{} for submission {} was already published".format(
+                    points_earned, points_possible, submission_uuid
+                )
+            )
+            return
+
+        sub_api.set_score(submission_uuid, points_earned, points_possible)
+    except sub_api.SubmissionInternalError as ex:
+        if publish_score.request.retries >= publish_score.max_retries:
+            logger.error(
+                u"Giving up publishing the score {}/{} for submission {}; "
+                u"its workflow is done but has no score".format(
+                    points_earned, points_possible, submission_uuid
+                )
+            )
+            dog_stats_api.increment('openassessment.workflow.publish_score.failed')
+        else:
+            logger.exception(u"Could not publish the score for submission {}, retrying".format(submission_uuid))
+        raise publish_score.retry(exc=ex)
+
+
+@task(max_retries=MAX_RETRIES, default_retry_delay=RETRY_DELAY_SECONDS)
+def emit_event(event):
+    """
+    Emit an event with the configured event logger.
+
+    Args:
+        event (dict): The event to emit.
+
+    Returns:
+        None
+
+    """
+    from openassessment.workflow import models as workflow_models
+
+    try:
+        workflow_models.emit_event(event)
+    except Exception as ex:     # pylint:disable=W0703
+        # The event logger is configurable, so we don't know
+        # which errors it may raise.
+        logger.exception(u"Could not emit event {}, retrying".format(event.get("event_type")))
+        raise emit_event.retry(exc=ex)
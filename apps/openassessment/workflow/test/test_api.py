@@ -1,5 +1,6 @@
 from django.db import DatabaseError
 import ddt
+from dogapi import dog_stats_api
 from mock import patch
 from nose.tools import raises
 from openassessment.assessment.models import PeerWorkflow
@@ -94,6 +95,114 @@ class TestAssessmentWorkflowApi(CacheResetTest):
         peer_workflow = PeerWorkflow.objects.get(submission_uuid=submission["uuid"])
         self.assertIsNotNone(peer_workflow)
 
+    def test_update_shares_api_answers(self):
+        submission = sub_api.create_submission(ITEM_1, "Shoot Hot Rod")
+        workflow_api.create_workflow(submission["uuid"], ["training", "peer"])
+        requirements = {
+            "training": {"num_required": 2},
+            "peer": {"must_grade": 5, "must_be_graded_by": 3},
+        }
+
+        # Updating the workflow and describing its status ask each
+        # API whether the submitter has finished only once.
+        with patch('openassessment.assessment.api.student_training.submitter_is_finished') as mock_training:
+            mock_training.return_value = False
+            workflow = workflow_api.update_from_assessments(submission["uuid"], requirements)
+        self.assertEqual(mock_training.call_count, 1)
+        self.assertEqual(workflow["status_details"]["training"], {"complete": False})
+
+        # A later request asks the API again
+        with patch('openassessment.assessment.api.student_training.submitter_is_finished') as mock_training:
+            mock_training.return_value = True
+            workflow = workflow_api.get_workflow_for_submission(submission["uuid"], requirements)
+        self.assertEqual(mock_training.call_count, 1)
+        self.assertEqual(workflow["status"], "peer")
+        self.assertEqual(workflow["status_details"]["training"], {"complete": True})
+
+    @patch('openassessment.workflow.models.emit_event')
+    @patch('openassessment.assessment.api.peer.get_score')
+    @patch('openassessment.assessment.api.peer.assessment_is_finished')
+    @patch('openassessment.assessment.api.peer.submitter_is_finished')
+    def test_update_short_circuit(self, mock_submitter_finished, mock_assessment_finished, mock_get_score, mock_emit):
+        submission = sub_api.create_submission(ITEM_1, "Shoot Hot Rod")
+        workflow_api.create_workflow(submission["uuid"], ["peer"])
+        requirements = {"peer": {"must_grade": 5, "must_be_graded_by": 3}}
+
+        # The submitter finishes peer assessment, but hasn't been graded yet
+        mock_submitter_finished.return_value = True
+        mock_assessment_finished.return_value = False
+        workflow = workflow_api.update_from_assessments(submission["uuid"], requirements)
+        self.assertEqual(workflow["status"], "waiting")
+
+        # While waiting, we only check whether the submission has been graded
+        mock_submitter_finished.reset_mock()
+        mock_assessment_finished.reset_mock()
+        with patch.object(dog_stats_api, 'increment') as mock_increment:
+            workflow = workflow_api.update_from_assessments(submission["uuid"], requirements)
+        self.assertEqual(workflow["status"], "waiting")
+        self.assertEqual(workflow["status_details"], {"peer": {"complete": True}})
+        self.assertFalse(mock_submitter_finished.called)
+        self.assertEqual(mock_assessment_finished.call_count, 1)
+        mock_increment.assert_called_once_with(
+            'openassessment.workflow.update.short_circuit', tags=[u"status:waiting"]
+        )
+
+        # Once it has been graded, the workflow is updated as usual,
+        # without updating the step again: load the steps, save the step (2),
+        # set the score (4), save the workflow (2), and read the score back.
+        mock_assessment_finished.reset_mock()
+        mock_assessment_finished.return_value = True
+        mock_get_score.return_value = {"points_earned": 5, "points_possible": 10}
+        with self.assertNumQueries(10):
+            workflow = workflow_api.update_from_assessments(submission["uuid"], requirements)
+        self.assertEqual(workflow["status"], "done")
+        self.assertFalse(mock_submitter_finished.called)
+        self.assertEqual(mock_assessment_finished.call_count, 1)
+
+        # Once done, we don't ask the peer API anything, and the score
+        # is cached, so we only load the workflow.
+        mock_submitter_finished.reset_mock()
+        mock_assessment_finished.reset_mock()
+        with patch.object(dog_stats_api, 'increment') as mock_increment:
+            with self.assertNumQueries(1):
+                workflow = workflow_api.update_from_assessments(submission["uuid"], requirements)
+        self.assertEqual(workflow["score"]["points_earned"], 5)
+        self.assertEqual(workflow["status_details"], {"peer": {"complete": True}})
+        self.assertFalse(mock_submitter_finished.called)
+        self.assertFalse(mock_assessment_finished.called)
+        mock_increment.assert_called_once_with(
+            'openassessment.workflow.update.short_circuit', tags=[u"status:done"]
+        )
+
+    @patch('openassessment.assessment.api.self.assessment_is_finished')
+    @patch('openassessment.assessment.api.self.submitter_is_finished')
+    @patch('openassessment.assessment.api.peer.assessment_is_finished')
+    @patch('openassessment.assessment.api.peer.submitter_is_finished')
+    def test_update_pending_steps_once(
+        self, mock_peer_submitter, mock_peer_assessment, mock_self_submitter, mock_self_assessment
+    ):
+        submission = sub_api.create_submission(ITEM_1, "Shoot Hot Rod")
+        workflow_api.create_workflow(submission["uuid"], ["peer", "self"])
+        requirements = {"peer": {"must_grade": 5, "must_be_graded_by": 3}}
+
+        # The submitter finishes both steps, but neither has been assessed
+        mock_peer_submitter.return_value = True
+        mock_self_submitter.return_value = True
+        mock_peer_assessment.return_value = False
+        mock_self_assessment.return_value = False
+        workflow = workflow_api.update_from_assessments(submission["uuid"], requirements)
+        self.assertEqual(workflow["status"], "waiting")
+
+        # The peer step finishes, so the workflow is fully updated,
+        # but the self step we just asked about isn't asked again
+        mock_peer_assessment.reset_mock()
+        mock_self_assessment.reset_mock()
+        mock_peer_assessment.return_value = True
+        workflow = workflow_api.update_from_assessments(submission["uuid"], requirements)
+        self.assertEqual(workflow["status"], "waiting")
+        self.assertEqual(mock_peer_assessment.call_count, 1)
+        self.assertEqual(mock_self_assessment.call_count, 1)
+
     @ddt.file_data('data/assessments.json')
     def test_need_valid_submission_uuid(self, data):
         # submission doesn't exist
@@ -195,6 +304,30 @@ class TestAssessmentWorkflowApi(CacheResetTest):
         updated_counts = workflow_api.get_status_counts("test/1/1", "peer-problem", ["peer", "self"])
         self.assertEqual(counts, updated_counts)
 
+    def test_get_status_counts_single_query(self):
+        self._create_workflow_with_status("user 1", "test/1/1", "peer-problem", "peer")
+        self._create_workflow_with_status("user 2", "test/1/1", "peer-problem", "done")
+
+        with self.assertNumQueries(1):
+            counts = workflow_api.get_status_counts("test/1/1", "peer-problem", ["peer", "self"])
+        self.assertEqual(counts, [
+            {"status": "peer", "count": 1},
+            {"status": "self", "count": 0},
+            {"status": "waiting", "count": 0},
+            {"status": "done", "count": 1},
+        ])
+
+        # The counts are cached
+        with self.assertNumQueries(0):
+            cached_counts = workflow_api.get_status_counts("test/1/1", "peer-problem", ["peer", "self"])
+        self.assertEqual(cached_counts, counts)
+
+    def test_get_status_counts_read_replica(self):
+        # Staff statistics can tolerate replication lag
+        with patch.object(workflow_api, 'use_read_replica', wraps=workflow_api.use_read_replica) as mock_hint:
+            workflow_api.get_status_counts("test/1/1", "peer-problem", ["peer", "self"])
+        mock_hint.assert_called_once_with(True)
+
     def _create_workflow_with_status(self, student_id, course_id, item_id, status, answer="answer"):
         """
         Create a submission and workflow with a given status.
@@ -0,0 +1,229 @@
+"""
+Tests for updating workflows and publishing their scores asynchronously.
+"""
+import socket
+
+from django.test.utils import override_settings
+from django.utils.timezone import now
+from mock import patch
+
+from openassessment.assessment.api import self as self_api
+from openassessment.test_utils import CacheResetTest
+from openassessment.workflow import tasks
+from openassessment.workflow.models import AssessmentWorkflow
+import openassessment.workflow.api as workflow_api
+from submissions import api as sub_api
+from submissions.models import Score
+
+STUDENT_ITEM = {
+    "student_id": "Optimus Prime 001",
+    "item_id": "Matrix of Leadership",
+    "course_id": "Advanced Auto Mechanics 200",
+    "item_type": "openassessment",
+}
+
+SCORE = {"points_earned": 7, "points_possible": 10}
+
+RUBRIC = {
+    "criteria": [
+        {
+            "name": "clarity",
+            "prompt": "How clear was it?",
+            "options": [
+                {"name": "somewhat clear", "points": 1, "explanation": ""},
+                {"name": "clear", "points": 3, "explanation": ""},
+            ]
+        },
+    ]
+}
+
+OPTIONS_SELECTED = {"clarity": "clear"}
+
+
+class TestPublishScore(CacheResetTest):
+
+    def setUp(self):
+        super(TestPublishScore, self).setUp()
+        self.submission = sub_api.create_submission(STUDENT_ITEM, "Shoot Hot Rod")
+        workflow_api.create_workflow(self.submission["uuid"], ["self"])
+        self.workflow = AssessmentWorkflow.objects.get(submission_uuid=self.submission["uuid"])
+
+    def _latest_score(self):
+        """
+        Return the latest (points_earned, points_possible) for the submission, or None.
+        """
+        score = sub_api.get_latest_score_for_submission(self.submission["uuid"])
+        return (score["points_earned"], score["points_possible"]) if score else None
+
+    @patch('openassessment.workflow.models.emit_event')
+    def test_set_score_sync(self, mock_emit):
+        self.workflow.set_score(SCORE)
+        self.assertEqual(self._latest_score(), (7, 10))
+        self.assertEqual(mock_emit.call_count, 1)
+
+    @override_settings(EDX_ORA2={"ASYNC_SCORE_PUBLISHING": True})
+    @patch('openassessment.workflow.models.emit_event')
+    def test_set_score_async_eager(self, mock_emit):
+        # The tests run Celery tasks eagerly
+        self.workflow.set_score(SCORE)
+        self.assertEqual(self._latest_score(), (7, 10))
+        event = mock_emit.call_args[0][0]
+        self.assertEqual(event["event_type"], "openassessment.workflow.score")
+        self.assertEqual(event["event"]["points_earned"], 7)
+
+    @override_settings(EDX_ORA2={"ASYNC_SCORE_PUBLISHING": True})
+    @patch.object(tasks.emit_event, 'delay')
+    @patch.object(tasks.publish_score, 'delay')
+    def test_set_score_async_queued(self, mock_publish, mock_emit):
+        self.workflow.set_score(SCORE)
+
+        # Nothing is published until the tasks run
+        self.assertIs(self._latest_score(), None)
+        self.assertEqual(mock_publish.call_args[0], (self.submission["uuid"], 7, 10))
+        scored_at = mock_publish.call_args[1]["scored_at"]
+        self.assertEqual(mock_emit.call_args[0][0]["event"]["submission_uuid"], self.submission["uuid"])
+
+        tasks.publish_score(self.submission["uuid"], 7, 10, scored_at=scored_at)
+        self.assertEqual(self._latest_score(), (7, 10))
+
+    def test_publish_score_idempotent(self):
+        scored_at = now()
+        for __ in range(3):
+            tasks.publish_score.apply(args=(self.submission["uuid"], 7, 10), kwargs={"scored_at": scored_at})
+        self.assertEqual(Score.objects.filter(submission__uuid=self.submission["uuid"]).count(), 1)
+
+        # A later score is still published, even if the points are the same
+        tasks.publish_score.apply(args=(self.submission["uuid"], 7, 10), kwargs={"scored_at": now()})
+        self.assertEqual(Score.objects.filter(submission__uuid=self.submission["uuid"]).count(), 2)
+        self.assertEqual(self._latest_score(), (7, 10))
+
+    def test_publish_score_retry(self):
+        with patch.object(sub_api, 'set_score') as mock_set_score:
+            mock_set_score.side_effect = [sub_api.SubmissionInternalError("Kaboom!"), None]
+            result = tasks.publish_score.apply(args=(self.submission["uuid"], 7, 10))
+
+        # When run eagerly, the retry runs immediately, and the first
+        # attempt is left in the "retry" state.
+        self.assertFalse(result.failed())
+        self.assertEqual(mock_set_score.call_count, 2)
+
+    def test_publish_score_gives_up(self):
+        with patch.object(sub_api, 'set_score') as mock_set_score:
+            mock_set_score.side_effect = sub_api.SubmissionInternalError("Kaboom!")
+            with patch.object(tasks, 'dog_stats_api') as mock_stats:
+                result = tasks.publish_score.apply(args=(self.submission["uuid"], 7, 10))
+        self.assertTrue(result.failed())
+        self.assertEqual(mock_set_score.call_count, tasks.MAX_RETRIES + 1)
+
+        # Only the final failure is reported
+        mock_stats.increment.assert_called_once_with('openassessment.workflow.publish_score.failed')
+
+    @patch('openassessment.workflow.models.emit_event')
+    def test_update_saves_status_before_publishing(self, mock_emit):
+        self_api.create_assessment(
+            self.submission["uuid"], STUDENT_ITEM["student_id"], OPTIONS_SELECTED, RUBRIC
+        )
+
+        def _check_saved(*args, **kwargs):     # pylint:disable=W0613
+            workflow = AssessmentWorkflow.objects.get(submission_uuid=self.submission["uuid"])
+            self.assertEqual(workflow.status, "done")
+
+        with patch.object(tasks.publish_score, 'delay') as mock_publish:
+            mock_publish.side_effect = _check_saved
+            with override_settings(EDX_ORA2={"ASYNC_SCORE_PUBLISHING": True}):
+                workflow_api.update_from_assessments(self.submission["uuid"], {})
+        self.assertEqual(mock_publish.call_count, 1)
+
+    @patch('openassessment.workflow.models.emit_event')
+    def test_publish_missing_score(self, mock_emit):
+        self_api.create_assessment(
+            self.submission["uuid"], STUDENT_ITEM["student_id"], OPTIONS_SELECTED, RUBRIC
+        )
+
+        # The workflow finishes, but its score is never published
+        with patch.object(tasks.publish_score, 'delay'):
+            with override_settings(EDX_ORA2={"ASYNC_SCORE_PUBLISHING": True}):
+                workflow_api.update_from_assessments(self.submission["uuid"], {})
+        workflow = AssessmentWorkflow.objects.get(submission_uuid=self.submission["uuid"])
+        self.assertEqual(workflow.status, "done")
+        self.assertIs(self._latest_score(), None)
+
+        self.assertTrue(workflow.publish_missing_score({}))
+        self.assertEqual(self._latest_score(), (3, 3))
+
+        # Once the score is published, there's nothing to do
+        self.assertFalse(workflow.publish_missing_score({}))
+        self.assertEqual(Score.objects.filter(submission__uuid=self.submission["uuid"]).count(), 1)
+
+    @patch('openassessment.workflow.models.emit_event')
+    def test_emit_event_retry(self, mock_emit):
+        mock_emit.side_effect = [IOError("Kaboom!"), None]
+        result = tasks.emit_event.apply(args=({"event_type": "test"},))
+        self.assertFalse(result.failed())
+        self.assertEqual(mock_emit.call_count, 2)
+
+
+@patch('openassessment.workflow.models.emit_event')
+class TestUpdateWorkflow(CacheResetTest):
+
+    def setUp(self):
+        super(TestUpdateWorkflow, self).setUp()
+        self.submission = sub_api.create_submission(STUDENT_ITEM, "Shoot Hot Rod")
+        workflow_api.create_workflow(self.submission["uuid"], ["self"])
+
+        # Creating the assessment does not update the workflow
+        self_api.create_assessment(
+            self.submission["uuid"], STUDENT_ITEM["student_id"], OPTIONS_SELECTED, RUBRIC
+        )
+
+    def _stored_workflow(self):
+        """
+        Return the workflow as it was last updated.
+        """
+        return workflow_api.get_workflow_for_submission(self.submission["uuid"], {}, update=False)
+
+    def test_stored_workflow_not_updated(self, mock_emit):
+        with patch.object(AssessmentWorkflow, 'update_from_assessments') as mock_update:
+            workflow = self._stored_workflow()
+        self.assertFalse(mock_update.called)
+        self.assertEqual(workflow["status"], "self")
+        self.assertEqual(workflow["status_details"], {"self": {"complete": False}})
+
+    def test_update_workflow(self, mock_emit):
+        tasks.update_workflow(self.submission["uuid"], {})
+        workflow = self._stored_workflow()
+        self.assertEqual(workflow["status"], "done")
+        self.assertEqual(workflow["status_details"], {"self": {"complete": True}})
+        self.assertEqual(workflow["score"]["points_earned"], 3)
+
+    def test_update_workflow_not_found(self, mock_emit):
+        result = tasks.update_workflow.apply(args=("no such submission", {}))
+        self.assertTrue(result.successful())
+
+    def test_update_workflow_retry(self, mock_emit):
+        with patch.object(workflow_api, 'update_from_assessments') as mock_update:
+            mock_update.side_effect = [workflow_api.AssessmentWorkflowInternalError("Kaboom!"), None]
+            result = tasks.update_workflow.apply(args=(self.submission["uuid"], {}))
+        self.assertFalse(result.failed())
+        self.assertEqual(mock_update.call_count, 2)
+
+    def test_schedule_update_sync(self, mock_emit):
+        with patch.object(tasks.update_workflow, 'delay') as mock_delay:
+            workflow_api.schedule_update_from_assessments(self.submission["uuid"], {})
+        self.assertFalse(mock_delay.called)
+        self.assertEqual(self._stored_workflow()["status"], "done")
+
+    @override_settings(EDX_ORA2={"ASYNC_WORKFLOW_UPDATES": True})
+    def test_schedule_update_async(self, mock_emit):
+        with patch.object(tasks.update_workflow, 'delay') as mock_delay:
+            workflow_api.schedule_update_from_assessments(self.submission["uuid"], {})
+        mock_delay.assert_called_once_with(self.submission["uuid"], {})
+        self.assertEqual(self._stored_workflow()["status"], "self")
+
+    @override_settings(EDX_ORA2={"ASYNC_WORKFLOW_UPDATES": True})
+    def test_schedule_update_broker_down(self, mock_emit):
+        # If the task can't be queued, the workflow is updated right away
+        with patch.object(tasks.update_workflow, 'delay') as mock_delay:
+            mock_delay.side_effect = socket.error("Connection refused")
+            workflow_api.schedule_update_from_assessments(self.submission["uuid"], {})
+        self.assertEqual(self._stored_workflow()["status"], "done")
@@ -48,9 +48,11 @@ class GradeMixin(object):
 
         # Render the grading section based on the status of the workflow
         try:
-            if status == "done":
+            if status == "done" and workflow.get('score') is not None:
                 path, context = self.render_grade_complete(workflow)
-            elif status == "waiting":
+            elif status in ("done", "waiting"):
+                # If scores are published asynchronously, a finished
+                # workflow may not have its score yet.
                 path = 'openassessmentblock/grade/oa_grade_waiting.html'
             elif status is None:
                 path = 'openassessmentblock/grade/oa_grade_not_started.html'
@@ -77,7 +79,9 @@ class GradeMixin(object):
 
         if "peer-assessment" in assessment_steps:
             feedback = peer_api.get_assessment_feedback(submission_uuid)
-            peer_assessments = peer_api.get_assessments(submission_uuid)
+            # The grade must agree with the score the workflow just computed
+            # from the primary database, so don't read from the replica.
+            peer_assessments = peer_api.get_assessments(submission_uuid, read_replica=False)
             has_submitted_feedback = feedback is not None
         else:
             feedback = None
@@ -111,11 +115,24 @@ class GradeMixin(object):
         # Update the scores we will display to the user
         # Note that we are updating a *copy* of the rubric criteria stored in
         # the XBlock field
-        max_scores = peer_api.get_rubric_max_scores(submission_uuid)
+        # The per-criterion scores are stored when the score is finalized.
+        # Scores finalized before the summaries existed won't have one,
+        # so fall back to computing them from the assessments.
+        score_summary = None
         if "peer-assessment" in assessment_steps:
-            median_scores = peer_api.get_assessment_median_scores(submission_uuid)
+            score_summary = peer_api.get_score_summary(submission_uuid)
         elif "self-assessment" in assessment_steps:
-            median_scores = self_api.get_assessment_scores_by_criteria(submission_uuid)
+            score_summary = self_api.get_score_summary(submission_uuid)
+
+        if score_summary is not None:
+            max_scores = score_summary['max_scores']
+            median_scores = score_summary['median_scores']
+        else:
+            max_scores = peer_api.get_rubric_max_scores(submission_uuid)
+            if "peer-assessment" in assessment_steps:
+                median_scores = peer_api.get_assessment_median_scores(submission_uuid)
+            elif "self-assessment" in assessment_steps:
+                median_scores = self_api.get_assessment_scores_by_criteria(submission_uuid)
 
         if median_scores is not None and max_scores is not None:
             for criterion in context["rubric_criteria"]:
@@ -213,12 +213,14 @@ class OpenAssessmentBlock(
         """
         # On page load, update the workflow status.
         # We need to do this here because peers may have graded us, in which
-        # case we may have a score available.
-        try:
-            self.update_workflow_status()
-        except workflow_api.AssessmentWorkflowError:
-            # Log the exception, but continue loading the page
-            logger.exception('An error occurred while updating the workflow on page load.')
+        # case we may have a score available.  If workflows are updated
+        # asynchronously, the peers' assessments have already updated it.
+        if not workflow_api.async_workflow_updates_enabled():
+            try:
+                self.update_workflow_status()
+            except workflow_api.AssessmentWorkflowError:
+                # Log the exception, but continue loading the page
+                logger.exception('An error occurred while updating the workflow on page load.')
 
         ui_models = self._create_ui_models()
         # All data we intend to pass to the front end.
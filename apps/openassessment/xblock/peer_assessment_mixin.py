@@ -1,4 +1,5 @@
 import logging
+from datetime import timedelta
 
 from django.utils.translation import ugettext as _
 from webob import Response
@@ -86,9 +87,11 @@ class PeerAssessmentMixin(object):
 
             # Update both the workflow that the submission we're assessing
             # belongs to, as well as our own (e.g. have we evaluated enough?)
+            # The other student won't see the result until they reload the page,
+            # so their workflow may be updated in the background.
             try:
                 if assessment:
-                    self.update_workflow_status(submission_uuid=assessment['submission_uuid'])
+                    self.schedule_workflow_update(assessment['submission_uuid'])
                 self.update_workflow_status()
             except workflow_api.AssessmentWorkflowError:
                 msg = _('Could not update workflow status.')
@@ -225,10 +228,18 @@ class PeerAssessmentMixin(object):
 
         """
         peer_submission = False
+
+        # Authors can shorten (or lengthen) how long a student
+        # holds a submission; otherwise the default lease applies.
+        time_limit = None
+        if assessment.get("lease_minutes") is not None:
+            time_limit = timedelta(minutes=assessment["lease_minutes"])
+
         try:
             peer_submission = peer_api.get_submission_to_assess(
                 self.submission_uuid,
-                assessment["must_be_graded_by"]
+                assessment["must_be_graded_by"],
+                time_limit=time_limit
             )
             self.runtime.publish(
                 self,
@@ -6,6 +6,7 @@ from django.utils.translation import ugettext as _
 from webob import Response
 from xblock.core import XBlock
 from openassessment.assessment.api import student_training
+from openassessment.workflow import api as workflow_api
 from openassessment.xblock.data_conversion import convert_training_examples_list_to_dict
 from .resolve_dates import DISTANT_FUTURE
 
@@ -169,6 +170,13 @@ class StudentTrainingMixin(object):
                 'msg': _(u"An unexpected error occurred.")
             }
         else:
+            # Advance the assessment workflow if the student has finished training,
+            # since it may no longer be updated when the page reloads.
+            try:
+                self.update_workflow_status()
+            except workflow_api.AssessmentWorkflowError:
+                logger.exception(u"Could not update workflow status after student training")
+
             return {
                 'success': True,
                 'msg': u'',
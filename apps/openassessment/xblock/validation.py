@@ -121,6 +121,10 @@ def validate_assessments(assessments, current_assessments, is_released):
             if must_grade < must_be_graded_by:
                 return (False, _('The "must_grade" value must be greater than or equal to the "must_be_graded_by" value.'))
 
+            lease_minutes = assessment_dict.get('lease_minutes')
+            if lease_minutes is not None and lease_minutes < 1:
+                return (False, _('The "lease_minutes" value must be a positive integer.'))
+
     if is_released:
         if len(assessments) != len(current_assessments):
             return (False, _("The number of assessments cannot be changed after the problem has been released."))
@@ -100,10 +100,30 @@ class WorkflowMixin(object):
             requirements = self.workflow_requirements()
             workflow_api.update_from_assessments(submission_uuid, requirements)
 
+    def schedule_workflow_update(self, submission_uuid):
+        """
+        Update the workflow of a submission the current student has assessed.
+        If asynchronous workflow updates are enabled, the update happens
+        in the background; otherwise, it happens right away.
+
+        Args:
+            submission_uuid (str): The submission associated with the workflow to update.
+
+        Returns:
+            None
+
+        Raises:
+            AssessmentWorkflowError
+        """
+        requirements = self.workflow_requirements()
+        workflow_api.schedule_update_from_assessments(submission_uuid, requirements)
+
     def get_workflow_info(self):
         """
         Retrieve a description of the student's progress in a workflow.
-        Note that this *may* update the workflow status if it's changed.
+        Note that this *may* update the workflow status if it's changed,
+        unless workflows are updated asynchronously, in which case the
+        status is the one recorded by the last update.
 
         Returns:
             dict
@@ -114,7 +134,8 @@ class WorkflowMixin(object):
         if not self.submission_uuid:
             return {}
         return workflow_api.get_workflow_for_submission(
-            self.submission_uuid, self.workflow_requirements()
+            self.submission_uuid, self.workflow_requirements(),
+            update=not workflow_api.async_workflow_updates_enabled()
         )
 
     def get_workflow_status_counts(self):
@@ -422,6 +422,13 @@ def _parse_assessments_xml(assessments_root):
             except ValueError:
                 raise UpdateFromXmlError(_('The "must_be_graded_by" value must be a positive integer.'))
 
+        # Assessment lease_minutes
+        if 'lease_minutes' in assessment.attrib:
+            try:
+                assessment_dict['lease_minutes'] = int(assessment.get('lease_minutes'))
+            except ValueError:
+                raise UpdateFromXmlError(_('The "lease_minutes" value must be a positive integer.'))
+
         # Training examples
         examples = assessment.findall('example')
 
@@ -507,6 +514,9 @@ def serialize_content_to_xml(oa_block, root):
         if 'must_be_graded_by' in assessment_dict:
             assessment.set('must_be_graded_by', unicode(assessment_dict['must_be_graded_by']))
 
+        if 'lease_minutes' in assessment_dict:
+            assessment.set('lease_minutes', unicode(assessment_dict['lease_minutes']))
+
         if assessment_dict.get('start') is not None:
             assessment.set('start', unicode(assessment_dict['start']))
 
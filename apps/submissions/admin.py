@@ -1,8 +1,76 @@
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR
 from django.core.urlresolvers import reverse
 from django.utils import html
 
-from submissions.models import Score, ScoreSummary, StudentItem, Submission
+from submissions.models import Score, ScoreSummary, StudentItem, Submission, decompress_raw_answer
+from submissions.pagination import encode_cursor, page_after
+
+CURSOR_VAR = 'cursor'
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Change list that pages with a cursor rather than a page number.
+
+    The default paginator counts every matching row and then skips
+    `offset` rows to reach a page, which gets slow on large tables.  When
+    the list is in its default (newest first) order, we instead read the
+    page after the cursor in the query string, and link to the next page.
+    Sorting by a column falls back to the default paginator.
+    """
+
+    def get_query_set(self, request):
+        # Keep the cursor out of the lookup parameters,
+        # which the change list otherwise treats as filters.
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.params.pop(CURSOR_VAR, None)
+        return super(KeysetChangeList, self).get_query_set(request)
+
+    def get_results(self, request):
+        self.keyset_paginated = ORDER_VAR not in self.params and not self.show_all
+        self.next_cursor = None
+        if not self.keyset_paginated:
+            return super(KeysetChangeList, self).get_results(request)
+
+        timestamp_field = self.model_admin.keyset_field
+        try:
+            # Read one extra row to find out whether there is another page.
+            result_list = list(
+                page_after(self.query_set, timestamp_field, cursor=self.cursor)[:self.list_per_page + 1]
+            )
+        except ValueError:
+            raise IncorrectLookupParameters
+
+        if len(result_list) > self.list_per_page:
+            result_list = result_list[:self.list_per_page]
+            last = result_list[-1]
+            self.next_cursor = encode_cursor(getattr(last, timestamp_field), last.pk)
+
+        self.result_list = result_list
+        self.result_count = self.full_result_count = len(result_list)
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = None
+
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    def first_page_url(self):
+        return self.get_query_string()
+
+
+class KeysetPaginationAdminMixin(object):
+    """
+    Mix this class into a model admin to page its change list with a cursor.
+    Set `keyset_field` to the timestamp field to order the list by.
+    """
+    keyset_field = None
+    change_list_template = 'admin/submissions/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
 
 
 class StudentItemAdminMixin(object):
@@ -44,7 +112,7 @@ class StudentItemAdmin(admin.ModelAdmin):
     readonly_fields = ('course_id', 'item_type', 'item_id', 'student_id')
 
 
-class SubmissionAdmin(admin.ModelAdmin, StudentItemAdminMixin):
+class SubmissionAdmin(KeysetPaginationAdminMixin, admin.ModelAdmin, StudentItemAdminMixin):
     list_display = (
         'id', 'uuid',
         'course_id', 'item_id', 'student_id', 'student_item_id',
@@ -56,13 +124,20 @@ class SubmissionAdmin(admin.ModelAdmin, StudentItemAdminMixin):
         'student_item_id',
         'course_id', 'item_id', 'student_id',
         'attempt_number', 'submitted_at', 'created_at',
-        'raw_answer', 'all_scores',
+        'answer', 'all_scores',
     )
     search_fields = ('id', 'uuid') + StudentItemAdminMixin.search_fields
+    keyset_field = 'submitted_at'
 
     # We're creating our own explicit link and displaying parts of the
     # student_item in separate fields -- no need to display this as well.
-    exclude = ('student_item',)
+    exclude = ('student_item', 'raw_answer')
+
+    def answer(self, submission):
+        try:
+            return decompress_raw_answer(submission.raw_answer)
+        except ValueError:
+            return submission.raw_answer
 
     def all_scores(self, submission):
         return "\n".join(
@@ -73,7 +148,7 @@ class SubmissionAdmin(admin.ModelAdmin, StudentItemAdminMixin):
         )
 
 
-class ScoreAdmin(admin.ModelAdmin, StudentItemAdminMixin):
+class ScoreAdmin(KeysetPaginationAdminMixin, admin.ModelAdmin, StudentItemAdminMixin):
     list_display = (
         'id',
         'course_id', 'item_id', 'student_id', 'student_item_id',
@@ -89,6 +164,7 @@ class ScoreAdmin(admin.ModelAdmin, StudentItemAdminMixin):
         'reset',
     )
     search_fields = ('id', ) + StudentItemAdminMixin.search_fields
+    keyset_field = 'created_at'
 
     def points(self, score):
         return u"{}/{}".format(score.points_earned, score.points_possible)
@@ -3,20 +3,33 @@ Public interface for the submissions app.
 
 """
 import copy
+import cPickle as pickle
+import hashlib
 import logging
 import json
+import zlib
+from collections import defaultdict
 
 from django.core.cache import cache
-from django.db import IntegrityError, DatabaseError
+from django.db import DatabaseError, transaction
+from django.utils.timezone import now
 from dogapi import dog_stats_api
 
 from submissions.serializers import (
     SubmissionSerializer, StudentItemSerializer, ScoreSerializer, JsonFieldError
 )
-from submissions.models import Submission, StudentItem, Score, ScoreSummary
+from submissions.models import (
+    Submission, StudentItem, Score, ScoreSummary,
+    answer_compression_enabled, COMPRESS_ANSWER_MIN_SIZE
+)
+from submissions.pagination import encode_cursor, page_after
+from submissions.routers import use_read_replica
 
 logger = logging.getLogger("submissions.api")
 
+# Number of scores read by each query in `iter_scores_for_course`
+SCORE_EXPORT_CHUNK_SIZE = 1000
+
 
 class SubmissionError(Exception):
     """An error that occurs during submission actions.
@@ -188,7 +201,7 @@ def get_submission(submission_uuid):
 
     cache_key = "submissions.submission.{}".format(submission_uuid)
     try:
-        cached_submission_data = cache.get(cache_key)
+        cached_submission_data = _unpack_cached_submission(cache.get(cache_key))
     except Exception as ex:
         # The cache backend could raise an exception
         # (for example, memcache keys that contain spaces)
@@ -202,7 +215,7 @@ def get_submission(submission_uuid):
     try:
         submission = Submission.objects.get(uuid=submission_uuid)
         submission_data = SubmissionSerializer(submission).data
-        cache.set(cache_key, submission_data)
+        cache.set(cache_key, _pack_cached_submission(submission_data))
     except Submission.DoesNotExist:
         logger.error("Submission {} not found.".format(submission_uuid))
         raise SubmissionNotFoundError(
@@ -263,6 +276,184 @@ def get_submission_and_student(uuid):
     return submission
 
 
+def get_submissions_by_uuids(submission_uuids):
+    """Retrieve several submissions by uuid at once.
+
+    Submissions are read from the cache where possible.  The rest are
+    loaded from the database in a single query and added to the cache.
+
+    Args:
+        submission_uuids (list of str): Identifiers for the submissions.
+
+    Returns:
+        dict: Submission uuids mapped to serialized submissions (in the same
+        format as `get_submission`).  Uuids that don't match a submission
+        are left out.
+
+    Raises:
+        SubmissionRequestError: Raised if any of the uuids is not a string.
+        SubmissionInternalError: Raised for unknown errors.
+
+    Examples:
+        >>> get_submissions_by_uuids(["20b78e0f32df805d21064fc912f40e9ae5ab260d"])
+        {
+            '20b78e0f32df805d21064fc912f40e9ae5ab260d': {
+                'student_item': 2,
+                'attempt_number': 1,
+                'submitted_at': datetime.datetime(2014, 1, 29, 23, 14, 52, 649284, tzinfo=<UTC>),
+                'created_at': datetime.datetime(2014, 1, 29, 17, 14, 52, 668850, tzinfo=<UTC>),
+                'answer': u'The answer is 42.'
+            }
+        }
+
+    """
+    submissions, __ = _get_submissions_by_uuids(submission_uuids)
+    return submissions
+
+
+def get_submission_and_student_many(submission_uuids):
+    """
+    Retrieve several submissions by uuid at once, including their student items.
+
+    Args:
+        submission_uuids (list of str): Identifiers for the submissions.
+
+    Returns:
+        dict: Submission uuids mapped to serialized submissions, each containing
+        a serialized StudentItem model (in the same format as
+        `get_submission_and_student`).  Uuids that don't match a submission
+        are left out.
+
+    Raises:
+        SubmissionRequestError: Raised if any of the uuids is not a string.
+        SubmissionInternalError: Raised for unknown errors.
+
+    """
+    submissions, student_items = _get_submissions_by_uuids(submission_uuids)
+
+    # Student items for submissions that came from the cache
+    missing_ids = set(
+        submission['student_item'] for submission in submissions.itervalues()
+    ) - set(student_items.keys())
+    if missing_ids:
+        cache_keys = {
+            "submissions.student_item.{}".format(student_item_id): student_item_id
+            for student_item_id in missing_ids
+        }
+        try:
+            cached_student_items = cache.get_many(cache_keys.keys())
+        except Exception:
+            # The cache backend could raise an exception
+            # (for example, memcache keys that contain spaces)
+            logger.exception("Error occurred while retrieving student items from the cache")
+            cached_student_items = dict()
+
+        for cache_key, student_item_data in cached_student_items.iteritems():
+            student_items[cache_keys[cache_key]] = student_item_data
+        missing_ids -= set(student_items.keys())
+
+    if missing_ids:
+        try:
+            fetched = {
+                student_item.id: StudentItemSerializer(student_item).data
+                for student_item in StudentItem.objects.filter(id__in=missing_ids)
+            }
+        except Exception as ex:
+            err_msg = "Could not get submissions due to error: {}".format(ex)
+            logger.exception(err_msg)
+            raise SubmissionInternalError(err_msg)
+
+        cache.set_many({
+            "submissions.student_item.{}".format(student_item_id): student_item_data
+            for student_item_id, student_item_data in fetched.iteritems()
+        })
+        student_items.update(fetched)
+
+    results = dict()
+    for uuid, submission in submissions.iteritems():
+        submission = dict(submission)
+        submission['student_item'] = student_items[submission['student_item']]
+        results[uuid] = submission
+    return results
+
+
+def _get_submissions_by_uuids(submission_uuids):
+    """
+    Retrieve submissions from the cache, then load any misses from the database.
+
+    Student items are loaded along with the submissions that come from the
+    database, so they are returned (and cached) too.
+
+    Args:
+        submission_uuids (list of str): Identifiers for the submissions.
+
+    Returns:
+        tuple of (submissions, student_items), where `submissions` maps uuids
+        to serialized submissions and `student_items` maps student item IDs
+        to serialized student items.
+
+    Raises:
+        SubmissionRequestError: Raised if any of the uuids is not a string.
+        SubmissionInternalError: Raised for unknown errors.
+
+    """
+    for submission_uuid in submission_uuids:
+        if not isinstance(submission_uuid, basestring):
+            raise SubmissionRequestError(
+                "submission_uuid ({!r}) must be a string type".format(submission_uuid)
+            )
+
+    cache_keys = {
+        "submissions.submission.{}".format(submission_uuid): submission_uuid
+        for submission_uuid in submission_uuids
+    }
+    try:
+        cached_submissions = cache.get_many(cache_keys.keys())
+    except Exception:
+        # The cache backend could raise an exception
+        # (for example, memcache keys that contain spaces)
+        logger.exception("Error occurred while retrieving submissions from the cache")
+        cached_submissions = dict()
+
+    submissions = dict()
+    for cache_key, cached_submission in cached_submissions.iteritems():
+        submission_data = _unpack_cached_submission(cached_submission)
+        if submission_data:
+            submissions[cache_keys[cache_key]] = submission_data
+    student_items = dict()
+    num_cached = len(submissions)
+
+    missing_uuids = set(cache_keys.values()) - set(submissions.keys())
+    if missing_uuids:
+        try:
+            submission_models = Submission.objects.filter(
+                uuid__in=missing_uuids
+            ).select_related('student_item')
+            for submission in submission_models:
+                submissions[submission.uuid] = SubmissionSerializer(submission).data
+                student_items[submission.student_item.id] = StudentItemSerializer(submission.student_item).data
+        except Exception as exc:
+            # Something very unexpected has just happened (like DB misconfig)
+            err_msg = "Could not get submissions due to error: {}".format(exc)
+            logger.exception(err_msg)
+            raise SubmissionInternalError(err_msg)
+
+        cache_updates = dict()
+        for submission_uuid in missing_uuids:
+            if submission_uuid in submissions:
+                cache_updates["submissions.submission.{}".format(submission_uuid)] = _pack_cached_submission(
+                    submissions[submission_uuid]
+                )
+            else:
+                logger.error("Submission {} not found.".format(submission_uuid))
+        for student_item_id, student_item_data in student_items.iteritems():
+            cache_updates["submissions.student_item.{}".format(student_item_id)] = student_item_data
+        cache.set_many(cache_updates)
+
+    logger.info("Get {} submissions ({} cached)".format(len(submissions), num_cached))
+    return submissions, student_items
+
+
 def get_submissions(student_item_dict, limit=None):
     """Retrieves the submissions for the specified student item,
     ordered by most recent submitted date.
@@ -311,8 +502,11 @@ def get_submissions(student_item_dict, limit=None):
     """
     student_item_model = _get_or_create_student_item(student_item_dict)
     try:
-        submission_models = Submission.objects.filter(
-            student_item=student_item_model)
+        submission_uuids = Submission.objects.filter(
+            student_item=student_item_model).values_list('uuid', flat=True)
+        if limit:
+            submission_uuids = submission_uuids[:limit]
+        submission_uuids = list(submission_uuids)
     except DatabaseError:
         error_message = (
             u"Error getting submission request for student item {}"
@@ -321,10 +515,89 @@ def get_submissions(student_item_dict, limit=None):
         logger.exception(error_message)
         raise SubmissionNotFoundError(error_message)
 
-    if limit:
-        submission_models = submission_models[:limit]
+    # Submissions are immutable, so we serve them from the cache where
+    # possible, rather than decoding the same answers on every request.
+    submissions, __ = _get_submissions_by_uuids(submission_uuids)
+    return [
+        submissions[submission_uuid]
+        for submission_uuid in submission_uuids
+        if submission_uuid in submissions
+    ]
+
 
-    return SubmissionSerializer(submission_models, many=True).data
+def get_submissions_page(student_item_dict, limit, cursor=None):
+    """Retrieves one page of the submissions for the specified student item,
+    ordered by most recent submitted date.
+
+    Pages are read with keyset pagination: rather than skipping the
+    submissions on earlier pages, each page starts just after the last
+    submission of the previous page, so later pages are as cheap to read
+    as the first.
+
+    Args:
+        student_item_dict (dict): The location of the problem this submission is
+            associated with, as defined by a course, student, and item.
+        limit (int): The maximum number of submissions on the page.
+
+    Kwargs:
+        cursor (str): The `next_cursor` returned with the previous page,
+            or None for the first page.
+
+    Returns:
+        tuple of (submissions, next_cursor): The submissions on the page
+            (serialized as by `get_submissions`), and an opaque cursor for
+            the next page, or None if this is the last page.
+
+    Raises:
+        SubmissionRequestError: The limit or cursor is invalid.
+        SubmissionInternalError: An error occurred while retrieving the submissions.
+
+    Examples:
+        >>> student_item_dict = dict(
+        >>>    student_id="Tim",
+        >>>    item_id="item_1",
+        >>>    course_id="course_1",
+        >>>    item_type="type_one"
+        >>> )
+        >>> submissions, cursor = get_submissions_page(student_item_dict, 20)
+        >>> more_submissions, cursor = get_submissions_page(student_item_dict, 20, cursor)
+
+    """
+    if not isinstance(limit, (int, long)) or limit < 1:
+        raise SubmissionRequestError({'limit': u"Limit must be a positive integer, not {!r}".format(limit)})
+
+    student_item_model = _get_or_create_student_item(student_item_dict)
+    try:
+        rows = list(
+            page_after(
+                Submission.objects.filter(student_item=student_item_model),
+                'submitted_at', cursor=cursor
+            ).values_list('id', 'uuid', 'submitted_at')[:limit + 1]
+        )
+    except ValueError as ex:
+        raise SubmissionRequestError({'cursor': unicode(ex)})
+    except DatabaseError:
+        error_message = (
+            u"Error getting a page of submissions for student item {}"
+            .format(student_item_dict)
+        )
+        logger.exception(error_message)
+        raise SubmissionInternalError(error_message)
+
+    # We read one extra row to find out whether there is another page.
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_id, __, last_submitted_at = rows[-1]
+        next_cursor = encode_cursor(last_submitted_at, last_id)
+
+    submission_uuids = [submission_uuid for __, submission_uuid, __ in rows]
+    submissions, __ = _get_submissions_by_uuids(submission_uuids)
+    return [
+        submissions[submission_uuid]
+        for submission_uuid in submission_uuids
+        if submission_uuid in submissions
+    ], next_cursor
 
 
 def get_score(student_item):
@@ -365,8 +638,10 @@ def get_score(student_item):
 
     """
     try:
-        student_item_model = StudentItem.objects.get(**student_item)
-        score = ScoreSummary.objects.get(student_item=student_item_model).latest
+        student_item_model = _get_student_item(student_item)
+        score = ScoreSummary.objects.select_related(
+            'latest', 'latest__submission'
+        ).get(student_item=student_item_model).latest
     except (ScoreSummary.DoesNotExist, StudentItem.DoesNotExist):
         return None
 
@@ -378,11 +653,13 @@ def get_score(student_item):
         return ScoreSerializer(score).data
 
 
-def get_scores(course_id, student_id):
+def get_scores(course_id, student_id, read_replica=True):
     """Return a dict mapping item_ids -> (points_earned, points_possible).
 
     This method would be used by an LMS to find all the scores for a given
-    student in a given course.
+    student in a given course.  Since a progress page can tolerate a
+    little replication lag, by default the scores are read from the read
+    replica, if one is configured (see `submissions.routers`).
 
     Scores that are "hidden" (because they have points earned set to zero)
     are excluded from the results.
@@ -391,6 +668,10 @@ def get_scores(course_id, student_id):
         course_id (str): Course ID, used to do a lookup on the `StudentItem`.
         student_id (str): Student ID, used to do a lookup on the `StudentItem`.
 
+    Kwargs:
+        read_replica (bool): If False, read from the primary database,
+            for example to show a score that was just set.
+
     Returns:
         dict: The keys are `item_id`s (`str`) and the values are tuples of
         `(points_earned, points_possible)`. All points are integer values and
@@ -404,10 +685,13 @@ def get_scores(course_id, student_id):
         SubmissionInternalError: An unexpected error occurred while resetting scores.
     """
     try:
-        score_summaries = ScoreSummary.objects.filter(
-            student_item__course_id=course_id,
-            student_item__student_id=student_id,
-        ).select_related('latest', 'student_item')
+        with use_read_replica(read_replica):
+            score_summaries = list(
+                ScoreSummary.objects.filter(
+                    student_item__course_id=course_id,
+                    student_item__student_id=student_id,
+                ).select_related('latest', 'student_item')
+            )
     except DatabaseError:
         msg = u"Could not fetch scores for course {}, student {}".format(
             course_id, student_id
@@ -423,10 +707,88 @@ def get_scores(course_id, student_id):
     return scores
 
 
+def iter_scores_for_course(course_id, item_id=None, chunk_size=SCORE_EXPORT_CHUNK_SIZE, read_replica=True):
+    """Iterate over the latest scores of every student in a course.
+
+    This is used to export gradebooks and for analytics, so it reads the
+    score summaries in chunks, each starting after the last summary of the
+    previous chunk.  Each chunk is one query that costs the same however
+    far into the course it is, and only one chunk is held in memory at a time.
+
+    As with `get_scores`, "hidden" scores are excluded.
+
+    Args:
+        course_id (str): The course whose scores to export.
+
+    Kwargs:
+        item_id (str): If provided, only export scores for this item.
+        chunk_size (int): The number of scores to read with each query.
+        read_replica (bool): If True (the default), read the scores from
+            the read replica, if one is configured.
+
+    Yields:
+        tuple of (student_id, item_id, points_earned, points_possible,
+            created_at, submission_uuid) for the latest score of each student
+            item, ordered by when the student item was first scored.
+            The submission UUID is None for scores not tied to a submission.
+
+    Raises:
+        SubmissionInternalError: An unexpected error occurred while reading scores.
+
+    Examples:
+        >>> list(iter_scores_for_course("course_1"))
+        [
+            (u"student_1", u"item_1", 8, 10, datetime.datetime(2014, 2, 7, 20, 6, 42, tzinfo=<UTC>), u"a778b933-..."),
+            (u"student_2", u"item_1", 3, 10, datetime.datetime(2014, 2, 7, 21, 1, 5, tzinfo=<UTC>), u"b5a1d8e2-..."),
+        ]
+
+    """
+    filters = {
+        'student_item__course_id': course_id,
+        'latest__points_possible__gt': 0,
+    }
+    if item_id is not None:
+        filters['student_item__item_id'] = item_id
+
+    last_id = 0
+    while True:
+        try:
+            # Only the query itself is routed, not the code
+            # our caller runs between the rows we yield.
+            with use_read_replica(read_replica):
+                chunk = list(
+                    ScoreSummary.objects.filter(id__gt=last_id, **filters).order_by('id').values_list(
+                        'id',
+                        'student_item__student_id',
+                        'student_item__item_id',
+                        'latest__points_earned',
+                        'latest__points_possible',
+                        'latest__created_at',
+                        'latest__submission__uuid',
+                    )[:chunk_size]
+                )
+        except DatabaseError:
+            msg = u"Could not fetch scores for course {} after score summary {}".format(course_id, last_id)
+            logger.exception(msg)
+            raise SubmissionInternalError(msg)
+
+        for row in chunk:
+            yield row[1:]
+
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
 def get_latest_score_for_submission(submission_uuid):
     """
     Retrieve the latest score for a particular submission.
 
+    Once a submission has a score, it is cached until `set_score` or
+    `set_scores_bulk` gives the submission a new one, so finished
+    workflows can show their score without querying for it.  Submissions
+    without a score are not cached, since they are usually about to get one.
+
     Args:
         submission_uuid (str): The UUID of the submission to retrieve.
 
@@ -434,6 +796,17 @@ def get_latest_score_for_submission(submission_uuid):
         dict: The serialized score model, or None if no score is available.
 
     """
+    cache_key = _latest_score_cache_key(submission_uuid)
+    try:
+        cached_score = cache.get(cache_key)
+    except Exception:
+        # The cache backend could raise an exception
+        # (for example, memcache keys that contain spaces)
+        logger.exception("Error occurred while retrieving a score from the cache")
+        cached_score = None
+    if cached_score is not None:
+        return cached_score
+
     try:
         score = Score.objects.filter(
             submission__uuid=submission_uuid
@@ -443,7 +816,9 @@ def get_latest_score_for_submission(submission_uuid):
     except IndexError:
         return None
 
-    return ScoreSerializer(score).data
+    score_data = ScoreSerializer(score).data
+    cache.set(cache_key, score_data)
+    return score_data
 
 
 def reset_score(student_id, course_id, item_id):
@@ -468,17 +843,19 @@ def reset_score(student_id, course_id, item_id):
     """
     # Retrieve the student item
     try:
-        student_item = StudentItem.objects.get(
-            student_id=student_id, course_id=course_id, item_id=item_id
-        )
+        student_item = _get_student_item({
+            'student_id': student_id, 'course_id': course_id, 'item_id': item_id
+        })
     except StudentItem.DoesNotExist:
         # If there is no student item, then there is no score to reset,
         # so we can return immediately.
         return
 
-    # Create a "reset" score
+    # Create a "reset" score, and update the score summary
+    # in the same transaction.
     try:
-        Score.create_reset_score(student_item)
+        with transaction.commit_on_success():
+            Score.create_reset_score(student_item)
     except DatabaseError:
         msg = (
             u"Error occurred while reseting scores for"
@@ -526,7 +903,7 @@ def set_score(submission_uuid, points_earned, points_possible):
 
     """
     try:
-        submission_model = Submission.objects.get(uuid=submission_uuid)
+        submission_model = Submission.objects.select_related('student_item').get(uuid=submission_uuid)
     except Submission.DoesNotExist:
         raise SubmissionNotFoundError(
             u"No submission matching uuid {}".format(submission_uuid)
@@ -538,30 +915,146 @@ def set_score(submission_uuid, points_earned, points_possible):
         logger.exception(error_msg)
         raise SubmissionRequestError(error_msg)
 
-    score = ScoreSerializer(
-        data={
-            "student_item": submission_model.student_item.pk,
-            "submission": submission_model.pk,
-            "points_earned": points_earned,
-            "points_possible": points_possible,
-        }
-    )
-    if not score.is_valid():
-        logger.exception(score.errors)
-        raise SubmissionInternalError(score.errors)
-
-    # When we save the score, a score summary will be created if
-    # it does not already exist.
-    # When the database's isolation level is set to repeatable-read,
-    # it's possible for a score summary to exist for this student item,
-    # even though we cannot retrieve it.
-    # In this case, we assume that someone else has already created
-    # a score summary and ignore the error.
+    # We already have the submission and student item, so we build the
+    # score model directly rather than validating the foreign keys again
+    # with the serializer.  The points are validated here instead.
+    try:
+        score_model = Score(
+            student_item=submission_model.student_item,
+            submission=submission_model,
+            points_earned=int(points_earned),
+            points_possible=int(points_possible),
+        )
+    except (TypeError, ValueError):
+        score_model = None
+    if score_model is None or score_model.points_earned < 0 or score_model.points_possible < 0:
+        error_msg = u"Invalid score {}/{} for submission {}".format(
+            points_earned, points_possible, submission_uuid
+        )
+        logger.exception(error_msg)
+        raise SubmissionInternalError(error_msg)
+
+    # Saving the score also updates the student item's score summary
+    # (creating it if necessary), so we do both in one transaction.
+    # If someone else creates the summary at the same time,
+    # `ScoreSummary.update_for_score` handles the integrity error itself,
+    # so any database error here means the score was not saved.
+    try:
+        with transaction.commit_on_success():
+            score_model.save()
+    except DatabaseError:
+        error_msg = u"Could not save score {}/{} for submission {}".format(
+            points_earned, points_possible, submission_uuid
+        )
+        logger.exception(error_msg)
+        raise SubmissionInternalError(error_msg)
+
+    # Invalidate the cached score after the new one is committed, so
+    # reads that finish before the commit don't leave the old score cached.
+    cache.delete(_latest_score_cache_key(submission_uuid))
+
+    _log_score(score_model)
+
+
+def set_scores_bulk(scores):
+    """Set scores for many submissions at once.
+
+    This has the same effect as calling `set_score` for each score in
+    order, but resolves the submissions with one query and updates the
+    affected score summaries set-wise, all in one transaction, so only
+    the score inserts grow with the number of scores.  Either all of the
+    scores are set or none of them are.
+
+    Args:
+        scores (list of tuple): Tuples of (submission_uuid, points_earned,
+            points_possible).
+
+    Returns:
+        int: The number of scores set.
+
+    Raises:
+        SubmissionNotFoundError: Thrown if any of the submissions does not exist.
+        SubmissionRequestError: Thrown if any of the scores is invalid.
+        SubmissionInternalError: Thrown if there was an internal error while
+            attempting to save the scores.
+
+    Examples:
+        >>> set_scores_bulk([
+        >>>     ("a778b933-9fb3-11e3-9c0f-040ccee02800", 11, 12),
+        >>>     ("b5a1d8e2-9fb3-11e3-9c0f-040ccee02800", 7, 12),
+        >>> ])
+        2
+
+    """
+    field_errors = dict()
+    cleaned_scores = []
+    for submission_uuid, points_earned, points_possible in scores:
+        try:
+            points_earned, points_possible = int(points_earned), int(points_possible)
+        except (TypeError, ValueError):
+            points_earned = points_possible = -1
+        if points_earned < 0 or points_possible < 0:
+            field_errors[submission_uuid] = u"Invalid score {}/{}".format(
+                points_earned, points_possible
+            )
+        cleaned_scores.append((submission_uuid, points_earned, points_possible))
+
+    if field_errors:
+        raise SubmissionRequestError(field_errors)
+    if not cleaned_scores:
+        return 0
+
+    submission_uuids = set(submission_uuid for submission_uuid, __, __ in cleaned_scores)
     try:
-        score_model = score.save()
-        _log_score(score_model)
-    except IntegrityError:
-        pass
+        submissions = dict(
+            (submission.uuid, submission)
+            for submission in Submission.objects.filter(
+                uuid__in=submission_uuids
+            ).select_related('student_item')
+        )
+    except DatabaseError:
+        error_msg = u"Could not retrieve {} submissions to score.".format(len(submission_uuids))
+        logger.exception(error_msg)
+        raise SubmissionInternalError(error_msg)
+
+    missing_uuids = submission_uuids - set(submissions.keys())
+    if missing_uuids:
+        raise SubmissionNotFoundError(
+            u"No submissions matching uuids {}".format(u", ".join(sorted(missing_uuids)))
+        )
+
+    # Scores are created in the order given, and the score summaries are
+    # updated from the new scores in the same transaction.
+    # `bulk_create` doesn't set primary keys on the scores in this version
+    # of Django, and the summaries need them.  Reading the IDs back by
+    # creation time isn't reliable (some backends only store it to the
+    # second), so the scores are inserted one at a time; the summaries
+    # are still updated set-wise.
+    created_at = now()
+    score_models = [
+        Score(
+            student_item=submissions[submission_uuid].student_item,
+            submission=submissions[submission_uuid],
+            points_earned=points_earned,
+            points_possible=points_possible,
+            created_at=created_at,
+        )
+        for submission_uuid, points_earned, points_possible in cleaned_scores
+    ]
+    try:
+        with transaction.commit_on_success():
+            for score_model in score_models:
+                score_model.save(update_summary=False)
+            ScoreSummary.update_for_scores(score_models)
+    except DatabaseError:
+        error_msg = u"Could not save {} scores.".format(len(score_models))
+        logger.exception(error_msg)
+        raise SubmissionInternalError(error_msg)
+
+    cache.delete_many([_latest_score_cache_key(submission_uuid) for submission_uuid in submission_uuids])
+
+    _log_scores_bulk(score_models)
+    return len(score_models)
 
 
 def _log_submission(submission, student_item):
@@ -641,6 +1134,38 @@ def _log_score(score):
     dog_stats_api.increment('submissions.score.count', tags=tags)
 
 
+def _log_scores_bulk(scores):
+    """
+    Log the creation of many scores with a single aggregated event
+    for each item, rather than one event per score.
+
+    Args:
+        scores (list of Score): The score models.
+
+    Returns:
+        None
+    """
+    scores_by_item = defaultdict(list)
+    for score in scores:
+        student_item = score.student_item
+        scores_by_item[(student_item.course_id, student_item.item_id, student_item.item_type)].append(score)
+
+    for (course_id, item_id, item_type), item_scores in scores_by_item.iteritems():
+        fractions = [score.to_float() for score in item_scores if score.to_float() is not None]
+        logger.info(
+            u"Set {num} scores for item {item_id} in course {course_id} (mean score {mean})".format(
+                num=len(item_scores), item_id=item_id, course_id=course_id,
+                mean=(sum(fractions) / len(fractions)) if fractions else None
+            )
+        )
+        tags = [
+            u"course_id:{course_id}".format(course_id=course_id),
+            u"item_id:{item_id}".format(item_id=item_id),
+            u"item_type:{item_type}".format(item_type=item_type),
+        ]
+        dog_stats_api.increment('submissions.score.count', value=len(item_scores), tags=tags)
+
+
 def _get_or_create_student_item(student_item_dict):
     """Gets or creates a Student Item that matches the values specified.
 
@@ -673,15 +1198,198 @@ def _get_or_create_student_item(student_item_dict):
     """
     try:
         try:
-            return StudentItem.objects.get(**student_item_dict)
+            return _get_student_item(student_item_dict)
         except StudentItem.DoesNotExist:
             student_item_serializer = StudentItemSerializer(
                 data=student_item_dict)
             if not student_item_serializer.is_valid():
                 raise SubmissionRequestError(student_item_serializer.errors)
-            return student_item_serializer.save()
+            student_item = student_item_serializer.save()
+            _cache_student_item(student_item)
+            return student_item
     except DatabaseError:
         error_message = u"An error occurred creating student item: {}".format(
             student_item_dict)
         logger.exception(error_message)
         raise SubmissionInternalError(error_message)
+
+
+def _get_student_item(student_item_dict):
+    """
+    Retrieve the student item matching the values specified, from the
+    cache if possible.
+
+    Student items are cached by their natural key (course ID, student ID,
+    and item ID), so the lookups made on every request for a student
+    don't need to query the database.
+
+    Args:
+        student_item_dict (dict): The dict containing the student_id, item_id,
+            course_id, and (optionally) item_type of the student item.
+
+    Returns:
+        StudentItem
+
+    Raises:
+        StudentItem.DoesNotExist
+        DatabaseError
+
+    """
+    cache_key = _student_item_cache_key(student_item_dict)
+    if cache_key is not None:
+        try:
+            cached_student_item = cache.get(cache_key)
+        except Exception:
+            # The cache backend could raise an exception
+            # (for example, if memcache is unavailable)
+            logger.exception("Error occurred while retrieving student item from the cache")
+            cached_student_item = None
+
+        # The natural key doesn't include the item type, so only use the cached
+        # student item if the item type matches too, just as the query would.
+        if cached_student_item is not None and all(
+            cached_student_item.get(field) == value for field, value in student_item_dict.iteritems()
+        ):
+            return StudentItem(**cached_student_item)
+
+    student_item = StudentItem.objects.get(**student_item_dict)
+    _cache_student_item(student_item)
+    return student_item
+
+
+def _cache_student_item(student_item):
+    """
+    Add a student item to the cache of student items by natural key.
+
+    Student items are never modified once created, so the cache entries
+    don't need to be invalidated.
+
+    Args:
+        student_item (StudentItem): The student item model.
+
+    Returns:
+        None
+
+    """
+    cache_key = _student_item_cache_key({
+        'course_id': student_item.course_id,
+        'student_id': student_item.student_id,
+        'item_id': student_item.item_id,
+    })
+    try:
+        cache.set(cache_key, {
+            'id': student_item.pk,
+            'course_id': student_item.course_id,
+            'student_id': student_item.student_id,
+            'item_id': student_item.item_id,
+            'item_type': student_item.item_type,
+        })
+    except Exception:
+        logger.exception("Error occurred while caching student item {}".format(student_item.pk))
+
+
+def _student_item_cache_key(student_item_dict):
+    """
+    Return the cache key for a student item's natural key.
+
+    Course, student, and item IDs can be long and contain characters
+    that memcached doesn't allow in keys, so the key contains a hash of them.
+
+    Args:
+        student_item_dict (dict): The dict containing the student_id, item_id,
+            and course_id of the student item.
+
+    Returns:
+        str, or None if the dict doesn't contain the full natural key.
+
+    """
+    try:
+        natural_key = [
+            unicode(student_item_dict[field])
+            for field in ('course_id', 'student_id', 'item_id')
+        ]
+    except KeyError:
+        return None
+    digest = hashlib.sha1(json.dumps(natural_key).encode('utf-8')).hexdigest()
+    return "submissions.student_item_by_key.{}".format(digest)
+
+
+def _latest_score_cache_key(submission_uuid):
+    """
+    Return the cache key for the latest score of a submission.
+
+    Args:
+        submission_uuid (str): The UUID of the submission.
+
+    Returns:
+        str
+
+    """
+    return "submissions.latest_score.{}".format(submission_uuid)
+
+
+def _pack_cached_submission(submission_data):
+    """
+    Prepare a serialized submission for the cache, compressing it if
+    answer compression is enabled and it's large enough to be worth it.
+
+    Compressed submissions take less of the cache, so more of them fit,
+    at the cost of decompressing them on each read.
+
+    Args:
+        submission_data (dict): The serialized submission.
+
+    Returns:
+        dict: Either the serialized submission, or a dict with the
+            compressed, pickled submission under the "compressed" key.
+
+    """
+    if not answer_compression_enabled():
+        return submission_data
+    return _compress_cached_submission(submission_data)
+
+
+def _compress_cached_submission(submission_data):
+    """
+    Compress a serialized submission for the cache, whatever the
+    answer compression setting, unless it's too small to be worth it.
+
+    Args:
+        submission_data (dict): The serialized submission.
+
+    Returns:
+        dict: Either the serialized submission, or a dict with the
+            compressed, pickled submission under the "compressed" key.
+
+    """
+    pickled = pickle.dumps(submission_data, pickle.HIGHEST_PROTOCOL)
+    if len(pickled) < COMPRESS_ANSWER_MIN_SIZE:
+        return submission_data
+
+    compressed = zlib.compress(pickled)
+    if len(compressed) >= len(pickled):
+        return submission_data
+    return {'compressed': compressed}
+
+
+def _unpack_cached_submission(cached_submission):
+    """
+    Return the serialized submission in a cache entry made by
+    `_pack_cached_submission`, decompressing it if necessary.
+
+    Args:
+        cached_submission (dict or None): The value from the cache.
+
+    Returns:
+        dict or None: The serialized submission, or None if it wasn't
+            in the cache or can't be decompressed.
+
+    """
+    if not cached_submission or 'compressed' not in cached_submission:
+        return cached_submission
+
+    try:
+        return pickle.loads(zlib.decompress(cached_submission['compressed']))
+    except Exception:
+        logger.exception("Could not decompress a cached submission")
+        return None
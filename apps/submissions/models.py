@@ -9,12 +9,13 @@ need to then generate a matching migration for it using:
     ./manage.py schemamigration submissions --auto
 
 """
+import base64
 import json
 import logging
+import zlib
 
-from django.db import models, DatabaseError
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.conf import settings
+from django.db import connections, models, router, transaction, IntegrityError
 from django.utils.timezone import now
 from django_extensions.db.fields import UUIDField
 
@@ -22,6 +23,78 @@ from django_extensions.db.fields import UUIDField
 logger = logging.getLogger(__name__)
 
 
+# Compressed answers are stored as this prefix followed by the
+# base64-encoded, zlib-compressed UTF-8 JSON.  JSON text can't start
+# with this prefix, so uncompressed answers are always recognized.
+COMPRESSED_ANSWER_PREFIX = u"zlib:"
+
+# Answers shorter than this (in characters of JSON) aren't compressed;
+# the savings would be too small to be worth decompressing for.
+COMPRESS_ANSWER_MIN_SIZE = 1024
+
+
+def answer_compression_enabled():
+    """
+    Return whether new answers should be stored compressed, as configured
+    by `EDX_ORA2["COMPRESS_SUBMISSION_ANSWERS"]` (off by default).
+
+    Compressed answers are always readable, whatever this setting.
+
+    Returns:
+        bool
+
+    """
+    return getattr(settings, "EDX_ORA2", {}).get("COMPRESS_SUBMISSION_ANSWERS", False)
+
+
+def compress_raw_answer(raw_answer):
+    """
+    Compress a JSON-serialized answer for storage.
+
+    Args:
+        raw_answer (unicode): The JSON-serialized answer, which may
+            already be compressed.
+
+    Returns:
+        unicode: The compressed answer, or `raw_answer` unchanged if it's
+            already compressed, or too short to be worth compressing,
+            or compression doesn't make it shorter.
+
+    """
+    if len(raw_answer) < COMPRESS_ANSWER_MIN_SIZE or raw_answer.startswith(COMPRESSED_ANSWER_PREFIX):
+        return raw_answer
+
+    if isinstance(raw_answer, unicode):
+        raw_answer_bytes = raw_answer.encode('utf-8')
+    else:
+        raw_answer_bytes = raw_answer
+    compressed = COMPRESSED_ANSWER_PREFIX + base64.b64encode(zlib.compress(raw_answer_bytes)).decode('ascii')
+    return compressed if len(compressed) < len(raw_answer) else raw_answer
+
+
+def decompress_raw_answer(raw_answer):
+    """
+    Return the JSON-serialized answer stored in `Submission.raw_answer`,
+    decompressing it if necessary.
+
+    Args:
+        raw_answer (unicode): The stored answer.
+
+    Returns:
+        unicode or str
+
+    Raises:
+        ValueError: The answer is marked as compressed but can't be decompressed.
+
+    """
+    if not raw_answer.startswith(COMPRESSED_ANSWER_PREFIX):
+        return raw_answer
+    try:
+        return zlib.decompress(base64.b64decode(raw_answer[len(COMPRESSED_ANSWER_PREFIX):])).decode('utf-8')
+    except (TypeError, zlib.error, UnicodeDecodeError) as ex:
+        raise ValueError(u"Could not decompress answer: {}".format(ex))
+
+
 class StudentItem(models.Model):
     """Represents a single item for a single course for a single user.
 
@@ -87,7 +160,8 @@ class Submission(models.Model):
     # When this row was created.
     created_at = models.DateTimeField(editable=False, default=now, db_index=True)
 
-    # The answer (JSON-serialized)
+    # The answer (JSON-serialized), compressed if it was saved with
+    # answer compression enabled.  Use `decompress_raw_answer` to read it.
     raw_answer = models.TextField(blank=True)
 
     def __repr__(self):
@@ -103,7 +177,18 @@ class Submission(models.Model):
     def __unicode__(self):
         return u"Submission {}".format(self.uuid)
 
+    def save(self, *args, **kwargs):
+        """
+        Save the submission, compressing the answer if answer
+        compression is enabled.
+        """
+        if answer_compression_enabled():
+            self.raw_answer = compress_raw_answer(self.raw_answer)
+        super(Submission, self).save(*args, **kwargs)
+
     class Meta:
+        # Migration 0006 adds an index on (student_item, submitted_at, id),
+        # which keyset pagination of a student item's submissions relies on.
         ordering = ["-submitted_at", "-id"]
 
 
@@ -205,6 +290,24 @@ class Score(models.Model):
             reset=True,
         )
 
+    def save(self, *args, **kwargs):
+        """
+        Save the score, and update the student item's score summary
+        if the score is new.
+
+        Scores are immutable, so the summary only needs to change when a
+        score is created.
+
+        Kwargs:
+            update_summary (bool): If False, don't update the summary;
+                the caller updates it (see `ScoreSummary.update_for_scores`).
+        """
+        update_summary = kwargs.pop('update_summary', True)
+        created = self.pk is None
+        super(Score, self).save(*args, **kwargs)
+        if created and update_summary:
+            ScoreSummary.update_for_score(self)
+
     def __unicode__(self):
         return u"{0.points_earned}/{0.points_possible}".format(self)
 
@@ -216,45 +319,261 @@ class ScoreSummary(models.Model):
     highest = models.ForeignKey(Score, related_name="+")
     latest = models.ForeignKey(Score, related_name="+")
 
+    # Denormalized `highest.to_float()`, so we can decide whether a new
+    # score replaces the highest score without loading it.
+    # Null if the highest score is hidden (e.g. a "reset" score).
+    highest_fraction = models.FloatField(null=True, default=None)
+
     class Meta:
         verbose_name_plural = "Score Summaries"
 
-    @receiver(post_save, sender=Score)
-    def update_score_summary(sender, **kwargs):
+    # Maximum number of student items whose summaries are updated by a single
+    # statement in `update_for_scores`.  Each student item adds nine query
+    # parameters, and SQLite allows at most 999.
+    BULK_UPDATE_SIZE = 100
+
+    @classmethod
+    def update_for_score(cls, score):
         """
-        Listen for new Scores and update the relevant ScoreSummary.
+        Update the score summary for a newly created score.
+
+        The summary is updated with a single UPDATE statement, which
+        replaces the highest score only if the new score is higher,
+        so we don't need to read the summary or the current highest score.
+        The summary is created if it doesn't exist yet.
 
         Args:
-            sender: not used
+            score (Score): The newly created score.
 
-        Kwargs:
-            instance (Score): The score model whose save triggered this receiver.
+        Returns:
+            None
+
+        Raises:
+            DatabaseError
 
         """
-        score = kwargs['instance']
+        if cls._update_summary_row(score):
+            return
+
+        using = router.db_for_write(cls)
+        sid = transaction.savepoint(using=using)
         try:
-            score_summary = ScoreSummary.objects.get(
-                student_item=score.student_item
-            )
-            score_summary.latest = score
-
-            # A score with the "reset" flag set will always replace the current highest score
-            if score.reset:
-                score_summary.highest = score
-            # The conversion to a float may return None if points possible is zero
-            # In Python, None is always less than an integer, so any score
-            # with non-null points possible will take precedence.
-            elif score.to_float() > score_summary.highest.to_float():
-                score_summary.highest = score
-            score_summary.save()
-        except ScoreSummary.DoesNotExist:
-            ScoreSummary.objects.create(
+            cls.objects.create(
                 student_item=score.student_item,
                 highest=score,
                 latest=score,
+                highest_fraction=score.to_float(),
+            )
+            transaction.savepoint_commit(sid, using=using)
+        except IntegrityError:
+            # Someone else created the summary in the meantime,
+            # so update theirs instead.
+            transaction.savepoint_rollback(sid, using=using)
+            cls._update_summary_row(score)
+
+    @classmethod
+    def update_for_scores(cls, scores):
+        """
+        Update the score summaries for many newly created scores at once.
+
+        This has the same effect as calling `update_for_score` for each
+        score in order of creation, but reads the existing summaries with
+        one query, updates them with one UPDATE statement per
+        `BULK_UPDATE_SIZE` student items, and creates missing summaries
+        with a single bulk insert.
+
+        Args:
+            scores (list of Score): The newly created scores.  These must
+                have been saved, and must not be "reset" scores.
+
+        Returns:
+            None
+
+        Raises:
+            DatabaseError
+
+        """
+        # For each student item, find its latest new score and its highest
+        # visible new score.  Scores are considered in order of creation,
+        # and (like `update_for_score`) a later score only replaces the
+        # highest score if it is strictly higher.
+        latest = dict()
+        highest = dict()
+        for score in sorted(scores, key=lambda score: score.pk):
+            student_item_id = score.student_item_id
+            latest[student_item_id] = score
+            fraction = score.to_float()
+            if fraction is not None:
+                best = highest.get(student_item_id)
+                if best is None or best.to_float() < fraction:
+                    highest[student_item_id] = score
+
+        if not latest:
+            return
+
+        existing_ids = set(
+            cls.objects.filter(student_item__in=latest.keys()).values_list('student_item_id', flat=True)
+        )
+        existing = [student_item_id for student_item_id in latest if student_item_id in existing_ids]
+        for start in range(0, len(existing), cls.BULK_UPDATE_SIZE):
+            batch = existing[start:start + cls.BULK_UPDATE_SIZE]
+            cls._update_summary_rows(batch, latest, highest)
+
+        missing = [
+            cls(
+                student_item_id=student_item_id,
+                latest=latest[student_item_id],
+                highest=highest.get(student_item_id, latest[student_item_id]),
+                highest_fraction=highest[student_item_id].to_float() if student_item_id in highest else None,
+            )
+            for student_item_id in latest if student_item_id not in existing_ids
+        ]
+        if missing:
+            using = router.db_for_write(cls)
+            sid = transaction.savepoint(using=using)
+            try:
+                cls.objects.bulk_create(missing)
+                transaction.savepoint_commit(sid, using=using)
+            except IntegrityError:
+                # Someone else created some of the summaries in the meantime,
+                # so fall back to updating them one score at a time.
+                transaction.savepoint_rollback(sid, using=using)
+                missing_ids = set(summary.student_item_id for summary in missing)
+                for score in sorted(scores, key=lambda score: score.pk):
+                    if score.student_item_id in missing_ids:
+                        cls.update_for_score(score)
+
+    @classmethod
+    def _update_summary_rows(cls, student_item_ids, latest, highest):
+        """
+        Update the summaries of several student items with one UPDATE statement.
+
+        Args:
+            student_item_ids (list of int): The student items whose summaries to update.
+            latest (dict): Maps each student item ID to its new latest score.
+            highest (dict): Maps student item IDs to their highest visible
+                new score, if they have one.
+
+        Returns:
+            None
+
+        Raises:
+            DatabaseError
+
+        """
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        student_item = qn(cls._meta.get_field('student_item').column)
+        highest_column = qn(cls._meta.get_field('highest').column)
+        fraction_column = qn('highest_fraction')
+
+        latest_cases = []
+        latest_params = []
+        highest_cases = []
+        highest_params = []
+        fraction_cases = []
+        fraction_params = []
+        for student_item_id in student_item_ids:
+            latest_cases.append(u"WHEN %s THEN %s")
+            latest_params.extend([student_item_id, latest[student_item_id].pk])
+
+            score = highest.get(student_item_id)
+            if score is not None:
+                condition = u"WHEN {student_item} = %s AND ({fraction} IS NULL OR {fraction} < %s) THEN %s".format(
+                    student_item=student_item, fraction=fraction_column
+                )
+                highest_cases.append(condition)
+                highest_params.extend([student_item_id, score.to_float(), score.pk])
+                fraction_cases.append(condition)
+                fraction_params.extend([student_item_id, score.to_float(), score.to_float()])
+
+        # MySQL evaluates SET assignments from left to right, so
+        # `highest_fraction` has to be assigned last.
+        assignments = [
+            u"{latest} = CASE {student_item} {cases} END".format(
+                latest=qn(cls._meta.get_field('latest').column),
+                student_item=student_item,
+                cases=u" ".join(latest_cases),
             )
-        except DatabaseError as err:
-            logger.exception(
-                u"Error while updating score summary for student item {}"
-                .format(score.student_item)
+        ]
+        if highest_cases:
+            assignments.append(u"{highest} = CASE {cases} ELSE {highest} END".format(
+                highest=highest_column, cases=u" ".join(highest_cases)
+            ))
+            assignments.append(u"{fraction} = CASE {cases} ELSE {fraction} END".format(
+                fraction=fraction_column, cases=u" ".join(fraction_cases)
+            ))
+
+        sql = u"UPDATE {table} SET {assignments} WHERE {student_item} IN ({ids})".format(
+            table=qn(cls._meta.db_table),
+            assignments=u", ".join(assignments),
+            student_item=student_item,
+            ids=u", ".join([u"%s"] * len(student_item_ids)),
+        )
+        cursor = connection.cursor()
+        cursor.execute(
+            sql,
+            latest_params + highest_params + fraction_params + list(student_item_ids)
+        )
+        transaction.commit_unless_managed(using=using)
+
+    @classmethod
+    def _update_summary_row(cls, score):
+        """
+        Point the summary's latest score (and, if the new score is higher,
+        its highest score) at a new score.
+
+        Args:
+            score (Score): The newly created score.
+
+        Returns:
+            bool: True if a summary was updated, False if none exists.
+
+        Raises:
+            DatabaseError
+
+        """
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        fraction = score.to_float()
+
+        # A score with the "reset" flag set will always replace the current highest score.
+        # Hidden scores (where points possible is zero) never replace the highest score.
+        # Otherwise, a score replaces the highest score if it is higher, or if the
+        # highest score is hidden.
+        if score.reset:
+            replace_condition = u"1 = 1"
+            params = []
+        elif fraction is None:
+            replace_condition = u"1 = 0"
+            params = []
+        else:
+            replace_condition = u"{fraction} IS NULL OR {fraction} < %s".format(
+                fraction=qn('highest_fraction')
             )
+            params = [fraction]
+
+        # MySQL evaluates SET assignments from left to right, so
+        # `highest_fraction` has to be assigned last.
+        sql = (
+            u"UPDATE {table} SET {latest} = %s, "
+            u"{highest} = CASE WHEN {condition} THEN %s ELSE {highest} END, "
+            u"{fraction} = CASE WHEN {condition} THEN %s ELSE {fraction} END "
+            u"WHERE {student_item} = %s"
+        ).format(
+            table=qn(cls._meta.db_table),
+            latest=qn(cls._meta.get_field('latest').column),
+            highest=qn(cls._meta.get_field('highest').column),
+            fraction=qn('highest_fraction'),
+            student_item=qn(cls._meta.get_field('student_item').column),
+            condition=replace_condition,
+        )
+        cursor = connection.cursor()
+        cursor.execute(
+            sql,
+            [score.pk] + params + [score.pk] + params + [fraction, score.student_item_id]
+        )
+        transaction.commit_unless_managed(using=using)
+        return cursor.rowcount > 0
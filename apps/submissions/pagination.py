@@ -0,0 +1,84 @@
+"""
+Keyset ("cursor") pagination of submissions and scores.
+
+Rather than skipping `offset` rows, each page starts just after the last
+row of the previous page, identified by an opaque cursor encoding that
+row's timestamp and ID.  With an index on the ordering columns, a deep
+page costs the same as the first page.
+
+Pages are ordered newest first, by (timestamp, ID) descending, which
+matches the default ordering of `Submission`.
+"""
+import base64
+import calendar
+import datetime
+
+from django.db.models import Q
+from django.utils.timezone import utc
+
+
+def encode_cursor(timestamp, pk):
+    """
+    Encode the position of a row as an opaque cursor.
+
+    Args:
+        timestamp (datetime): The row's timestamp (timezone-aware).
+        pk (int): The row's primary key.
+
+    Returns:
+        str: A URL-safe cursor.
+
+    """
+    micros = calendar.timegm(timestamp.utctimetuple()) * 1000000 + timestamp.microsecond
+    return base64.urlsafe_b64encode("{}.{}".format(micros, pk)).rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        tuple of (timestamp, pk)
+
+    Raises:
+        ValueError: The cursor is invalid.
+
+    """
+    try:
+        cursor = str(cursor)
+        micros, pk = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).split('.')
+        timestamp = datetime.datetime(1970, 1, 1, tzinfo=utc) + datetime.timedelta(microseconds=int(micros))
+        return timestamp, int(pk)
+    except (TypeError, ValueError, UnicodeEncodeError, OverflowError):
+        raise ValueError(u"Invalid cursor: {!r}".format(cursor))
+
+
+def page_after(queryset, timestamp_field, cursor=None):
+    """
+    Order a queryset newest first, starting after the row identified by a cursor.
+
+    Args:
+        queryset (QuerySet): The rows to page through.
+        timestamp_field (str): The name of the timestamp field to order by.
+
+    Kwargs:
+        cursor (str): The cursor of the last row of the previous page,
+            or None for the first page.
+
+    Returns:
+        QuerySet
+
+    Raises:
+        ValueError: The cursor is invalid.
+
+    """
+    if cursor is not None:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{"{}__lt".format(timestamp_field): timestamp}) |
+            Q(**{timestamp_field: timestamp, "id__lt": pk})
+        )
+    return queryset.order_by("-{}".format(timestamp_field), "-id")
@@ -0,0 +1,113 @@
+"""
+Route pure reads to a read replica of the database.
+
+Most of what the submissions and assessment APIs read must reflect what
+was just written (a student who submits an answer expects to see it),
+so by default every query goes to the primary database.  Reads that can
+tolerate replication lag, such as progress pages, staff statistics and
+data exports, are wrapped in `use_read_replica()`; while that hint is
+active, `ReadReplicaRouter` sends their queries to the replica instead.
+
+To enable this, configure the replica as a database alias, name it in
+`EDX_ORA2["READ_REPLICA"]`, and install the router:
+
+    DATABASES = {
+        'default': {...},
+        'read_replica': {...},
+    }
+    DATABASE_ROUTERS = ['submissions.routers.ReadReplicaRouter']
+    EDX_ORA2 = {"READ_REPLICA": "read_replica"}
+
+If no replica is configured, the hint has no effect.
+"""
+from contextlib import contextmanager
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+_HINT = threading.local()
+
+
+def read_replica_alias():
+    """
+    Return the database alias of the configured read replica.
+
+    Returns:
+        str or None: The alias, or None if no replica is configured.
+
+    """
+    alias = getattr(settings, "EDX_ORA2", {}).get("READ_REPLICA")
+    return alias if alias in settings.DATABASES else None
+
+
+def reading_from_replica():
+    """
+    Check whether the current thread's reads are being sent to the replica.
+
+    Returns:
+        bool
+
+    """
+    return getattr(_HINT, "use_replica", False) and read_replica_alias() is not None
+
+
+@contextmanager
+def use_read_replica(enabled=True):
+    """
+    Send reads in this block (on this thread) to the read replica, if one is configured.
+
+    Only wrap code that does not need to read its own writes:
+    the replica may lag behind the primary.
+
+    Kwargs:
+        enabled (bool): If False, reads in this block go to the primary,
+            even if an enclosing block sends them to the replica.  This
+            lets API functions take the hint as an argument.
+
+    Example usage:
+        >>> with use_read_replica():
+        >>>     scores = ScoreSummary.objects.filter(...)
+
+    """
+    previous = getattr(_HINT, "use_replica", False)
+    _HINT.use_replica = enabled
+    try:
+        yield
+    finally:
+        _HINT.use_replica = previous
+
+
+class ReadReplicaRouter(object):
+    """
+    Send reads to the read replica while `use_read_replica()` is active.
+
+    Writes always go to the primary, and the router has no opinion about
+    anything else, so it can be combined with other routers.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return read_replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Without a router, Django saves an object to the database it was
+        # read from, so make sure objects read from the replica are saved
+        # to the primary.
+        replica = read_replica_alias()
+        instance = hints.get('instance')
+        if replica is not None and instance is not None and instance._state.db == replica:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so objects
+        # read from either may be related to each other.
+        replica = read_replica_alias()
+        if replica is not None:
+            databases = set([DEFAULT_DB_ALIAS, replica])
+            if obj1._state.db in databases and obj2._state.db in databases:
+                return True
+        return None
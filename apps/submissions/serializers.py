@@ -2,9 +2,41 @@
 Serializers are created to ensure models do not have to be accessed outside the
 scope of the Tim APIs.
 """
+import importlib
 import json
 from rest_framework import serializers
-from submissions.models import StudentItem, Submission, Score
+from submissions.models import StudentItem, Submission, Score, decompress_raw_answer
+
+
+# Modules that can decode JSON, fastest first.  ujson and simplejson
+# (with its C extension) decode large answers several times faster than
+# the standard library, so we use one of them if it's installed.
+JSON_DECODERS = ['ujson', 'simplejson', 'json']
+
+
+def _load_json_decoder(module_names):
+    """
+    Import the first JSON module that's installed.
+
+    Args:
+        module_names (list of str): Names of modules providing `loads`.
+
+    Returns:
+        module
+
+    Raises:
+        ImportError: None of the modules could be imported.
+
+    """
+    for module_name in module_names:
+        try:
+            return importlib.import_module(module_name)
+        except ImportError:
+            pass
+    raise ImportError(u"No JSON module found in {}".format(module_names))
+
+
+json_decoder = _load_json_decoder(JSON_DECODERS)
 
 
 class JsonFieldError(Exception):
@@ -23,7 +55,8 @@ class JsonField(serializers.WritableField):
         Deserialize the JSON string.
 
         Args:
-            obj (str): The JSON string stored in the database.
+            obj (str): The JSON string stored in the database,
+                which may be compressed.
 
         Returns:
             JSON-serializable
@@ -31,8 +64,22 @@ class JsonField(serializers.WritableField):
         Raises:
             JsonFieldError: The field could not be deserialized.
         """
+        # Decode byte strings first, so every decoder returns unicode strings
+        # (simplejson returns byte strings for ASCII text in byte strings).
+        if isinstance(obj, str):
+            try:
+                obj = obj.decode('utf-8')
+            except UnicodeDecodeError:
+                raise JsonFieldError(u"Could not deserialize as JSON: {!r}".format(obj))
+
+        if isinstance(obj, basestring):
+            try:
+                obj = decompress_raw_answer(obj)
+            except ValueError:
+                raise JsonFieldError(u"Could not decompress JSON: {!r}".format(obj[:100]))
+
         try:
-            return json.loads(obj)
+            return json_decoder.loads(obj)
         except (TypeError, ValueError):
             raise JsonFieldError(u"Could not deserialize as JSON: {}".format(obj))
 
@@ -5,12 +5,13 @@ from ddt import ddt, file_data
 from django.db import DatabaseError
 from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import override_settings
 from nose.tools import raises
 from mock import patch
 import pytz
 
 from submissions import api as api
-from submissions.models import ScoreSummary, Submission, StudentItem
+from submissions.models import ScoreSummary, Submission, StudentItem, COMPRESSED_ANSWER_PREFIX
 from submissions.serializers import StudentItemSerializer
 
 STUDENT_ITEM = dict(
@@ -73,6 +74,124 @@ class TestSubmissionsApi(TestCase):
         self._assert_submission(submissions[1], ANSWER_ONE, student_item.pk, 1)
         self._assert_submission(submissions[0], ANSWER_TWO, student_item.pk, 2)
 
+    def test_compressed_answers(self):
+        large_answer = {"text": u"All work and no play makes Jack a dull boy. " * 500}
+
+        # Submitted before compression was enabled
+        uncompressed = api.create_submission(STUDENT_ITEM, large_answer)
+
+        with override_settings(EDX_ORA2={"COMPRESS_SUBMISSION_ANSWERS": True}):
+            compressed = api.create_submission(STUDENT_ITEM, large_answer)
+            small = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+            self.assertEqual(compressed["answer"], large_answer)
+
+            stored = Submission.objects.get(uuid=compressed["uuid"]).raw_answer
+            self.assertTrue(stored.startswith(COMPRESSED_ANSWER_PREFIX))
+
+            # Both are readable, and large submissions are compressed in the cache
+            self.assertEqual(api.get_submission(compressed["uuid"]), compressed)
+            self.assertEqual(api.get_submissions(STUDENT_ITEM), [small, compressed, uncompressed])
+            self.assertIn("compressed", cache.get("submissions.submission.{}".format(compressed["uuid"])))
+            self.assertNotIn("compressed", cache.get("submissions.submission.{}".format(small["uuid"])))
+            self.assertEqual(api.get_submission(compressed["uuid"]), compressed)
+            self.assertEqual(api.get_submission(uncompressed["uuid"]), uncompressed)
+
+        # Compressed answers and cache entries are still readable
+        # after compression is disabled.
+        self.assertEqual(api.get_submission(compressed["uuid"]), compressed)
+        cache.clear()
+        self.assertEqual(api.get_submission(compressed["uuid"]), compressed)
+
+    def test_corrupt_compressed_cache_entry(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        cache.set("submissions.submission.{}".format(submission["uuid"]), {"compressed": "not zlib"})
+
+        # Treated as a cache miss
+        self.assertEqual(api.get_submission(submission["uuid"]), submission)
+
+    def test_get_submissions_cached(self):
+        first = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        second = api.create_submission(STUDENT_ITEM, ANSWER_TWO)
+
+        # The first request loads the submissions from the database
+        with self.assertNumQueries(2):
+            submissions = api.get_submissions(STUDENT_ITEM)
+        self.assertEqual(submissions, [second, first])
+
+        # After that, only their uuids are queried, and the answers
+        # aren't deserialized again.
+        with patch('submissions.serializers.json_decoder') as mock_decoder:
+            with self.assertNumQueries(1):
+                self.assertEqual(api.get_submissions(STUDENT_ITEM), [second, first])
+            self.assertFalse(mock_decoder.loads.called)
+
+        # Submissions from the cache are shared with `get_submission`
+        with self.assertNumQueries(0):
+            self.assertEqual(api.get_submission(first["uuid"]), first)
+
+        # The limit applies to the query
+        with self.assertNumQueries(1):
+            self.assertEqual(api.get_submissions(STUDENT_ITEM, 1), [second])
+
+    def test_get_submissions_page(self):
+        # Two of the submissions share a timestamp, so the
+        # cursor must also use the ID to order them.
+        submitted_at = datetime.datetime(2014, 3, 1, 12, 30, 15, 123456, pytz.UTC)
+        submissions = [
+            api.create_submission(STUDENT_ITEM, ANSWER_ONE, submitted_at=submitted_at),
+            api.create_submission(STUDENT_ITEM, ANSWER_TWO, submitted_at=submitted_at),
+            api.create_submission(STUDENT_ITEM, ANSWER_ONE, submitted_at=submitted_at + datetime.timedelta(days=1)),
+            api.create_submission(STUDENT_ITEM, ANSWER_TWO, submitted_at=submitted_at + datetime.timedelta(days=2)),
+            api.create_submission(STUDENT_ITEM, ANSWER_ONE, submitted_at=submitted_at + datetime.timedelta(days=3)),
+        ]
+        api.create_submission(SECOND_STUDENT_ITEM, ANSWER_ONE)
+        newest_first = list(reversed(submissions))
+        self.assertEqual(api.get_submissions(STUDENT_ITEM), newest_first)
+
+        pages = []
+        cursor = None
+        while True:
+            page, cursor = api.get_submissions_page(STUDENT_ITEM, 2, cursor=cursor)
+            pages.append(page)
+            if cursor is None:
+                break
+        self.assertEqual(pages, [newest_first[0:2], newest_first[2:4], newest_first[4:]])
+
+        # A page that ends exactly at the last submission has no next page
+        page, cursor = api.get_submissions_page(STUDENT_ITEM, 5)
+        self.assertEqual(page, newest_first)
+        self.assertIs(cursor, None)
+
+    def test_get_submissions_page_queries(self):
+        for __ in range(3):
+            api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        __, cursor = api.get_submissions_page(STUDENT_ITEM, 1)
+
+        # Once the submissions are cached, deeper pages
+        # are read with a single query, like the first.
+        api.get_submissions(STUDENT_ITEM)
+        with self.assertNumQueries(1):
+            page, cursor = api.get_submissions_page(STUDENT_ITEM, 1, cursor=cursor)
+        self.assertEqual(len(page), 1)
+        self.assertIsNot(cursor, None)
+
+    def test_get_submissions_page_no_submissions(self):
+        self.assertEqual(api.get_submissions_page(STUDENT_ITEM, 10), ([], None))
+
+    @raises(api.SubmissionRequestError)
+    def test_get_submissions_page_invalid_cursor(self):
+        api.get_submissions_page(STUDENT_ITEM, 10, cursor="not a cursor")
+
+    @raises(api.SubmissionRequestError)
+    def test_get_submissions_page_invalid_limit(self):
+        api.get_submissions_page(STUDENT_ITEM, 0)
+
+    @patch.object(Submission.objects, 'filter')
+    @raises(api.SubmissionInternalError)
+    def test_get_submissions_page_database_error(self, mock_filter):
+        mock_filter.side_effect = DatabaseError("Bad things happened")
+        api.get_submissions_page(STUDENT_ITEM, 10)
+
     def test_get_submission(self):
         # Test base case that we can create a submission and get it back
         sub_dict1 = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
@@ -213,6 +332,120 @@ class TestSubmissionsApi(TestCase):
         self.assertEqual(sub, db_sub)
         self.assertEqual(sub, cached_sub)
 
+    def test_student_item_caching(self):
+        api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_score(api.get_submissions(STUDENT_ITEM)[0]["uuid"], 1, 2)
+
+        # The student item was cached when it was created,
+        # so we only need to query for the submissions and scores.
+        with self.assertNumQueries(1):
+            api.get_submissions(STUDENT_ITEM)
+        with self.assertNumQueries(1):
+            api.get_score(STUDENT_ITEM)
+
+        # It's found again after the cache is cleared
+        cache.clear()
+        with self.assertNumQueries(2):
+            api.get_score(STUDENT_ITEM)
+        with self.assertNumQueries(1):
+            api.get_score(STUDENT_ITEM)
+
+    def test_student_item_caching_item_type_mismatch(self):
+        api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+
+        # The cached student item isn't used if the item type doesn't match,
+        # just as the query wouldn't match it.
+        other_type = dict(STUDENT_ITEM, item_type="other_type")
+        self.assertIs(api.get_score(other_type), None)
+        self.assertEqual(api.get_submissions(STUDENT_ITEM)[0]["answer"], ANSWER_ONE)
+
+    def test_student_item_cache_key_long_ids(self):
+        # Course IDs can be longer than memcached allows, and contain spaces
+        student_item = dict(STUDENT_ITEM, course_id=u"long course ID \u2603 " * 12)
+        api.create_submission(student_item, ANSWER_ONE)
+        cache_key = api._student_item_cache_key(student_item)
+        self.assertLess(len(cache_key), 250)
+        self.assertNotIn(u" ", cache_key)
+        self.assertEqual(cache.get(cache_key)["course_id"], student_item["course_id"])
+
+        # Different IDs are cached separately
+        self.assertNotEqual(cache_key, api._student_item_cache_key(STUDENT_ITEM))
+
+    def test_get_submissions_by_uuids(self):
+        sub1 = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        sub2 = api.create_submission(SECOND_STUDENT_ITEM, ANSWER_TWO)
+
+        # Both submissions are loaded in one query; unknown uuids are left out
+        with self.assertNumQueries(1):
+            submissions = api.get_submissions_by_uuids([sub1['uuid'], sub2['uuid'], u'no such uuid'])
+        self.assertEqual(submissions, {sub1['uuid']: sub1, sub2['uuid']: sub2})
+
+        # The next request hits the cache only
+        with self.assertNumQueries(0):
+            self.assertEqual(api.get_submissions_by_uuids([sub1['uuid'], sub2['uuid']]), submissions)
+
+        # The bulk and single submission APIs share the cache
+        with self.assertNumQueries(0):
+            self.assertEqual(api.get_submission(sub1['uuid']), sub1)
+
+    def test_get_submissions_by_uuids_partially_cached(self):
+        sub1 = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        sub2 = api.create_submission(SECOND_STUDENT_ITEM, ANSWER_TWO)
+        api.get_submission(sub1['uuid'])
+
+        with patch.object(Submission.objects, 'filter', wraps=Submission.objects.filter) as mock_filter:
+            submissions = api.get_submissions_by_uuids([sub1['uuid'], sub2['uuid']])
+            mock_filter.assert_called_once_with(uuid__in=set([sub2['uuid']]))
+        self.assertEqual(submissions, {sub1['uuid']: sub1, sub2['uuid']: sub2})
+
+    def test_get_submissions_by_uuids_empty(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(api.get_submissions_by_uuids([]), {})
+
+    @raises(api.SubmissionRequestError)
+    def test_get_submissions_by_uuids_not_string(self):
+        api.get_submissions_by_uuids([u'abc', 20])
+
+    @patch.object(Submission.objects, 'filter')
+    @raises(api.SubmissionInternalError)
+    def test_get_submissions_by_uuids_database_error(self, mock_filter):
+        mock_filter.side_effect = DatabaseError("Kaboom!")
+        api.get_submissions_by_uuids([u'000000000000000'])
+
+    def test_get_submission_and_student_many(self):
+        sub1 = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        sub2 = api.create_submission(SECOND_STUDENT_ITEM, ANSWER_TWO)
+
+        # Submissions and student items are loaded in one query
+        with self.assertNumQueries(1):
+            results = api.get_submission_and_student_many([sub1['uuid'], sub2['uuid']])
+
+        self.assertEqual(set(results.keys()), set([sub1['uuid'], sub2['uuid']]))
+        for sub in [sub1, sub2]:
+            self.assertEqual(results[sub['uuid']], api.get_submission_and_student(sub['uuid']))
+        self.assertEqual(results[sub1['uuid']]['student_item']['student_id'], STUDENT_ITEM['student_id'])
+        self.assertEqual(results[sub2['uuid']]['student_item']['student_id'], SECOND_STUDENT_ITEM['student_id'])
+
+        # Afterwards, everything comes from the cache
+        with self.assertNumQueries(0):
+            self.assertEqual(api.get_submission_and_student_many([sub1['uuid'], sub2['uuid']]), results)
+
+    def test_get_submission_and_student_many_cached_submissions(self):
+        sub1 = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        sub2 = api.create_submission(SECOND_STUDENT_ITEM, ANSWER_TWO)
+
+        # The submissions are cached, but their student items aren't,
+        # so the student items are loaded in one query.
+        api.get_submissions_by_uuids([sub1['uuid'], sub2['uuid']])
+        cache.delete_many([
+            "submissions.student_item.{}".format(sub1['student_item']),
+            "submissions.student_item.{}".format(sub2['student_item']),
+        ])
+        with self.assertNumQueries(1):
+            results = api.get_submission_and_student_many([sub1['uuid'], sub2['uuid']])
+        self.assertEqual(results[sub1['uuid']]['student_item']['student_id'], STUDENT_ITEM['student_id'])
+        self.assertEqual(results[sub2['uuid']]['student_item']['student_id'], SECOND_STUDENT_ITEM['student_id'])
+
     """
     Testing Scores
     """
@@ -226,6 +459,172 @@ class TestSubmissionsApi(TestCase):
         score = api.get_latest_score_for_submission(submission["uuid"])
         self._assert_score(score, 11, 12)
 
+    def test_latest_score_cached(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_score(submission["uuid"], 1, 12)
+        with self.assertNumQueries(1):
+            self._assert_score(api.get_latest_score_for_submission(submission["uuid"]), 1, 12)
+        with self.assertNumQueries(0):
+            self._assert_score(api.get_latest_score_for_submission(submission["uuid"]), 1, 12)
+
+        # Setting a new score replaces the cached one
+        api.set_score(submission["uuid"], 11, 12)
+        self._assert_score(api.get_latest_score_for_submission(submission["uuid"]), 11, 12)
+        api.set_scores_bulk([(submission["uuid"], 7, 12)])
+        self._assert_score(api.get_latest_score_for_submission(submission["uuid"]), 7, 12)
+
+    def test_missing_score_not_cached(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        self.assertIs(api.get_latest_score_for_submission(submission["uuid"]), None)
+        with self.assertNumQueries(1):
+            self.assertIs(api.get_latest_score_for_submission(submission["uuid"]), None)
+
+    def test_set_score_num_queries(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_score(submission["uuid"], 1, 12)
+
+        # One query to retrieve the submission and its student item,
+        # and two statements to write the score and update the summary.
+        with self.assertNumQueries(3):
+            api.set_score(submission["uuid"], 11, 12)
+
+        score = api.get_score(STUDENT_ITEM)
+        self._assert_score(score, 11, 12)
+
+    @raises(api.SubmissionInternalError)
+    def test_set_score_invalid_points(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_score(submission["uuid"], "eleven", 12)
+
+    @raises(api.SubmissionInternalError)
+    def test_set_score_negative_points(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        try:
+            api.set_score(submission["uuid"], -1, 12)
+        finally:
+            self.assertIs(api.get_score(STUDENT_ITEM), None)
+
+    @patch.object(ScoreSummary, 'update_for_score')
+    @raises(api.SubmissionInternalError)
+    def test_set_score_database_error(self, mock_update):
+        mock_update.side_effect = DatabaseError("Oh no!")
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_score(submission["uuid"], 1, 2)
+
+    def test_set_scores_bulk(self):
+        first = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        second = api.create_submission(SECOND_STUDENT_ITEM, ANSWER_ONE)
+        third_item = dict(STUDENT_ITEM, student_id="Xander")
+        third = api.create_submission(third_item, ANSWER_ONE)
+
+        # The first student already has a higher score,
+        # and the second student already has a lower one.
+        api.set_score(first["uuid"], 10, 12)
+        api.set_score(second["uuid"], 1, 12)
+
+        num_scores = api.set_scores_bulk([
+            (first["uuid"], 5, 12),
+            (second["uuid"], 6, 12),
+            (second["uuid"], 4, 12),
+            (third["uuid"], 0, 0),
+            (third["uuid"], 3, 12),
+        ])
+        self.assertEqual(num_scores, 5)
+
+        # Same result as setting the scores one at a time
+        self._assert_score(api.get_score(STUDENT_ITEM), 5, 12)
+        self._assert_score(api.get_score(SECOND_STUDENT_ITEM), 4, 12)
+        self._assert_score(api.get_score(third_item), 3, 12)
+
+        first_summary = ScoreSummary.objects.get(student_item__student_id=STUDENT_ITEM["student_id"])
+        self.assertEqual(first_summary.highest.points_earned, 10)
+        second_summary = ScoreSummary.objects.get(student_item__student_id=SECOND_STUDENT_ITEM["student_id"])
+        self.assertEqual(second_summary.highest.points_earned, 6)
+        self.assertEqual(second_summary.highest_fraction, 0.5)
+        third_summary = ScoreSummary.objects.get(student_item__student_id="Xander")
+        self.assertEqual(third_summary.highest.points_earned, 3)
+        self.assertEqual(third_summary.highest_fraction, 0.25)
+
+    def test_set_scores_bulk_num_queries(self):
+        submissions = [
+            api.create_submission(dict(STUDENT_ITEM, student_id=u"student{}".format(num)), ANSWER_ONE)
+            for num in range(10)
+        ]
+        api.set_score(submissions[0]["uuid"], 1, 12)
+
+        # Resolve the submissions, insert the scores, read the existing
+        # summaries, update them, and create the missing ones.
+        # Only the inserts depend on the number of scores.
+        with self.assertNumQueries(14):
+            api.set_scores_bulk([(submission["uuid"], 7, 12) for submission in submissions])
+
+        for num in range(10):
+            score = api.get_score(dict(STUDENT_ITEM, student_id=u"student{}".format(num)))
+            self._assert_score(score, 7, 12)
+
+    def test_set_scores_bulk_after_reset(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_score(submission["uuid"], 11, 12)
+        api.reset_score(STUDENT_ITEM["student_id"], STUDENT_ITEM["course_id"], STUDENT_ITEM["item_id"])
+
+        api.set_scores_bulk([(submission["uuid"], 2, 12)])
+        self._assert_score(api.get_score(STUDENT_ITEM), 2, 12)
+        summary = ScoreSummary.objects.get(student_item__student_id=STUDENT_ITEM["student_id"])
+        self.assertEqual(summary.highest.points_earned, 2)
+
+    def test_set_scores_bulk_empty(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(api.set_scores_bulk([]), 0)
+
+    @raises(api.SubmissionNotFoundError)
+    def test_set_scores_bulk_submission_not_found(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        try:
+            api.set_scores_bulk([(submission["uuid"], 1, 2), (u"no-such-submission", 1, 2)])
+        finally:
+            # None of the scores were set
+            self.assertIs(api.get_score(STUDENT_ITEM), None)
+
+    def test_set_scores_bulk_invalid_points(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        with self.assertRaises(api.SubmissionRequestError) as context:
+            api.set_scores_bulk([(submission["uuid"], "eleven", 12)])
+        self.assertIn(submission["uuid"], context.exception.field_errors)
+
+    def test_set_scores_bulk_ignores_other_scores(self):
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_score(submission["uuid"], 10, 12)
+
+        # Scores created for the same submission outside this call
+        # are not mistaken for the new ones.
+        api.set_scores_bulk([(submission["uuid"], 2, 12), (submission["uuid"], 3, 12)])
+        self._assert_score(api.get_score(STUDENT_ITEM), 3, 12)
+        summary = ScoreSummary.objects.get(student_item__student_id=STUDENT_ITEM["student_id"])
+        self.assertEqual(summary.highest.points_earned, 10)
+        self.assertEqual(summary.latest.points_earned, 3)
+
+    @patch('submissions.api.now')
+    def test_set_scores_bulk_same_created_at(self, mock_now):
+        mock_now.return_value = datetime.datetime(2014, 2, 7, 20, 6, 42, tzinfo=pytz.UTC)
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_scores_bulk([(submission["uuid"], 1, 12), (submission["uuid"], 3, 12)])
+
+        # Another call creates scores for this submission in the same second
+        api.set_score(submission["uuid"], 4, 12)
+        api.set_scores_bulk([(submission["uuid"], 2, 12)])
+
+        self._assert_score(api.get_score(STUDENT_ITEM), 2, 12)
+        summary = ScoreSummary.objects.get(student_item__student_id=STUDENT_ITEM["student_id"])
+        self.assertEqual(summary.highest.points_earned, 4)
+        self.assertEqual(summary.latest.points_earned, 2)
+
+    @patch.object(ScoreSummary, 'update_for_scores')
+    @raises(api.SubmissionInternalError)
+    def test_set_scores_bulk_database_error(self, mock_update):
+        mock_update.side_effect = DatabaseError("Oh no!")
+        submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
+        api.set_scores_bulk([(submission["uuid"], 1, 2)])
+
     def test_get_score(self):
         submission = api.create_submission(STUDENT_ITEM, ANSWER_ONE)
         api.set_score(submission["uuid"], 11, 12)
@@ -288,6 +687,53 @@ class TestSubmissionsApi(TestCase):
         mock_filter.side_effect = DatabaseError("Bad things happened")
         api.get_scores("some_course", "some_student")
 
+    def test_iter_scores_for_course(self):
+        student_items = [
+            dict(STUDENT_ITEM, student_id=u"student{}".format(num))
+            for num in range(5)
+        ]
+        submissions = [api.create_submission(student_item, ANSWER_ONE) for student_item in student_items]
+        for num, submission in enumerate(submissions):
+            api.set_score(submission["uuid"], num, 10)
+
+        # The latest score is exported
+        api.set_score(submissions[0]["uuid"], 8, 10)
+
+        # Hidden and reset scores are excluded
+        api.set_score(submissions[1]["uuid"], 0, 0)
+        api.reset_score(u"student2", STUDENT_ITEM["course_id"], STUDENT_ITEM["item_id"])
+
+        # Scores for other items in the course are included unless we filter by item
+        other_item = dict(STUDENT_ITEM, student_id=u"student0", item_id=u"other_item")
+        other_submission = api.create_submission(other_item, ANSWER_ONE)
+        api.set_score(other_submission["uuid"], 4, 5)
+
+        # One query per chunk, including a final empty chunk
+        with self.assertNumQueries(3):
+            scores = list(api.iter_scores_for_course(STUDENT_ITEM["course_id"], chunk_size=2))
+
+        self.assertEqual(
+            [score[:4] + score[5:] for score in scores],
+            [
+                (u"student0", u"item_one", 8, 10, submissions[0]["uuid"]),
+                (u"student3", u"item_one", 3, 10, submissions[3]["uuid"]),
+                (u"student4", u"item_one", 4, 10, submissions[4]["uuid"]),
+                (u"student0", u"other_item", 4, 5, other_submission["uuid"]),
+            ]
+        )
+
+        scores = list(api.iter_scores_for_course(STUDENT_ITEM["course_id"], item_id=u"other_item"))
+        self.assertEqual([score[0:2] for score in scores], [(u"student0", u"other_item")])
+
+    def test_iter_scores_for_course_no_scores(self):
+        self.assertEqual(list(api.iter_scores_for_course(u"no_such_course")), [])
+
+    @patch.object(ScoreSummary.objects, 'filter')
+    @raises(api.SubmissionInternalError)
+    def test_error_on_iter_scores_for_course(self, mock_filter):
+        mock_filter.side_effect = DatabaseError("Bad things happened")
+        list(api.iter_scores_for_course("some_course"))
+
     def _assert_score(
             self,
             score,
@@ -1,9 +1,17 @@
 """
 Tests for submission models.
 """
-
+import base64
+import json
+import os
 from django.test import TestCase
-from submissions.models import Submission, Score, ScoreSummary, StudentItem
+from django.test.utils import override_settings
+from nose.tools import raises
+from submissions.models import (
+    Submission, Score, ScoreSummary, StudentItem,
+    compress_raw_answer, decompress_raw_answer,
+    COMPRESSED_ANSWER_PREFIX, COMPRESS_ANSWER_MIN_SIZE
+)
 
 
 class TestScoreSummary(TestCase):
@@ -164,3 +172,101 @@ class TestScoreSummary(TestCase):
         highest = ScoreSummary.objects.get(student_item=item).highest
         self.assertEqual(highest.points_earned, 1)
         self.assertEqual(highest.points_possible, 2)
+
+    def test_highest_fraction(self):
+        item = StudentItem.objects.create(
+            student_id="score_test_student",
+            course_id="score_test_course",
+            item_id="i4x://mycourse/special_presentation"
+        )
+        submission = Submission.objects.create(student_item=item, attempt_number=1)
+
+        # The highest score's fraction is stored on the summary
+        for points_earned, expected_fraction in [(1, 0.25), (3, 0.75), (2, 0.75)]:
+            Score.objects.create(
+                student_item=item,
+                submission=submission,
+                points_earned=points_earned,
+                points_possible=4,
+            )
+            summary = ScoreSummary.objects.get(student_item=item)
+            self.assertEqual(summary.highest_fraction, expected_fraction)
+            self.assertEqual(summary.highest.to_float(), expected_fraction)
+
+        # A reset score has no fraction
+        Score.create_reset_score(item)
+        self.assertIs(ScoreSummary.objects.get(student_item=item).highest_fraction, None)
+
+    def test_update_summary_num_queries(self):
+        item = StudentItem.objects.create(
+            student_id="score_test_student",
+            course_id="score_test_course",
+            item_id="i4x://mycourse/special_presentation"
+        )
+        submission = Submission.objects.create(student_item=item, attempt_number=1)
+
+        # The first score creates the summary
+        with self.assertNumQueries(3):
+            Score.objects.create(student_item=item, submission=submission, points_earned=1, points_possible=2)
+
+        # Later scores insert the score and update the summary,
+        # without reading the summary or the highest score.
+        with self.assertNumQueries(2):
+            Score.objects.create(student_item=item, submission=submission, points_earned=2, points_possible=2)
+        with self.assertNumQueries(2):
+            Score.objects.create(student_item=item, submission=submission, points_earned=0, points_possible=2)
+
+        summary = ScoreSummary.objects.get(student_item=item)
+        self.assertEqual((summary.highest.points_earned, summary.highest.points_possible), (2, 2))
+        self.assertEqual((summary.latest.points_earned, summary.latest.points_possible), (0, 2))
+
+
+class TestAnswerCompression(TestCase):
+    """
+    Test compression of stored answers.
+    """
+
+    LARGE_ANSWER = json.dumps({"text": u"The quick brown fox \u2603 jumps over the lazy dog. " * 100})
+
+    def test_round_trip(self):
+        compressed = compress_raw_answer(self.LARGE_ANSWER)
+        self.assertTrue(compressed.startswith(COMPRESSED_ANSWER_PREFIX))
+        self.assertLess(len(compressed), len(self.LARGE_ANSWER))
+        self.assertEqual(decompress_raw_answer(compressed), self.LARGE_ANSWER)
+
+        # Compressing again does nothing
+        self.assertEqual(compress_raw_answer(compressed), compressed)
+
+    def test_small_answer_not_compressed(self):
+        raw_answer = json.dumps("a" * (COMPRESS_ANSWER_MIN_SIZE - 10))
+        self.assertEqual(compress_raw_answer(raw_answer), raw_answer)
+
+    def test_incompressible_answer_not_compressed(self):
+        # Random data doesn't compress, so it's stored as it is
+        raw_answer = json.dumps(base64.b64encode(os.urandom(3000)))
+        self.assertEqual(compress_raw_answer(raw_answer), raw_answer)
+
+    def test_uncompressed_answer_readable(self):
+        self.assertEqual(decompress_raw_answer(self.LARGE_ANSWER), self.LARGE_ANSWER)
+        self.assertEqual(decompress_raw_answer(u""), u"")
+
+    @raises(ValueError)
+    def test_decompress_corrupt_answer(self):
+        decompress_raw_answer(COMPRESSED_ANSWER_PREFIX + u"bm90IHpsaWI=")
+
+    def test_save_compressed(self):
+        item = StudentItem.objects.create(
+            student_id="compression_test_student",
+            course_id="compression_test_course",
+            item_id="compression_test_item",
+        )
+
+        # Off by default
+        submission = Submission.objects.create(student_item=item, attempt_number=1, raw_answer=self.LARGE_ANSWER)
+        self.assertEqual(Submission.objects.get(pk=submission.pk).raw_answer, self.LARGE_ANSWER)
+
+        with override_settings(EDX_ORA2={"COMPRESS_SUBMISSION_ANSWERS": True}):
+            submission = Submission.objects.create(student_item=item, attempt_number=2, raw_answer=self.LARGE_ANSWER)
+        stored = Submission.objects.get(pk=submission.pk).raw_answer
+        self.assertTrue(stored.startswith(COMPRESSED_ANSWER_PREFIX))
+        self.assertEqual(decompress_raw_answer(stored), self.LARGE_ANSWER)
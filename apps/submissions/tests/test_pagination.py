@@ -0,0 +1,29 @@
+"""
+Tests for keyset pagination cursors.
+"""
+import datetime
+
+from django.test import TestCase
+import pytz
+
+from submissions.pagination import encode_cursor, decode_cursor
+
+
+class TestCursors(TestCase):
+
+    def test_round_trip(self):
+        timestamp = datetime.datetime(2014, 3, 1, 12, 30, 15, 123456, pytz.UTC)
+        cursor = encode_cursor(timestamp, 42)
+        self.assertEqual(decode_cursor(cursor), (timestamp, 42))
+
+        # Cursors are safe to use in URLs without quoting
+        self.assertRegexpMatches(cursor, r'^[A-Za-z0-9_-]+$')
+
+    def test_round_trip_other_timezone(self):
+        timestamp = datetime.datetime(2014, 3, 1, 12, 30, 15, tzinfo=pytz.timezone('America/New_York'))
+        self.assertEqual(decode_cursor(encode_cursor(timestamp, 1)), (timestamp, 1))
+
+    def test_invalid_cursor(self):
+        for cursor in ["", "not a cursor", "MTIzNDU", u"\u2603", encode_cursor(datetime.datetime.now(pytz.UTC), 1)[:-3]]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
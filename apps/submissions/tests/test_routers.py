@@ -0,0 +1,123 @@
+"""
+Tests for routing reads to the read replica.
+"""
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from submissions import api as sub_api
+from submissions.models import Score, ScoreSummary, StudentItem, Submission
+from submissions.routers import ReadReplicaRouter, reading_from_replica, use_read_replica
+
+STUDENT_ITEM = dict(
+    student_id="Tim",
+    course_id="Demo_Course",
+    item_id="item_one",
+    item_type="Peer_Submission",
+)
+
+REPLICA = "read_replica"
+
+
+@override_settings(EDX_ORA2={"READ_REPLICA": REPLICA})
+class TestReadReplica(TestCase):
+
+    multi_db = True
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Add a second in-memory SQLite database to act as the replica.
+
+        Its tables are created directly from the models, since
+        data migrations only know how to read the default database.
+        """
+        super(TestReadReplica, cls).setUpClass()
+        connections.databases[REPLICA] = dict(connections.databases['default'], NAME=':memory:')
+        call_command(
+            'syncdb', database=REPLICA, migrate_all=True, migrate=False,
+            interactive=False, verbosity=0
+        )
+
+        # The test runner does this for the databases it creates;
+        # without it, the tests can't roll back their changes.
+        connections[REPLICA].features.confirm()
+
+    @classmethod
+    def tearDownClass(cls):
+        delattr(connections._connections, REPLICA)  # pylint:disable=W0212
+        del connections.databases[REPLICA]
+        super(TestReadReplica, cls).tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        submission = sub_api.create_submission(STUDENT_ITEM, u"answer")
+        sub_api.set_score(submission["uuid"], 3, 4)
+
+    def _replicate(self):
+        """
+        Copy everything on the primary to the replica.
+        """
+        for model in [StudentItem, Submission, Score, ScoreSummary]:
+            for obj in model.objects.using('default').all():
+                obj.save(using=REPLICA, force_insert=True)
+
+    def test_get_scores(self):
+        # Nothing has been replicated yet
+        self.assertEqual(sub_api.get_scores("Demo_Course", "Tim"), {})
+
+        # Ask to read our own writes
+        self.assertEqual(sub_api.get_scores("Demo_Course", "Tim", read_replica=False), {"item_one": (3, 4)})
+
+        self._replicate()
+        self.assertEqual(sub_api.get_scores("Demo_Course", "Tim"), {"item_one": (3, 4)})
+
+    def test_iter_scores_for_course(self):
+        self.assertEqual(list(sub_api.iter_scores_for_course("Demo_Course")), [])
+        self.assertEqual(len(list(sub_api.iter_scores_for_course("Demo_Course", read_replica=False))), 1)
+
+        # The hint only applies to the queries for each chunk, not to
+        # whatever the caller does while iterating over the scores.
+        self._replicate()
+        for __ in sub_api.iter_scores_for_course("Demo_Course"):
+            self.assertFalse(reading_from_replica())
+
+    def test_nested_hints(self):
+        self.assertFalse(reading_from_replica())
+        with use_read_replica():
+            self.assertTrue(reading_from_replica())
+            with use_read_replica(False):
+                self.assertFalse(reading_from_replica())
+            self.assertTrue(reading_from_replica())
+        self.assertFalse(reading_from_replica())
+
+    def test_writes_go_to_primary(self):
+        self._replicate()
+        with use_read_replica():
+            student_item = StudentItem.objects.get(student_id="Tim")
+            self.assertEqual(student_item._state.db, REPLICA)  # pylint:disable=W0212
+
+            student_item.item_type = "changed"
+            student_item.save()
+
+        self.assertEqual(StudentItem.objects.using('default').get(student_id="Tim").item_type, "changed")
+        self.assertEqual(StudentItem.objects.using(REPLICA).get(student_id="Tim").item_type, "Peer_Submission")
+
+    def test_allow_relation(self):
+        self._replicate()
+        router = ReadReplicaRouter()
+        on_primary = Submission.objects.using('default').get()
+        on_replica = StudentItem.objects.using(REPLICA).get()
+        self.assertTrue(router.allow_relation(on_primary, on_replica))
+
+    def test_replica_not_configured(self):
+        with override_settings(EDX_ORA2={}):
+            with use_read_replica():
+                self.assertFalse(reading_from_replica())
+                self.assertEqual(sub_api.get_scores("Demo_Course", "Tim"), {"item_one": (3, 4)})
+
+        with override_settings(EDX_ORA2={"READ_REPLICA": "no_such_database"}):
+            with use_read_replica():
+                self.assertFalse(reading_from_replica())
@@ -1,9 +1,13 @@
 """
 Tests for submissions serializers.
 """
+import json
 from django.test import TestCase
+from nose.tools import raises
 from submissions.models import Score, StudentItem
-from submissions.serializers import ScoreSerializer
+from submissions.serializers import (
+    ScoreSerializer, JsonField, JsonFieldError, _load_json_decoder
+)
 
 
 class ScoreSerializerTest(TestCase):
@@ -30,3 +34,37 @@ class ScoreSerializerTest(TestCase):
         self.assertIs(score_dict['submission_uuid'], None)
         self.assertEqual(score_dict['points_earned'], 2)
         self.assertEqual(score_dict['points_possible'], 6)
+
+
+class JsonFieldTest(TestCase):
+    """
+    Tests for the JSON field.
+    """
+
+    ANSWER = {u"text": u"\u2603 " * 1000, u"files": [1, 2.5, None, True]}
+
+    def test_decode_matches_standard_library(self):
+        raw_answer = json.dumps(self.ANSWER)
+        self.assertEqual(JsonField().to_native(raw_answer), json.loads(raw_answer))
+        self.assertEqual(JsonField().to_native(raw_answer.decode('utf-8')), json.loads(raw_answer))
+
+    def test_decode_returns_unicode(self):
+        answer = JsonField().to_native(json.dumps({"text": "ascii"}))
+        self.assertIsInstance(answer.keys()[0], unicode)
+        self.assertIsInstance(answer["text"], unicode)
+
+    @raises(JsonFieldError)
+    def test_decode_invalid(self):
+        JsonField().to_native("{not json")
+
+    @raises(JsonFieldError)
+    def test_decode_invalid_utf8(self):
+        JsonField().to_native("\xff")
+
+    def test_load_json_decoder_fallback(self):
+        # Modules that aren't installed are skipped
+        self.assertIs(_load_json_decoder(["no_such_json_module", "json"]), json)
+
+    @raises(ImportError)
+    def test_load_json_decoder_none_installed(self):
+        _load_json_decoder(["no_such_json_module"])
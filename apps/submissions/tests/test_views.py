@@ -0,0 +1,98 @@
+"""
+Tests for the submissions developer views and admin.
+"""
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from mock import patch
+import pytz
+
+from submissions import api as sub_api
+from submissions import views
+from submissions.admin import CURSOR_VAR
+
+STUDENT_ITEM = dict(
+    student_id="Tim",
+    course_id="Demo_Course",
+    item_id="item_one",
+    item_type="Peer_Submission",
+)
+
+
+class TestSubmissionViews(TestCase):
+
+    urls = 'submissions.tests.urls'
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+        start = datetime.datetime(2014, 3, 1, tzinfo=pytz.UTC)
+        self.submissions = [
+            sub_api.create_submission(
+                STUDENT_ITEM, u"answer {}".format(num),
+                submitted_at=start + datetime.timedelta(hours=num)
+            )
+            for num in range(5)
+        ]
+
+    def _student_item_url(self):
+        return '/submissions/{student_id}/{course_id}/{item_id}'.format(**STUDENT_ITEM)
+
+    @patch.object(views, 'PAGE_SIZE', 2)
+    def test_student_item_pages(self):
+        uuids = []
+        response = self.client.get(self._student_item_url())
+        while True:
+            self.assertEqual(response.status_code, 200)
+            uuids.extend(submission['uuid'] for submission in response.context['submissions'])
+            next_cursor = response.context['next_cursor']
+            if next_cursor is None:
+                break
+            self.assertContains(response, 'Next page')
+            response = self.client.get(self._student_item_url(), {'cursor': next_cursor})
+
+        self.assertEqual(uuids, [submission['uuid'] for submission in reversed(self.submissions)])
+
+    def test_student_item_invalid_cursor(self):
+        response = self.client.get(self._student_item_url(), {'cursor': 'not a cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('error', response.context)
+
+    def test_admin_submission_pages(self):
+        uuids = []
+        params = {}
+        while True:
+            with patch('submissions.admin.SubmissionAdmin.list_per_page', 2):
+                response = self.client.get('/admin/submissions/submission/', params)
+            self.assertEqual(response.status_code, 200)
+            cl = response.context['cl']
+            uuids.extend(submission.uuid for submission in cl.result_list)
+            if cl.next_cursor is None:
+                break
+            self.assertContains(response, cl.next_page_url())
+            params = {CURSOR_VAR: cl.next_cursor}
+
+        self.assertEqual(uuids, [submission['uuid'] for submission in reversed(self.submissions)])
+
+    def test_admin_sorted_by_column(self):
+        # Sorting by a column uses the default paginator
+        response = self.client.get('/admin/submissions/submission/', {'o': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['cl'].keyset_paginated)
+        self.assertEqual(response.context['cl'].result_count, 5)
+
+    def test_admin_invalid_cursor(self):
+        response = self.client.get('/admin/submissions/submission/', {CURSOR_VAR: 'not a cursor'})
+
+        # The admin redirects invalid lookup parameters to the unfiltered list
+        self.assertEqual(response.status_code, 302)
+
+    def test_admin_scores(self):
+        sub_api.set_score(self.submissions[0]['uuid'], 1, 2)
+        response = self.client.get('/admin/submissions/score/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 1)
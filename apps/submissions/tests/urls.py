@@ -0,0 +1,15 @@
+"""
+URLs for testing the submissions views and admin on their own.
+"""
+from django.conf.urls import include, patterns, url
+from django.contrib import admin
+
+import submissions.urls
+
+admin.autodiscover()
+
+urlpatterns = patterns(
+    '',
+    url(r'^admin/', include(admin.site.urls)),
+    url(r'^submissions/', include(submissions.urls)),
+)
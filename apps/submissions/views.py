@@ -2,10 +2,13 @@ import logging
 from django.contrib.auth.decorators import login_required
 
 from django.shortcuts import render_to_response
-from submissions.api import SubmissionRequestError, get_submissions
+from submissions.api import SubmissionError, SubmissionRequestError, get_submissions_page
 
 log = logging.getLogger(__name__)
 
+# Number of submissions shown on each page
+PAGE_SIZE = 50
+
 
 @login_required()
 def get_submissions_for_student_item(request, course_id, student_id, item_id):
@@ -15,6 +18,9 @@ def get_submissions_for_student_item(request, course_id, student_id, item_id):
     student item. The student item is specified by the unique combination of
     course, student, and item.
 
+    Submissions are shown a page at a time, newest first; the `cursor`
+    query parameter selects the page after the one it was returned with.
+
     Args:
         request (dict): The request.
         course_id (str): The course id for this student item.
@@ -33,10 +39,16 @@ def get_submissions_for_student_item(request, course_id, student_id, item_id):
         item_id=item_id,
     )
     context = dict(**student_item_dict)
+    cursor = request.GET.get('cursor')
     try:
-        submissions = get_submissions(student_item_dict)
+        submissions, next_cursor = get_submissions_page(student_item_dict, PAGE_SIZE, cursor=cursor)
         context["submissions"] = submissions
+        context["cursor"] = cursor
+        context["next_cursor"] = next_cursor
     except SubmissionRequestError:
-        context["error"] = "The specified student item was not found."
+        context["error"] = "The specified student item or page was not found."
+    except SubmissionError:
+        log.exception(u"Could not retrieve submissions for {}".format(student_item_dict))
+        context["error"] = "The submissions could not be retrieved."
 
     return render_to_response('submissions.html', context)
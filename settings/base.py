@@ -153,6 +153,10 @@ CACHES = {
     },
 }
 
+# Send reads that can tolerate replication lag to a read replica,
+# if one is configured with `EDX_ORA2["READ_REPLICA"]`.
+DATABASE_ROUTERS = ['submissions.routers.ReadReplicaRouter']
+
 EDX_ORA2 = {
 
 }
@@ -22,6 +22,11 @@ DEBUG_TOOLBAR_PATCH_SETTINGS = False
 
 INTERNAL_IPS = ('127.0.0.1',)
 
+# Route reads that tolerate replication lag through a second alias.
+# Locally it points at the same SQLite file as the primary, so it never lags.
+DATABASES['read_replica'] = dict(DATABASES['default'])
+EDX_ORA2["READ_REPLICA"] = "read_replica"
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
@@ -45,6 +45,9 @@ EDX_ORA2["EVENT_LOGGER"] = "openassessment.workflow.test.events.fake_event_logge
 # which executes tasks synchronously instead of using the task queue.
 CELERY_ALWAYS_EAGER = True
 
+# Tests that turn off eager mode queue tasks in memory.
+BROKER_URL = 'memory://'
+
 
 # Silence cache key warnings
 # https://docs.djangoproject.com/en/1.4/topics/cache/#cache-key-warnings